@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Measures the network traffic of multiplayer games with pickled and encoded packets.
+
+A headless game with AI players only (see simulate.py) is played. The commands the AI
+players issue in a tick are handed to an MPManager as if the local player had issued them,
+and the MPManager talks to a simulated second player over a loopback interface. Every
+datagram it sends is decoded again.
+
+The result compares the previous way of sending every packet pickled on its own with what
+the MPManager sends now (batched, encoded by the BinaryCodec once the codec has been
+negotiated): number of datagrams, bytes and the time needed to encode and decode them.
+
+Examples:
+	development/benchmark_mp_codec.py --ticks 5000 --map-seed 5
+	development/benchmark_mp_codec.py --output codec.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from functools import partial
+from unittest import mock
+
+# make this script work both when started inside development and in the uh root dir
+if not os.path.exists('content'):
+	os.chdir('..')
+assert os.path.exists('content'), 'Content dir not found.'
+sys.path.append('.')
+
+from development.simulate import setup_environment # isort:skip
+
+
+class LoopbackInterface:
+	"""Stands in for the NetworkInterface of an MPManager.
+
+	Sent packets are serialized and decoded like the other players would do it, packets
+	added with deliver() are returned by the next receive_all().
+	"""
+
+	def __init__(self):
+		self.incoming = []
+		self.sent = [] # [(packets, datagram)]
+		self.encode_time = 0.0
+		self.decode_time = 0.0
+
+	def deliver(self, packet):
+		self.incoming.append(packet)
+
+	def receive_all(self):
+		received, self.incoming = self.incoming, []
+		return received
+
+	def send_packet(self, packet, binary=False):
+		from horizons.network import packets
+
+		start = time.perf_counter()
+		data = packets.client.game_data(packet, binary=binary).serialize()
+		self.encode_time += time.perf_counter() - start
+		start = time.perf_counter()
+		packets.unserialize(data)
+		self.decode_time += time.perf_counter() - start
+		self.sent.append((packet, data))
+
+
+def measure_pickled(sent):
+	"""Sends the packets like before, each one pickled in its own datagram.
+	@return: (datagrams, bytes, encode time, decode time)"""
+	from horizons.network import packets
+
+	datagrams = size = 0
+	encode_time = decode_time = 0.0
+	for packet_list, _ in sent:
+		for packet in packet_list:
+			start = time.perf_counter()
+			data = packets.client.game_data(packet).serialize()
+			encode_time += time.perf_counter() - start
+			start = time.perf_counter()
+			packets.unserialize(data)
+			decode_time += time.perf_counter() - start
+			datagrams += 1
+			size += len(data)
+	return datagrams, size, encode_time, decode_time
+
+
+def run_benchmark(ticks, ai_players=2, map_seed=5, sp_seed=1):
+	"""Plays a game and records the traffic of an MPManager.
+
+	@return: dict with datagrams, bytes and times of both ways to send the packets
+	"""
+	setup_environment()
+
+	from horizons.manager import CommandPacket, MPManager, SPManager
+	from horizons.network.codec import BinaryCodec
+	from horizons.scheduler import Scheduler
+	from horizons.util.random_map import generate_map_from_seed
+	from tests.game import SPTestSession, new_session
+
+	session, _ = new_session(mapgen=partial(generate_map_from_seed, map_seed), rng_seed=sp_seed,
+	                         human_player=False, ai_players=ai_players)
+	try:
+		issued = []
+		def execute(manager, command, local=False):
+			if not local:
+				issued.append(command)
+			return command(issuer=manager.session.world.player)
+
+		local_id, peer_id = 1, 2
+		mp_session = mock.Mock()
+		mp_session.world.player.worldid = local_id
+		mp_session.world.players = [local_id, peer_id]
+		# the checkup hashes use the rng, don't change the game by that
+		mp_session.random = random.Random(sp_seed)
+		loopback = LoopbackInterface()
+		manager = MPManager(mp_session, loopback)
+
+		scheduler = Scheduler()
+		with mock.patch.object(SPManager, 'execute', execute):
+			for _ in range(ticks):
+				tick = scheduler.cur_tick + 1
+				scheduler.tick(tick)
+				manager.gamecommands, issued[:] = list(issued), []
+				loopback.deliver(CommandPacket(manager.calculate_execution_tick(tick), peer_id, [],
+				                               codec=BinaryCodec.get_schema_id()))
+				manager.can_tick(tick)
+				# the packets aren't executed, drop them
+				manager.commandsmanager.get_packets_for_tick(tick)
+				manager.localcommandsmanager.get_packets_for_tick(tick)
+				manager.checkuphashmanager.get_packets_for_tick(tick)
+			manager.end()
+
+		datagrams, size, encode_time, decode_time = measure_pickled(loopback.sent)
+		result = {
+			'map_seed': map_seed,
+			'sp_seed': sp_seed,
+			'ai_players': ai_players,
+			'ticks': ticks,
+			'commands': sum(len(p.commandlist) for packets, _ in loopback.sent
+			                for p in packets if isinstance(p, CommandPacket)),
+			'pickled': {
+				'datagrams': datagrams,
+				'bytes': size,
+				'encode_time': encode_time,
+				'decode_time': decode_time,
+			},
+			'encoded': {
+				'datagrams': len(loopback.sent),
+				'bytes': sum(len(data) for _, data in loopback.sent),
+				'encode_time': loopback.encode_time,
+				'decode_time': loopback.decode_time,
+				'pickle_fallbacks': sum(1 for _, data in loopback.sent
+				                        if not BinaryCodec.is_encoded(data)),
+			},
+		}
+		result['bytes_ratio'] = result['encoded']['bytes'] / result['pickled']['bytes']
+		session.end()
+	finally:
+		SPTestSession.cleanup()
+	return result
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare pickled and encoded multiplayer packets.')
+	parser.add_argument('--ai-players', type=int, default=2,
+	                    help='number of AI players (default: %(default)s)')
+	parser.add_argument('--ticks', type=int, default=5000,
+	                    help='number of ticks to play (default: %(default)s)')
+	parser.add_argument('--map-seed', type=int, default=5,
+	                    help='seed of the random map (default: %(default)s)')
+	parser.add_argument('--sp-seed', type=int, default=1,
+	                    help='seed of the game (default: %(default)s)')
+	parser.add_argument('--output', metavar='FILE',
+	                    help='write the results to FILE instead of stdout')
+	args = parser.parse_args()
+
+	result = run_benchmark(args.ticks, ai_players=args.ai_players, map_seed=args.map_seed,
+	                       sp_seed=args.sp_seed)
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(result, f, indent=2, sort_keys=True)
+	else:
+		json.dump(result, sys.stdout, indent=2, sort_keys=True)
+		print()
+
+
+if __name__ == '__main__':
+	main()
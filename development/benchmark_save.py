@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Measures how long it takes to save a game, with and without batched inserts.
+
+A headless game with AI players only (see simulate.py) is played for the given number of
+ticks and then saved repeatedly, alternating between Session._do_save, which buffers the
+rows and writes them with executemany, and the previous way of executing every INSERT on
+its own on a journaled database. Both savegames are checked to contain the same data.
+
+Examples:
+	development/benchmark_save.py --ticks 20000 --map-seed 5
+	development/benchmark_save.py --repeat 10 --output save.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
+from unittest import mock
+
+# make this script work both when started inside development and in the uh root dir
+if not os.path.exists('content'):
+	os.chdir('..')
+assert os.path.exists('content'), 'Content dir not found.'
+sys.path.append('.')
+
+from development.simulate import setup_environment # isort:skip
+
+
+def save_unbatched(session, savegame):
+	"""Saves the game like Session._do_save did before inserts were batched."""
+	from horizons.savegamemanager import SavegameManager
+	from horizons.util.dbreader import DbReader
+	from horizons.util.uhdbaccessor import read_savegame_template
+
+	db = DbReader(savegame)
+	read_savegame_template(db)
+	db("BEGIN")
+	session.world.save(db)
+	session.view.save(db)
+	session.ingame_gui.save(db)
+	session.scenario_eventhandler.save(db)
+	rng_state = json.dumps(session.random.getstate())
+	SavegameManager.write_metadata(db, session.savecounter, rng_state)
+	db("COMMIT")
+	db.close()
+
+
+def dump_savegame(savegame):
+	"""@return: list of the SQL statements that recreate the savegame, without metadata"""
+	from horizons.util.dbreader import DbReader
+
+	db = DbReader(savegame)
+	dump = [line for line in db.connection.iterdump() if 'INSERT INTO "metadata"' not in line]
+	db.close()
+	return dump
+
+
+def measure_saves(session, directory, repeat):
+	"""Saves the game repeatedly in both ways into directory.
+	@return: dict {'unbatched': [seconds, ...], 'batched': [seconds, ...]}"""
+	times = {'unbatched': [], 'batched': []}
+	unbatched_path = os.path.join(directory, 'unbatched.sqlite')
+	batched_path = os.path.join(directory, 'batched.sqlite')
+	for _ in range(repeat):
+		if os.path.exists(unbatched_path):
+			os.unlink(unbatched_path)
+		start = time.perf_counter()
+		save_unbatched(session, unbatched_path)
+		times['unbatched'].append(time.perf_counter() - start)
+
+		start = time.perf_counter()
+		assert session._do_save(batched_path)
+		times['batched'].append(time.perf_counter() - start)
+	return times
+
+
+def run_benchmark(ticks, repeat, ai_players=2, map_seed=5, sp_seed=1):
+	"""Plays a game and saves it repeatedly in both ways.
+
+	@return: dict with the best and mean time of both ways to save and the speedup
+	"""
+	setup_environment()
+
+	from horizons.scheduler import Scheduler
+	from horizons.util.random_map import generate_map_from_seed
+	from tests.game import SPTestSession, _dbreader_convert_dummy_objects, new_session
+
+	session, _ = new_session(mapgen=partial(generate_map_from_seed, map_seed), rng_seed=sp_seed,
+	                         human_player=False, ai_players=ai_players)
+	directory = tempfile.mkdtemp()
+	try:
+		scheduler = Scheduler()
+		for _ in range(ticks):
+			scheduler.tick(scheduler.cur_tick + 1)
+
+		# the fife dummy returns values that can't be stored, see SPTestSession.save
+		screenshot = mock.patch('horizons.session.SavegameManager._write_screenshot')
+		with screenshot, _dbreader_convert_dummy_objects():
+			times = measure_saves(session, directory, repeat)
+
+		unbatched_path = os.path.join(directory, 'unbatched.sqlite')
+		batched_path = os.path.join(directory, 'batched.sqlite')
+		assert dump_savegame(unbatched_path) == dump_savegame(batched_path), \
+		       'the savegames differ'
+		result = {
+			'map_seed': map_seed,
+			'sp_seed': sp_seed,
+			'ai_players': ai_players,
+			'ticks': ticks,
+			'savegame_size': os.path.getsize(batched_path),
+		}
+		for name, values in times.items():
+			result[name] = {'best': min(values), 'mean': sum(values) / len(values)}
+		result['speedup'] = result['unbatched']['best'] / result['batched']['best']
+		session.end()
+	finally:
+		shutil.rmtree(directory)
+		SPTestSession.cleanup()
+	return result
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare batched and unbatched saving.')
+	parser.add_argument('--ai-players', type=int, default=2,
+	                    help='number of AI players (default: %(default)s)')
+	parser.add_argument('--ticks', type=int, default=10000,
+	                    help='number of ticks to play before saving (default: %(default)s)')
+	parser.add_argument('--repeat', type=int, default=5,
+	                    help='number of times the game is saved each way (default: %(default)s)')
+	parser.add_argument('--map-seed', type=int, default=5,
+	                    help='seed of the random map (default: %(default)s)')
+	parser.add_argument('--sp-seed', type=int, default=1,
+	                    help='seed of the game (default: %(default)s)')
+	parser.add_argument('--output', metavar='FILE',
+	                    help='write the results to FILE instead of stdout')
+	args = parser.parse_args()
+
+	result = run_benchmark(args.ticks, args.repeat, ai_players=args.ai_players,
+	                       map_seed=args.map_seed, sp_seed=args.sp_seed)
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(result, f, indent=2, sort_keys=True)
+	else:
+		json.dump(result, sys.stdout, indent=2, sort_keys=True)
+		print()
+
+
+if __name__ == '__main__':
+	main()
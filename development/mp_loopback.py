@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Plays the lockstep protocol of multiplayer games between several MPManagers in one process.
+
+Every player has a Timer and an MPManager, they are connected by a simulated network with
+latency, jitter and packet loss. Lost packets arrive late instead of never, because the
+game sends its packets reliably and in order (ENet resends them). Time is simulated as well:
+the players' timers are pumped at a fixed frame rate, so a run is fast and reproducible.
+
+There is no world, the players issue commands that only record when they have been
+executed. The result shows how smoothly the game ran: the number of ticks, stutters (gaps
+between two ticks of more than STUTTER_FACTOR tick intervals), the final execution delay and
+whether all players executed the same commands at the same ticks.
+
+Examples:
+	development/mp_loopback.py --latency 0.4 --jitter 0.1 --loss 0.05
+	development/mp_loopback.py --players 4 --seconds 120 --fixed
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from unittest import mock
+
+# make this script work both when started inside development and in the uh root dir
+if not os.path.exists('content'):
+	os.chdir('..')
+assert os.path.exists('content'), 'Content dir not found.'
+sys.path.append('.')
+
+FRAMES_PER_SECOND = 60
+STUTTER_FACTOR = 3 # a gap of this many tick intervals between two ticks is a stutter
+
+
+class Clock:
+	"""Simulated time, replaces the time module for the timers and managers."""
+
+	def __init__(self):
+		self.now = 1000.0
+
+	def time(self):
+		return self.now
+
+
+class SimulatedNetwork:
+	"""Delivers the packets of the players after a simulated delay.
+
+	@param latency: seconds a datagram needs from one player to another
+	@param jitter: the latency varies by up to this many seconds
+	@param loss: probability that a datagram is lost. It is sent again after the resend
+	             timeout, as often as necessary.
+	"""
+
+	def __init__(self, clock, latency=0.05, jitter=0.0, loss=0.0, seed=1):
+		self.clock = clock
+		self.latency = latency
+		self.jitter = jitter
+		self.loss = loss
+		self.random = random.Random(seed)
+		self.interfaces = {} # { player id: LoopbackInterface }
+		self._in_transit = [] # [(delivery time, order, receiver, packets)]
+		self._last_delivery = {} # { (sender, receiver): time }, keeps the packets in order
+		self.datagrams = 0
+
+	def connect(self, player_id):
+		interface = LoopbackInterface(self, player_id)
+		self.interfaces[player_id] = interface
+		return interface
+
+	def send(self, sender, packets):
+		for receiver in self.interfaces:
+			if receiver == sender:
+				continue
+			self.datagrams += 1
+			delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+			while self.random.random() < self.loss:
+				delay += 2 * self.latency + 0.05
+			delivery = max(self.clock.now + delay, self._last_delivery.get((sender, receiver), 0.0))
+			self._last_delivery[(sender, receiver)] = delivery
+			self._in_transit.append((delivery, self.datagrams, receiver, list(packets)))
+
+	def deliver(self):
+		"""Hands the packets that have arrived by now to the receivers."""
+		now = self.clock.now
+		arrived = sorted(entry for entry in self._in_transit if entry[0] <= now)
+		self._in_transit = [entry for entry in self._in_transit if entry[0] > now]
+		for _, _, receiver, packets in arrived:
+			self.interfaces[receiver].incoming.extend(packets)
+
+
+class LoopbackInterface:
+	"""Stands in for the NetworkInterface of an MPManager."""
+
+	def __init__(self, network, player_id):
+		self.network = network
+		self.player_id = player_id
+		self.incoming = []
+
+	def send_packet(self, packet, binary=False):
+		self.network.send(self.player_id, packet)
+
+	def receive_all(self):
+		received, self.incoming = self.incoming, []
+		return received
+
+
+class RecordCommand:
+	"""Command that records when it has been executed."""
+
+	def __init__(self, value):
+		self.value = value
+
+	def __call__(self, issuer):
+		Player.current.executed.append((Player.current.timer.tick_next_id, issuer, self.value))
+
+
+class Player:
+	"""One game: a Timer, an MPManager and a session that only provides what they need."""
+
+	current = None # the player whose timer is pumped
+
+	def __init__(self, player_id, player_ids, network, clock, adaptive, seed):
+		from horizons.manager import MPManager
+		from horizons.timer import Timer
+
+		self.player_id = player_id
+		self.clock = clock
+		self.executed = [] # [(tick, issuer, value)]
+		self.tick_times = []
+		self.timer = Timer(freeze_protection=False)
+		self.timer.add_call(self._record_tick)
+		session = mock.Mock()
+		session.timer = self.timer
+		session.world.player.worldid = player_id
+		session.world.players = player_ids
+		session.random = random.Random(seed)
+		self.session = session
+		self.manager = MPManager(session, network.connect(player_id), adaptive=adaptive)
+
+	def _record_tick(self, tick):
+		self.tick_times.append(self.clock.now)
+
+	def issue(self, value):
+		self.manager.execute(RecordCommand(value))
+
+	def pump(self):
+		Player.current = self
+		try:
+			self.timer.check_tick()
+		finally:
+			Player.current = None
+
+	def get_stutters(self):
+		"""@return: (number of stutters, longest gap between two ticks in seconds)"""
+		gaps = [b - a for a, b in zip(self.tick_times, self.tick_times[1:])]
+		if not gaps:
+			return 0, 0.0
+		interval = 1.0 / self.timer.ticks_per_second
+		return sum(1 for gap in gaps if gap > STUTTER_FACTOR * interval), max(gaps)
+
+
+def run_game(players=2, seconds=60, latency=0.05, jitter=0.0, loss=0.0, adaptive=True,
+             command_interval=0.5, seed=1, network_changes=None):
+	"""Plays a game without world between the players over a simulated network.
+
+	@param command_interval: every player issues a command this often (seconds)
+	@param network_changes: optional dict { second: dict(latency=.., jitter=.., loss=..) },
+	                        changes the network during the game
+	@return: dict with the results
+	"""
+	clock = Clock()
+	network = SimulatedNetwork(clock, latency=latency, jitter=jitter, loss=loss, seed=seed)
+	player_ids = list(range(1, players + 1))
+	network_changes = dict(network_changes or {})
+
+	# the packets are logged with the player objects, there are none here
+	with mock.patch('horizons.timer.time', clock), \
+	     mock.patch('horizons.manager.time', clock), \
+	     mock.patch('horizons.manager.WorldObject') as world_object:
+		world_object.get_object_by_id.side_effect = lambda worldid: worldid
+
+		clients = [Player(player_id, player_ids, network, clock, adaptive, seed)
+		           for player_id in player_ids]
+		issue_every = int(command_interval * FRAMES_PER_SECOND)
+		delays = []
+		for frame in range(int(seconds * FRAMES_PER_SECOND)):
+			clock.now += 1.0 / FRAMES_PER_SECOND
+			changes = network_changes.pop(frame // FRAMES_PER_SECOND, None)
+			if changes is not None:
+				for name, value in changes.items():
+					setattr(network, name, value)
+			network.deliver()
+			for i, client in enumerate(clients):
+				if issue_every and frame % issue_every == i:
+					client.issue(frame)
+				client.pump()
+			if frame % FRAMES_PER_SECOND == 0:
+				delays.append(clients[0].manager.execution_delay)
+
+		for client in clients:
+			client.manager.end()
+
+	ticks = min(client.timer.tick_next_id for client in clients)
+	executed = [[entry for entry in client.executed if entry[0] < ticks] for client in clients]
+	stutters = [client.get_stutters() for client in clients]
+	return {
+		'players': players,
+		'seconds': seconds,
+		'latency': latency,
+		'jitter': jitter,
+		'loss': loss,
+		'adaptive': adaptive,
+		'ticks': ticks,
+		'commands': len(executed[0]),
+		'in_sync': all(e == executed[0] for e in executed),
+		'out_of_sync_popups': sum(client.session.ingame_gui.open_error_popup.call_count
+		                          for client in clients),
+		'stutters': max(count for count, _ in stutters),
+		'max_gap': max(gap for _, gap in stutters),
+		'execution_delay': [client.manager.execution_delay for client in clients],
+		'execution_delay_per_second': delays,
+		'datagrams': network.datagrams,
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Play the multiplayer protocol over a simulated network.')
+	parser.add_argument('--players', type=int, default=2,
+	                    help='number of players (default: %(default)s)')
+	parser.add_argument('--seconds', type=float, default=60,
+	                    help='simulated seconds (default: %(default)s)')
+	parser.add_argument('--latency', type=float, default=0.05,
+	                    help='one way latency in seconds (default: %(default)s)')
+	parser.add_argument('--jitter', type=float, default=0.0,
+	                    help='maximum latency variation in seconds (default: %(default)s)')
+	parser.add_argument('--loss', type=float, default=0.0,
+	                    help='probability of a lost datagram (default: %(default)s)')
+	parser.add_argument('--fixed', action='store_true',
+	                    help='use the fixed execution delay instead of the adaptive one')
+	parser.add_argument('--seed', type=int, default=1,
+	                    help='seed of the simulated network (default: %(default)s)')
+	args = parser.parse_args()
+
+	from development.simulate import setup_environment
+	setup_environment()
+
+	result = run_game(players=args.players, seconds=args.seconds, latency=args.latency,
+	                  jitter=args.jitter, loss=args.loss, adaptive=not args.fixed, seed=args.seed)
+	json.dump(result, sys.stdout, indent=2, sort_keys=True)
+	print()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Runs a game with AI players only, without any graphics, as fast as possible.
+
+FIFE is replaced by a dummy module like in the tests, so nothing is rendered
+and no window is opened. The scheduler is ticked in a loop for the requested number of
+ticks, afterwards the throughput, the time spent per subsystem and the final player
+statistics are written as JSON.
+
+Examples:
+	development/simulate.py --ai-players 2 --ticks 20000 --map-seed 5
+	development/simulate.py --map content/maps/development.sqlite --output stats.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# make this script work both when started inside development and in the uh root dir
+if not os.path.exists('content'):
+	os.chdir('..')
+assert os.path.exists('content'), 'Content dir not found.'
+sys.path.append('.')
+
+
+def setup_environment():
+	"""Sets up the headless game and the main database, see horizons.headless."""
+	from horizons.headless import setup_environment
+	setup_environment()
+
+	import horizons.globals
+	import horizons.main
+	if horizons.globals.db is None:
+		horizons.globals.db = horizons.main._create_main_db()
+
+
+def get_player_data(player):
+	"""@return: dict with the final PlayerStats of player"""
+	from horizons.component.storagecomponent import StorageComponent
+	from horizons.constants import RES
+
+	stats = player.get_latest_stats()
+	return {
+		'worldid': player.worldid,
+		'name': player.name,
+		'settlements': len(player.settlements),
+		'inhabitants': sum(settlement.inhabitants for settlement in player.settlements),
+		'gold': player.get_component(StorageComponent).inventory[RES.GOLD],
+		'settler_score': stats.settler_score,
+		'building_score': stats.building_score,
+		'resource_score': stats.resource_score,
+		'unit_score': stats.unit_score,
+		'land_score': stats.land_score,
+		'money_score': stats.money_score,
+		'total_score': stats.total_score,
+	}
+
+
+def run_simulation(ticks, ai_players=2, map_file=None, map_seed=None, sp_seed=None,
+                   tick_callback=None, profile_file=None):
+	"""Plays one game with AI players only.
+
+	@param ticks: number of ticks to run
+	@param ai_players: number of AI players
+	@param map_file: path of a map to play on, a random map is generated if this is None
+	@param map_seed: seed of the random map, a random seed is used if this is None
+	@param sp_seed: seed of the game's random number generator, random if None
+	@param tick_callback: optional function that is called with the session after every tick
+	@param profile_file: optional file to write the full TickProfiler results to
+	@return: dict with the results, see the module docstring
+	"""
+	setup_environment()
+
+	import horizons.globals
+	from horizons.constants import GAME_SPEED
+	from horizons.headlesssession import HeadlessSession, create_players
+	from horizons.scheduler import Scheduler
+	from horizons.util.random_map import generate_map_from_seed
+	from horizons.util.startgameoptions import StartGameOptions
+	from horizons.util.tickprofiler import TickProfiler
+
+	load_start = time.perf_counter()
+	if map_file is None:
+		if map_seed is None:
+			map_seed = random.randint(0, 2 ** 31 - 1)
+		map_path = generate_map_from_seed(map_seed)
+	else:
+		map_path = map_file
+	if sp_seed is None:
+		sp_seed = random.randint(0, 2 ** 31 - 1)
+
+	session = HeadlessSession(horizons.globals.db, sp_seed)
+	session.load(StartGameOptions.create_ai_test(map_path, create_players(False, ai_players)))
+	load_time = time.perf_counter() - load_start
+
+	try:
+		scheduler = Scheduler()
+		profiler = TickProfiler(scheduler)
+		scheduler.set_profiler(profiler)
+		start = time.perf_counter()
+		for _ in range(ticks):
+			scheduler.tick(scheduler.cur_tick + 1)
+			if tick_callback is not None:
+				tick_callback(session)
+		run_time = time.perf_counter() - start
+		scheduler.set_profiler(None)
+
+		if profile_file is not None:
+			profiler.export(profile_file)
+		subsystems = profiler.get_subsystem_data()
+		callback_time = sum(data['time'] for data in subsystems.values())
+		result = {
+			'map': map_file,
+			'map_seed': map_seed,
+			'sp_seed': sp_seed,
+			'ai_players': ai_players,
+			'ticks': ticks,
+			'load_time': load_time,
+			'run_time': run_time,
+			'ticks_per_second': ticks / run_time if run_time else None,
+			'game_seconds': ticks / GAME_SPEED.TICKS_PER_SECOND,
+			# time of the scheduler itself and of the tick callbacks above
+			'overhead_time': run_time - callback_time,
+			'subsystems': subsystems,
+			'longest_callbacks': profiler.get_longest_callbacks()[:5],
+			'players': [get_player_data(player) for player in session.world.players],
+		}
+		session.end()
+	finally:
+		HeadlessSession.cleanup()
+	return result
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Run a headless game with AI players only.')
+	parser.add_argument('--ai-players', type=int, default=2,
+	                    help='number of AI players (default: %(default)s)')
+	parser.add_argument('--ticks', type=int, default=10000,
+	                    help='number of ticks to run (default: %(default)s)')
+	parser.add_argument('--map', dest='map_file', metavar='FILE',
+	                    help='map to play on instead of a random map')
+	parser.add_argument('--map-seed', type=int, help='seed of the random map')
+	parser.add_argument('--sp-seed', type=int, help='seed of the game')
+	parser.add_argument('--output', metavar='FILE',
+	                    help='write the results to FILE instead of stdout')
+	parser.add_argument('--profile', metavar='FILE',
+	                    help='write the time of every callback to FILE (CSV if it ends with .csv, '
+	                         'JSON otherwise)')
+	args = parser.parse_args()
+
+	result = run_simulation(args.ticks, ai_players=args.ai_players, map_file=args.map_file,
+	                        map_seed=args.map_seed, sp_seed=args.sp_seed, profile_file=args.profile)
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(result, f, indent=2, sort_keys=True)
+	else:
+		json.dump(result, sys.stdout, indent=2, sort_keys=True)
+		print()
+
+
+if __name__ == '__main__':
+	main()
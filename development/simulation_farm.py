@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Plays many headless AI games in parallel, e.g. for soak tests.
+
+Every combination of map seed and game seed is played `--repeat` times, each game in a
+fresh worker process (see development/simulate.py). While a game runs, the checkup hash
+that multiplayer games use to detect desyncs is recorded at a fixed tick interval.
+Games with the same seeds have to produce the same hash traces, otherwise the simulation
+is not deterministic.
+
+The summary, the results of all games and the crash reports are written as JSON.
+
+Examples:
+	development/simulation_farm.py -p 8 --map-seeds 0,100 --ticks 20000
+	development/simulation_farm.py -p 4 --map-seeds 5,7 --sp-seeds 1,3 --repeat 2 --output farm.json
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+# make this script work both when started inside development and in the uh root dir
+if not os.path.exists('content'):
+	os.chdir('..')
+assert os.path.exists('content'), 'Content dir not found.'
+sys.path.append('.')
+
+from development.simulate import run_simulation # isort:skip
+
+
+def get_range(expr):
+	"""Parses 'stop', 'start,stop' or 'start,stop,step' (the arguments of range)."""
+	return range(*[int(part.strip()) for part in expr.split(',')])
+
+
+def get_hash(checkup_data):
+	"""@return: short digest of the data returned by World.get_checkup_hash"""
+	data = json.dumps(checkup_data, sort_keys=True).encode('utf-8')
+	return hashlib.sha1(data).hexdigest()[:16]
+
+
+def run_game(job):
+	"""Plays one game, this is executed in the worker processes.
+
+	@param job: dict with the parameters of the game, see create_jobs
+	@return: dict with the results of run_simulation and the hash trace, or with the
+	         traceback if the game crashed
+	"""
+	trace = []
+	current_tick = [0]
+
+	def tick_callback(session):
+		current_tick[0] += 1
+		if current_tick[0] % job['hash_interval'] == 0:
+			trace.append((current_tick[0], get_hash(session.world.get_checkup_hash())))
+
+	result = dict(job)
+	try:
+		result.update(run_simulation(job['ticks'], ai_players=job['ai_players'],
+		                             map_seed=job['map_seed'], sp_seed=job['sp_seed'],
+		                             tick_callback=tick_callback))
+	except Exception:
+		result['crash'] = {
+			'tick': current_tick[0],
+			'traceback': traceback.format_exc(),
+		}
+	result['hash_trace'] = trace
+	return result
+
+
+def create_jobs(map_seeds, sp_seeds, ai_players, ticks, hash_interval, repeat):
+	jobs = []
+	for map_seed in map_seeds:
+		for sp_seed in sp_seeds:
+			for run in range(repeat):
+				jobs.append({
+					'name': 'game-m{}-s{}-r{}'.format(map_seed, sp_seed, run),
+					'map_seed': map_seed,
+					'sp_seed': sp_seed,
+					'run': run,
+					'ai_players': ai_players,
+					'ticks': ticks,
+					'hash_interval': hash_interval,
+				})
+	return jobs
+
+
+def find_desyncs(games):
+	"""Compares the hash traces of the games that were played with the same seeds.
+
+	@return: list of dicts describing the first differing hash of each group
+	"""
+	groups = {}
+	for game in games:
+		key = (game['map_seed'], game['sp_seed'], game['ai_players'])
+		groups.setdefault(key, []).append(game)
+
+	desyncs = []
+	for (map_seed, sp_seed, ai_players), group in sorted(groups.items()):
+		reference = group[0]
+		for game in group[1:]:
+			for (tick, hash1), (_, hash2) in zip(reference['hash_trace'], game['hash_trace']):
+				if hash1 != hash2:
+					desyncs.append({
+						'map_seed': map_seed,
+						'sp_seed': sp_seed,
+						'ai_players': ai_players,
+						'games': [reference['name'], game['name']],
+						'tick': tick,
+					})
+					break
+	return desyncs
+
+
+def summarize(games, wall_time):
+	finished = [game for game in games if 'crash' not in game]
+	throughput = [game['ticks_per_second'] for game in finished if game['ticks_per_second']]
+	summary = {
+		'games': len(games),
+		'finished': len(finished),
+		'crashed': len(games) - len(finished),
+		'wall_time': wall_time,
+		'total_ticks': sum(game['ticks'] for game in finished),
+		'desyncs': find_desyncs(games),
+	}
+	if throughput:
+		summary['ticks_per_second'] = {
+			'min': min(throughput),
+			'max': max(throughput),
+			'mean': sum(throughput) / len(throughput),
+		}
+	return summary
+
+
+def run_farm(jobs, processes=None, timeout=None, progress=None):
+	"""Plays all jobs in a process pool.
+
+	Each worker process plays exactly one game, so no state of a game (singletons, caches,
+	a crash in the middle of a tick) can leak into the next one.
+
+	@param jobs: list of job dicts, see create_jobs
+	@param processes: number of worker processes, defaults to the number of cpus
+	@param timeout: seconds after which all games that didn't finish yet are reported as crashed
+	@param progress: optional function that is called with the result of every game
+	@return: (list of game results, dict with the summary)
+	"""
+	start = time.time()
+	pool = multiprocessing.Pool(processes=processes, maxtasksperchild=1)
+	pending = [(job, pool.apply_async(run_game, (job, ))) for job in jobs]
+	pool.close()
+
+	games = []
+	try:
+		for job, async_result in pending:
+			remaining = None
+			if timeout is not None:
+				remaining = max(0, start + timeout - time.time())
+			try:
+				game = async_result.get(remaining)
+			except multiprocessing.TimeoutError:
+				game = dict(job, hash_trace=[], crash={'tick': None, 'traceback': 'timed out'})
+			except Exception:
+				# the worker died or the result couldn't be transferred
+				game = dict(job, hash_trace=[], crash={'tick': None, 'traceback': traceback.format_exc()})
+			games.append(game)
+			if progress is not None:
+				progress(game)
+	finally:
+		pool.terminate()
+		pool.join()
+
+	return games, summarize(games, time.time() - start)
+
+
+def print_progress(game):
+	if 'crash' in game:
+		status = 'CRASHED at tick {}'.format(game['crash']['tick'])
+	else:
+		status = '{:.1f} ticks/s'.format(game['ticks_per_second'])
+	print('{}: {}'.format(game['name'], status), file=sys.stderr)
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Play many headless AI games in parallel.')
+	parser.add_argument('-p', '--processes', type=int,
+	                    help='number of worker processes (default: number of cpus)')
+	parser.add_argument('--map-seeds', default='0,10', metavar='RANGE',
+	                    help='map seeds as arguments of range() (default: %(default)s)')
+	parser.add_argument('--sp-seeds', default='1', metavar='RANGE',
+	                    help='game seeds as arguments of range() (default: %(default)s)')
+	parser.add_argument('--ai-players', type=int, default=2,
+	                    help='number of AI players (default: %(default)s)')
+	parser.add_argument('--ticks', type=int, default=10000,
+	                    help='number of ticks per game (default: %(default)s)')
+	parser.add_argument('--hash-interval', type=int, default=100,
+	                    help='record the checkup hash every N ticks (default: %(default)s)')
+	parser.add_argument('--repeat', type=int, default=1,
+	                    help='play every combination of seeds N times (default: %(default)s)')
+	parser.add_argument('--timeout', type=float,
+	                    help='seconds after which all unfinished games count as crashed')
+	parser.add_argument('--output', metavar='FILE',
+	                    help='write the results to FILE instead of stdout')
+	args = parser.parse_args()
+
+	jobs = create_jobs(get_range(args.map_seeds), get_range(args.sp_seeds), args.ai_players,
+	                   args.ticks, args.hash_interval, args.repeat)
+	games, summary = run_farm(jobs, args.processes, args.timeout, progress=print_progress)
+
+	data = {'summary': summary, 'games': games}
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump(data, f, indent=2, sort_keys=True)
+	else:
+		json.dump(data, sys.stdout, indent=2, sort_keys=True)
+		print()
+
+	return 1 if summary['crashed'] or summary['desyncs'] else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -71,6 +71,7 @@ from .constants import GOAL_RESULT
 from .goal.donothing import DoNothingGoal
 from .goal.settlementgoal import SettlementGoal
 from .internationaltrademanager import InternationalTradeManager
+from .islandvaluation import IslandValuation
 from .landmanager import LandManager
 from .mission.domestictrade import DomesticTrade
 from .mission.foundsettlement import FoundSettlement
@@ -78,6 +79,8 @@ from .mission.internationaltrade import InternationalTrade
 from .mission.preparefoundationship import PrepareFoundationShip
 from .mission.specialdomestictrade import SpecialDomesticTrade
 from .personalitymanager import PersonalityManager
+from .productiongraph import ProductionGraph
+from .sectionplancache import SectionPlanCache
 from .settlementfounder import SettlementFounder
 from .settlementmanager import SettlementManager
 from .specialdomestictrademanager import SpecialDomesticTradeManager
@@ -293,6 +296,8 @@ class AIPlayer(GenericAI):
 			else:
 				mission_id = db("SELECT rowid FROM ai_mission_found_settlement WHERE land_manager = ?", land_manager.worldid)[0][0]
 				self.missions.add(FoundSettlement.load(db, mission_id, self.report_success, self.report_failure))
+		self.log.debug('%s loaded %d settlements, production graph trees: %d built, %d reused', self,
+		               len(self.settlement_managers), ProductionGraph.trees_built, ProductionGraph.trees_reused)
 
 		for settlement_manager in self.settlement_managers:
 			# load the domestic trade missions
@@ -475,6 +480,8 @@ class AIPlayer(GenericAI):
 	def clear_caches(cls):
 		BasicBuilder.clear_cache()
 		AbstractFarm.clear_cache()
+		IslandValuation.clear_cache()
+		SectionPlanCache.clear_cache()
 
 	def __str__(self):
 		return 'AI({0!s}/{1!s})'.format(getattr(self, 'name', 'unknown'),
@@ -0,0 +1,85 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+class BuildingDistances:
+	"""
+	Measures the distances from building positions to the nearest building of a type in a settlement.
+
+	The building evaluators measure the distance from every candidate position to the nearest
+	building of some type or to the nearest collector building. The bounds of these buildings
+	are collected once and then compared to the candidates without the generic shape distance
+	dispatch. The settlement manager clears them whenever a building is added to or removed
+	from the settlement.
+
+	The distances are the same as the ones of Rect.distance.
+	"""
+
+	COLLECTORS = -1 # key of the production builder's collector buildings
+
+	def __init__(self, production_builder):
+		self.production_builder = production_builder
+		self.clear()
+
+	def clear(self):
+		self._bounds = {} # {key: [(left, top, right, bottom), ...]}
+
+	def _get_bounds(self, key):
+		if key not in self._bounds:
+			if key == self.COLLECTORS:
+				buildings = self.production_builder.collector_buildings
+			else:
+				buildings = self.production_builder.settlement.buildings_by_id.get(key, [])
+			self._bounds[key] = [(rect.left, rect.top, rect.right, rect.bottom)
+			                     for rect in (building.position for building in buildings)]
+		return self._bounds[key]
+
+	def get_distance(self, key, position):
+		"""
+		Return the distance from the rectangle to the nearest building.
+
+		@param key: building type id or COLLECTORS
+		@param position: Rect instance
+		@return: the distance or None if there are no such buildings
+		"""
+		left = position.left
+		top = position.top
+		right = position.right
+		bottom = position.bottom
+		shortest = None
+		for other_left, other_top, other_right, other_bottom in self._get_bounds(key):
+			dx = left - other_right
+			if other_left - right > dx:
+				dx = other_left - right
+			if dx < 0:
+				dx = 0
+			dy = top - other_bottom
+			if other_top - bottom > dy:
+				dy = other_top - bottom
+			if dy < 0:
+				dy = 0
+			distance = dx * dx + dy * dy
+			if shortest is None or distance < shortest:
+				shortest = distance
+		if shortest is None:
+			return None
+		# the square root is monotonic so this is the shortest of the distances
+		return shortest ** 0.5
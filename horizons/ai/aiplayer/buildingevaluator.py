@@ -21,6 +21,7 @@
 
 import logging
 
+from horizons.ai.aiplayer.buildingdistances import BuildingDistances
 from horizons.ai.aiplayer.constants import BUILD_RESULT, BUILDING_PURPOSE
 from horizons.entities import Entities
 
@@ -71,17 +72,15 @@ class BuildingEvaluator:
 		"""
 		Return the shortest distance to a building of type building_id that is in range of the builder.
 
-		@param area_builder: AreaBuilder instance
+		@param area_builder: ProductionBuilder instance
 		@param builder: Builder instance
 		@param building_id: the building type id of the building to which the distance should be measured
 		"""
 
-		shortest_distance = None
-		for building in area_builder.settlement.buildings_by_id.get(building_id, []):
-			distance = builder.position.distance(building.position)
-			if distance <= Entities.buildings[builder.building_id].radius:
-				shortest_distance = distance if shortest_distance is None or distance < shortest_distance else shortest_distance
-		return shortest_distance
+		distance = area_builder.building_distances.get_distance(building_id, builder.position)
+		if distance is not None and distance <= Entities.buildings[builder.building_id].radius:
+			return distance
+		return None
 
 	@classmethod
 	def _distance_to_nearest_collector(cls, production_builder, builder, must_be_in_range=True):
@@ -93,12 +92,10 @@ class BuildingEvaluator:
 		@param must_be_in_range: whether the building has to be in range of the builder
 		"""
 
-		shortest_distance = None
-		for building in production_builder.collector_buildings:
-			distance = builder.position.distance(building.position)
-			if not must_be_in_range or distance <= Entities.buildings[builder.building_id].radius:
-				shortest_distance = distance if shortest_distance is None or distance < shortest_distance else shortest_distance
-		return shortest_distance
+		distance = production_builder.building_distances.get_distance(BuildingDistances.COLLECTORS, builder.position)
+		if distance is not None and (not must_be_in_range or distance <= Entities.buildings[builder.building_id].radius):
+			return distance
+		return None
 
 	@classmethod
 	def _get_outline_coords_list(cls, coords_list):
@@ -0,0 +1,136 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from collections import defaultdict
+
+from horizons.component.storagecomponent import StorageComponent
+from horizons.constants import RES
+from horizons.messaging import SettlementRangeChanged
+
+
+class IslandValuation:
+	"""
+	Knows how valuable the islands are for founding a settlement, shared by all AI players.
+
+	The value of an island depends on its free land, the resources of the deposits that don't
+	belong to a settlement yet and the distances to the settlements. The resource totals of an
+	island only change when the range of a settlement on it changes: deposits outside of the
+	settlements are neither built upon nor collected from. The distances of a settlement to
+	every island are measured once because warehouses and islands don't move.
+
+	These parts are the same for all AI players, the weights of the asking player's personality
+	are applied when a value is requested. The values are kept until the range of a settlement
+	on the island changes or the settlements of the world change (one is founded or removed).
+	"""
+
+	__instance = None
+
+	def __init__(self, world):
+		self.world = world
+		self._resources = {} # {island_id: {resource_id: amount, ...}, ...}
+		self._distances = {} # {settlement_id: {island_id: (distance to the warehouse, distance to its island), ...}, ...}
+		self._values = {} # {(player_id, island_id): ((island change id, settlement ids), (flat land, value)), ...}
+		self._island_change_ids = defaultdict(int) # {island_id: number of settlement range changes, ...}
+		SettlementRangeChanged.subscribe(self._on_settlement_range_changed)
+
+	@classmethod
+	def get(cls, world):
+		"""Return the island valuation of the world."""
+		if cls.__instance is None or cls.__instance.world is not world:
+			cls.clear_cache()
+			cls.__instance = cls(world)
+		return cls.__instance
+
+	@classmethod
+	def clear_cache(cls):
+		if cls.__instance is not None:
+			SettlementRangeChanged.discard(cls.__instance._on_settlement_range_changed)
+			cls.__instance = None
+
+	def _on_settlement_range_changed(self, message):
+		# all tiles of a settlement are on the same island
+		for tile in message.changed_tiles:
+			island = self.world.get_island_tuple((tile.x, tile.y))
+			if island is not None:
+				self._resources.pop(island.worldid, None)
+				self._island_change_ids[island.worldid] += 1
+			break
+
+	def _get_resources(self, island):
+		"""Return the total resources of the deposits on the island that don't belong to a settlement."""
+		if island.worldid not in self._resources:
+			resources = defaultdict(int)
+			for deposit_dict in island.deposits.values():
+				for deposit in deposit_dict.values():
+					if deposit.settlement is None:
+						for resource_id, amount in deposit.get_component(StorageComponent).inventory.itercontents():
+							resources[resource_id] += amount
+			self._resources[island.worldid] = resources
+		return self._resources[island.worldid]
+
+	def _get_distances(self, settlement):
+		"""Return {island_id: (distance to the warehouse, distance to the settlement's island), ...}."""
+		if settlement.worldid not in self._distances:
+			warehouse_position = settlement.warehouse.position
+			settlement_island = self.world.get_island(warehouse_position.origin)
+			self._distances[settlement.worldid] = {
+				island.worldid: (island.position.distance(warehouse_position), island.position.distance(settlement_island.position))
+				for island in self.world.islands}
+		return self._distances[settlement.worldid]
+
+	def get_value(self, island, owner, personality):
+		"""
+		Return (flat land, utility value) of the island for a new settlement of the player.
+
+		@param island: Island instance
+		@param owner: the player who would found the settlement
+		@param personality: the SettlementFounder personality of the player
+		"""
+		key = (owner.worldid, island.worldid)
+		# every settlement of the world is part of the value, so founding or removing one invalidates it
+		settlement_ids = tuple(settlement.worldid for settlement in self.world.settlements)
+		change_ids = (self._island_change_ids[island.worldid], settlement_ids)
+		if key not in self._values or self._values[key][0] != change_ids:
+			self._values[key] = (change_ids, self._evaluate(island, owner, personality))
+		return self._values[key][1]
+
+	def _evaluate(self, island, owner, personality):
+		resources = self._get_resources(island)
+
+		# calculate the value of the island by taking into account the available land, resources, and number of enemy settlements
+		value = island.available_flat_land
+		value += min(resources[RES.RAW_CLAY], personality.max_raw_clay) * personality.raw_clay_importance
+		if resources[RES.RAW_CLAY] < personality.min_raw_clay:
+			value -= personality.no_raw_clay_penalty
+		value += min(resources[RES.RAW_IRON], personality.max_raw_iron) * personality.raw_iron_importance
+		if resources[RES.RAW_IRON] < personality.min_raw_iron:
+			value -= personality.no_raw_iron_penalty
+		value -= len(island.settlements) * personality.enemy_settlement_penalty
+
+		# take into the distance to our old warehouses and the other players' islands
+		for settlement in self.world.settlements:
+			warehouse_distance, island_distance = self._get_distances(settlement)[island.worldid]
+			if settlement.owner is owner:
+				value += personality.compact_empire_importance / float(warehouse_distance + personality.extra_warehouse_distance)
+			else:
+				value -= personality.nearby_enemy_penalty / float(island_distance + personality.extra_enemy_island_distance)
+
+		return (island.available_flat_land, max(2, int(value)))
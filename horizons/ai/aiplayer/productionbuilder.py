@@ -40,6 +40,7 @@ from horizons.world.building.production import Mine
 from horizons.world.production.producer import Producer
 
 from .areabuilder import AreaBuilder
+from .buildingdistances import BuildingDistances
 from .constants import BUILD_RESULT, BUILDING_PURPOSE
 
 
@@ -52,6 +53,7 @@ class ProductionBuilder(AreaBuilder):
 		Coordinates being in the plan means that the tile doesn't belong to another player.
 	* collector_buildings: a list of every building in the settlement that provides general collectors (warehouse, storages)
 	* production_buildings: a list of buildings in the settlement where productions should be paused and resumed at appropriate times
+	* building_distances: a BuildingDistances instance that measures the distances to the nearest buildings of the settlement
 	* unused_fields: a dictionary where the key is a BUILDING_PURPOSE constant of a field and the value is a deque that holds the
 		coordinates of unused field spots. {building purpose: deque([(x, y), ...]), ...}
 	* last_collector_improvement_storage: the last tick when a storage was built to improve collector coverage
@@ -75,6 +77,7 @@ class ProductionBuilder(AreaBuilder):
 		self._init_cache()
 		self.collector_buildings = [] # [building, ...]
 		self.production_buildings = [] # [building, ...]
+		self.building_distances = BuildingDistances(self)
 		self.personality = self.owner.personality_manager.get('ProductionBuilder')
 		self.last_collector_improvement_storage = last_collector_improvement_storage
 		self.last_collector_improvement_road = last_collector_improvement_road
@@ -21,8 +21,8 @@
 
 import logging
 
-from horizons.ai.aiplayer.building import AbstractBuilding
 from horizons.ai.aiplayer.constants import BUILD_RESULT
+from horizons.ai.aiplayer.productiongraph import ProductionGraph
 from horizons.constants import RES
 
 
@@ -30,8 +30,8 @@ class ProductionChain:
 	"""
 	A production chain handles the building of buildings required to produce a resource.
 
-	Production chains use the list of production lines and the available AbstractBuilding
-	subclasses to figure out all ways of producing a certain resource and finding the
+	Production chains use the ProductionGraph of the production lines of the available
+	AbstractBuilding subclasses to find all ways of producing a certain resource and the
 	right ratio of them to produce just enough of the resource. The result is a tree
 	that can be used to produce the required resource.
 
@@ -48,44 +48,31 @@ class ProductionChain:
 
 	log = logging.getLogger("ai.aiplayer.productionchain")
 
-	def __init__(self, settlement_manager, resource_id, resource_producer):
+	def __init__(self, settlement_manager, resource_id, tree):
 		super().__init__() # TODO: check if this call needed
 		self.settlement_manager = settlement_manager
 		self.resource_id = resource_id
-		self.chain = self._get_chain(resource_id, resource_producer, 1.0)
+		self.chain = self._get_chain(resource_id, tree, 1.0)
 		self.chain.assign_identifier('/{:d},{:d}'.format(
 			self.settlement_manager.worldid, self.resource_id))
 
-	def _get_chain(self, resource_id, resource_producer, production_ratio):
+	def _get_chain(self, resource_id, tree, production_ratio):
 		"""Return a ProductionChainSubtreeChoice if it is possible to produce the resource, None otherwise."""
-		options = []
-		if resource_id in resource_producer:
-			for production_line, abstract_building in resource_producer[resource_id]:
-				possible = True
-				sources = []
-				for consumed_resource, amount in production_line.consumed_res.items():
-					next_production_ratio = abs(production_ratio * amount / production_line.produced_res[resource_id])
-					subtree = self._get_chain(consumed_resource, resource_producer, next_production_ratio)
-					if not subtree:
-						possible = False
-						break
-					sources.append(subtree)
-				if possible:
-					options.append(ProductionChainSubtree(self.settlement_manager, resource_id, production_line, abstract_building, sources, production_ratio))
-		if not options:
+		if tree is None:
 			return None
+		options = []
+		for production_line, abstract_building, inputs in tree:
+			sources = []
+			for consumed_resource, amount, subtree in inputs:
+				next_production_ratio = abs(production_ratio * amount / production_line.produced_res[resource_id])
+				sources.append(self._get_chain(consumed_resource, subtree, next_production_ratio))
+			options.append(ProductionChainSubtree(self.settlement_manager, resource_id, production_line, abstract_building, sources, production_ratio))
 		return ProductionChainSubtreeChoice(options)
 
 	@classmethod
 	def create(cls, settlement_manager, resource_id):
 		"""Create a production chain that can produce the given resource."""
-		resource_producer = {}
-		for abstract_building in AbstractBuilding.buildings.values():
-			for resource, production_line in abstract_building.lines.items():
-				if resource not in resource_producer:
-					resource_producer[resource] = []
-				resource_producer[resource].append((production_line, abstract_building))
-		return ProductionChain(settlement_manager, resource_id, resource_producer)
+		return ProductionChain(settlement_manager, resource_id, ProductionGraph.get().get_tree(resource_id))
 
 	def __str__(self):
 		return 'ProductionChain({:d}): {:.5f}\n{}'.format(
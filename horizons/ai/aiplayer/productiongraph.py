@@ -0,0 +1,88 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import logging
+
+from horizons.ai.aiplayer.building import AbstractBuilding
+
+
+class ProductionGraph:
+	"""
+	Knows all ways of producing the resources with the buildings the AI can build.
+
+	The graph only depends on the abstract buildings that are loaded from the main database,
+	so it is built once per process and shared by the production chains and resource managers
+	of all settlements. It must not be changed by them.
+
+	The tree of a resource is a tuple of its options, or None if it can't be produced:
+	((production line, abstract building, inputs), ...) where inputs is a tuple of
+	(consumed resource id, consumed amount, tree of the consumed resource). Only the options
+	whose inputs can all be produced are included. The same subtrees are shared by all trees
+	that need them.
+	"""
+
+	log = logging.getLogger("ai.aiplayer.productiongraph")
+
+	__instance = None
+
+	# number of trees that have been computed and number of times they have been reused
+	trees_built = 0
+	trees_reused = 0
+
+	def __init__(self, abstract_buildings):
+		producers = {} # {resource_id: [(production line, abstract building), ...], ...}
+		for abstract_building in abstract_buildings:
+			for resource_id, production_line in abstract_building.lines.items():
+				if resource_id not in producers:
+					producers[resource_id] = []
+				producers[resource_id].append((production_line, abstract_building))
+		self._producers = {resource_id: tuple(options) for resource_id, options in producers.items()}
+		self._trees = {} # {resource_id: tree, ...}
+
+	@classmethod
+	def get(cls):
+		"""Return the production graph of the loaded abstract buildings."""
+		if cls.__instance is None:
+			cls.__instance = cls(AbstractBuilding.buildings.values())
+			cls.log.debug('Built the production graph of %d resources', len(cls.__instance._producers))
+		return cls.__instance
+
+	def get_tree(self, resource_id):
+		"""Return the tree of the ways to produce the resource, see the class docstring."""
+		if resource_id in self._trees:
+			ProductionGraph.trees_reused += 1
+			return self._trees[resource_id]
+
+		options = []
+		for production_line, abstract_building in self._producers.get(resource_id, ()):
+			inputs = []
+			for consumed_resource, amount in production_line.consumed_res.items():
+				subtree = self.get_tree(consumed_resource)
+				if subtree is None:
+					break
+				inputs.append((consumed_resource, amount, subtree))
+			else:
+				options.append((production_line, abstract_building, tuple(inputs)))
+		tree = tuple(options) if options else None
+
+		self._trees[resource_id] = tree
+		ProductionGraph.trees_built += 1
+		return tree
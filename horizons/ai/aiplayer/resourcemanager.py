@@ -23,6 +23,7 @@ import math
 from collections import defaultdict
 
 from horizons.ai.aiplayer.building import AbstractBuilding
+from horizons.ai.aiplayer.productiongraph import ProductionGraph
 from horizons.command.uioptions import ClearTradeSlot, SetTradeSlot
 from horizons.component.namedcomponent import NamedComponent
 from horizons.component.storagecomponent import StorageComponent
@@ -99,35 +100,22 @@ class ResourceManager(WorldObject):
 		self._load(db, settlement_manager)
 		return self
 
-	def _get_chain(self, resource_id, resource_producer, production_ratio):
+	def _get_chain(self, resource_id, tree, production_ratio):
 		"""Return a SimpleProductionChainSubtreeChoice or None if it impossible to produce the resource."""
-		options = []
-		if resource_id in resource_producer:
-			for production_line, abstract_building in resource_producer[resource_id]:
-				possible = True
-				sources = []
-				for consumed_resource, amount in production_line.consumed_res.items():
-					next_production_ratio = abs(production_ratio * amount / production_line.produced_res[resource_id])
-					subtree = self._get_chain(consumed_resource, resource_producer, next_production_ratio)
-					if not subtree:
-						possible = False
-						break
-					sources.append(subtree)
-				if possible:
-					options.append(SimpleProductionChainSubtree(self, resource_id, production_line, abstract_building, sources, production_ratio))
-		if not options:
+		if tree is None:
 			return None
+		options = []
+		for production_line, abstract_building, inputs in tree:
+			sources = []
+			for consumed_resource, amount, subtree in inputs:
+				next_production_ratio = abs(production_ratio * amount / production_line.produced_res[resource_id])
+				sources.append(self._get_chain(consumed_resource, subtree, next_production_ratio))
+			options.append(SimpleProductionChainSubtree(self, resource_id, production_line, abstract_building, sources, production_ratio))
 		return SimpleProductionChainSubtreeChoice(options)
 
 	def _make_chain(self, resource_id):
 		"""Return a SimpleProductionChainSubtreeChoice that knows how to produce the resource."""
-		resource_producer = {}
-		for abstract_building in AbstractBuilding.buildings.values():
-			for resource, production_line in abstract_building.lines.items():
-				if resource not in resource_producer:
-					resource_producer[resource] = []
-				resource_producer[resource].append((production_line, abstract_building))
-		chain = self._get_chain(resource_id, resource_producer, 1.0)
+		chain = self._get_chain(resource_id, ProductionGraph.get().get_tree(resource_id), 1.0)
 		chain.assign_identifier('')
 		return chain
 
@@ -375,10 +363,10 @@ class SingleResourceManager(WorldObject):
 	def _load(self, db, settlement_manager, worldid):
 		super().load(db, worldid)
 		(resource_id, building_id, self.low_priority, self.available, self.total) = \
-		    db("SELECT resource_id, building_id, low_priority, available, total FROM ai_single_resource_manager WHERE rowid = ?", worldid)[0]
+		    db.get_ai_single_resource_manager_row(worldid)
 		self.__init(settlement_manager, resource_id, building_id)
 
-		for (identifier, quota, priority) in db("SELECT identifier, quota, priority FROM ai_single_resource_manager_quota WHERE single_resource_manager = ?", worldid):
+		for (identifier, quota, priority) in db.get_ai_single_resource_manager_quotas(worldid):
 			self.quotas[identifier] = (quota, priority)
 
 	@classmethod
@@ -0,0 +1,150 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import logging
+import os
+import pickle
+
+from horizons.constants import AI, VERSION
+
+
+class SectionPlanCache:
+	"""
+	Remembers the village section plans so that identical sections are only planned once.
+
+	The plan of a section only depends on the coordinates of the section, the roads between the
+	sections that touch it and a few parameters (personality values and building sizes), and
+	moving the section moves the plan with it. The plans are therefore stored relative to the
+	top left corner of the section, keyed by the relative coordinates and roads, and shared by
+	all AI players of the process.
+
+	If AI.VILLAGE_PLAN_CACHE names a file, the plans are also kept there between games. The
+	file is ignored if it was written by another version of the game or of this class.
+	"""
+
+	log = logging.getLogger("ai.aiplayer.sectionplancache")
+
+	# Increment this when the section planner changes its results.
+	version = 1
+
+	__plans = {} # {key: (number of residences, {(dx, dy): BUILDING_PURPOSE constant, ...} or None), ...}
+	__loaded = False
+	__changed = False
+
+	# number of plans that have been reused and number of plans that have been created
+	hits = 0
+	misses = 0
+
+	@classmethod
+	def get_key(cls, section_coords_set, vertical_roads, horizontal_roads, parameters):
+		"""
+		Return (origin, key) of the section where origin is the top left corner of the section.
+
+		@param section_coords_set: the coordinates of the section in the form set([(x, y), ...])
+		@param vertical_roads: vertical roads between the sections in the form set([x, ...])
+		@param horizontal_roads: horizontal roads between the sections in the form set([y, ...])
+		@param parameters: tuple of the other values the plan depends on
+		"""
+		xs = {x for (x, _) in section_coords_set}
+		ys = {y for (_, y) in section_coords_set}
+		origin_x = min(xs, default=0)
+		origin_y = min(ys, default=0)
+
+		coords = tuple(sorted((x - origin_x, y - origin_y) for (x, y) in section_coords_set))
+		roads_x = tuple(sorted(x - origin_x for x in vertical_roads if x in xs or x - 1 in xs or x + 1 in xs))
+		roads_y = tuple(sorted(y - origin_y for y in horizontal_roads if y in ys or y - 1 in ys or y + 1 in ys))
+		return ((origin_x, origin_y), (coords, roads_x, roads_y, parameters))
+
+	@classmethod
+	def get_plan(cls, section_coords_set, vertical_roads, horizontal_roads, parameters, create_plan):
+		"""
+		Return the section plan in the format of VillageBuilder._create_section_plan.
+
+		@param parameters: tuple of the other values the plan depends on
+		@param create_plan: function(section_coords_set, vertical_roads, horizontal_roads) that creates the plan
+		"""
+		cls._load()
+		(origin_x, origin_y), key = cls.get_key(section_coords_set, vertical_roads, horizontal_roads, parameters)
+		if key in cls.__plans:
+			cls.hits += 1
+			tents, relative_plan = cls.__plans[key]
+			if relative_plan is None:
+				return (tents, {})
+			# the order of the plan has to be the same as the order of a created one
+			return (tents, {(x, y): relative_plan[(x - origin_x, y - origin_y)] for (x, y) in section_coords_set})
+
+		cls.misses += 1
+		tents, plan = create_plan(section_coords_set, vertical_roads, horizontal_roads)
+		relative_plan = {(x - origin_x, y - origin_y): purpose for (x, y), purpose in plan.items()} if plan else None
+		cls.__plans[key] = (tents, relative_plan)
+		cls.__changed = True
+		return (tents, plan)
+
+	@classmethod
+	def _get_version(cls):
+		return (cls.version, VERSION.RELEASE_VERSION)
+
+	@classmethod
+	def _load(cls):
+		"""Load the plans from AI.VILLAGE_PLAN_CACHE if it is set and they haven't been loaded yet."""
+		if cls.__loaded:
+			return
+		cls.__loaded = True
+		filename = AI.VILLAGE_PLAN_CACHE
+		if filename is None or not os.path.exists(filename):
+			return
+		try:
+			with open(filename, 'rb') as f:
+				data = pickle.load(f)
+			if data[0] != cls._get_version():
+				cls.log.info('Ignoring the section plans in %s, they are from another version', filename)
+				return
+			cls.__plans.update(data[1])
+			cls.log.debug('Loaded %d section plans from %s', len(data[1]), filename)
+		except Exception as e:
+			# Ignore all exceptions because the plans can always be created again.
+			cls.log.warning("Warning: Failed to load the section plans from {0!s}: {1!s}".format(filename, e))
+
+	@classmethod
+	def _save(cls):
+		"""Write the plans to AI.VILLAGE_PLAN_CACHE if it is set and new plans have been created."""
+		filename = AI.VILLAGE_PLAN_CACHE
+		if filename is None or not cls.__changed:
+			return
+		try:
+			# write to a temporary file first, so an interrupted write can't corrupt the cache
+			tmp_filename = filename + '.tmp'
+			with open(tmp_filename, 'wb') as f:
+				pickle.dump((cls._get_version(), cls.__plans), f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp_filename, filename)
+			cls.log.debug('Saved %d section plans to %s', len(cls.__plans), filename)
+		except Exception as e:
+			# Ignore all exceptions because saving the plans is not critical.
+			cls.log.warning("Warning: Unable to save the section plans into {0!s}: {1!s}".format(filename, e))
+
+	@classmethod
+	def clear_cache(cls):
+		"""Save the plans if they are kept on disk and forget them."""
+		cls.log.debug('Section plans: %d reused, %d created', cls.hits, cls.misses)
+		cls._save()
+		cls.__plans = {}
+		cls.__loaded = False
+		cls.__changed = False
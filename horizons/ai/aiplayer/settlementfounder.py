@@ -20,8 +20,8 @@
 # ###################################################
 
 import logging
-from collections import defaultdict
 
+from horizons.ai.aiplayer.islandvaluation import IslandValuation
 from horizons.ai.aiplayer.landmanager import LandManager
 from horizons.ai.aiplayer.mission.foundsettlement import FoundSettlement
 from horizons.ai.aiplayer.mission.preparefoundationship import PrepareFoundationShip
@@ -40,45 +40,16 @@ class SettlementFounder:
 		self.session = owner.session
 		self.world = owner.world
 		self.personality = owner.personality_manager.get('SettlementFounder')
-		self.__island_value_cache = {} # {island_id: (last_change_id, value), ...}
-
-	def _evaluate_island(self, island):
-		"""Return (flat land, utility value) of the given island."""
-		resources = defaultdict(int)
-		for deposit_dict in island.deposits.values():
-			for deposit in deposit_dict.values():
-				if deposit.settlement is None:
-					for resource_id, amount in deposit.get_component(StorageComponent).inventory.itercontents():
-						resources[resource_id] += amount
-
-		# calculate the value of the island by taking into account the available land, resources, and number of enemy settlements
-		value = island.available_flat_land
-		value += min(resources[RES.RAW_CLAY], self.personality.max_raw_clay) * self.personality.raw_clay_importance
-		if resources[RES.RAW_CLAY] < self.personality.min_raw_clay:
-			value -= self.personality.no_raw_clay_penalty
-		value += min(resources[RES.RAW_IRON], self.personality.max_raw_iron) * self.personality.raw_iron_importance
-		if resources[RES.RAW_IRON] < self.personality.min_raw_iron:
-			value -= self.personality.no_raw_iron_penalty
-		value -= len(island.settlements) * self.personality.enemy_settlement_penalty
-
-		# take into the distance to our old warehouses and the other players' islands
-		for settlement in self.world.settlements:
-			if settlement.owner is self.owner:
-				value += self.personality.compact_empire_importance / float(island.position.distance(settlement.warehouse.position) + self.personality.extra_warehouse_distance)
-			else:
-				value -= self.personality.nearby_enemy_penalty / float(island.position.distance(settlement.island.position) + self.personality.extra_enemy_island_distance)
-
-		return (island.available_flat_land, max(2, int(value)))
 
 	def _get_available_islands(self, min_land):
 		"""Return a list of available islands in the form [(value, island), ...]."""
+		island_valuation = IslandValuation.get(self.world)
 		options = []
 		for island in self.owner.world.islands:
 			if island.worldid not in self.owner.islands:
-				if island.worldid not in self.__island_value_cache or self.__island_value_cache[island.worldid][0] != island.last_change_id:
-					self.__island_value_cache[island.worldid] = (island.last_change_id, self._evaluate_island(island))
-				if self.__island_value_cache[island.worldid][1][0] >= min_land:
-					options.append((self.__island_value_cache[island.worldid][1][1], island))
+				flat_land, value = island_valuation.get_value(island, self.owner, self.personality)
+				if flat_land >= min_land:
+					options.append((value, island))
 		return options
 
 	def _choose_island(self, min_land):
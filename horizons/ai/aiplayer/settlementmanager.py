@@ -419,6 +419,7 @@ class SettlementManager(WorldObject):
 
 	def add_building(self, building):
 		"""Called when a new building is added to the settlement (the building already exists during the call)."""
+		self.production_builder.building_distances.clear()
 		coords = building.position.origin.to_tuple()
 		if coords in self.village_builder.plan:
 			self.village_builder.add_building(building)
@@ -427,6 +428,7 @@ class SettlementManager(WorldObject):
 
 	def remove_building(self, building):
 		"""Called when a building is removed from the settlement (the building still exists during the call)."""
+		self.production_builder.building_distances.clear()
 		coords = building.position.origin.to_tuple()
 		if coords in self.village_builder.plan:
 			self.village_builder.remove_building(building)
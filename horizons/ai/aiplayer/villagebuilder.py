@@ -27,6 +27,7 @@ from collections import defaultdict, deque
 from horizons.ai.aiplayer.areabuilder import AreaBuilder
 from horizons.ai.aiplayer.basicbuilder import BasicBuilder
 from horizons.ai.aiplayer.constants import BUILD_RESULT, BUILDING_PURPOSE
+from horizons.ai.aiplayer.sectionplancache import SectionPlanCache
 from horizons.constants import AI, BUILDINGS
 from horizons.entities import Entities
 from horizons.util.shapes import Rect, distances
@@ -150,8 +151,12 @@ class VillageBuilder(AreaBuilder):
 			if bottom_road:
 				horizontal_roads.add(start_y - 1)
 
+		# identical sections (of this or another village) get the same plan
+		parameters = (self.personality.tent_value, self.personality.bad_road_penalty, self.personality.double_road_penalty,
+			Entities.buildings[BUILDINGS.RESIDENTIAL].size, Entities.buildings[BUILDINGS.RESIDENTIAL].radius,
+			Entities.buildings[BUILDINGS.MAIN_SQUARE].size)
 		for section_coords_set in section_coords_set_list:
-			section_plan = self._create_section_plan(section_coords_set, vertical_roads, horizontal_roads)
+			section_plan = SectionPlanCache.get_plan(section_coords_set, vertical_roads, horizontal_roads, parameters, self._create_section_plan)
 			section_plans.append(section_plan[1])
 
 		self._stitch_sections_together(section_plans, vertical_roads, horizontal_roads)
@@ -495,22 +500,14 @@ class VillageBuilder(AreaBuilder):
 		num_kept = int(min(len(possible_positions), max(self.personality.min_coverage_building_options, len(possible_positions) * self.personality.coverage_building_option_ratio)))
 		possible_positions = self.session.random.sample(possible_positions, num_kept)
 
-		def get_centroid(planned, blocked):
-			total_x, total_y = 0, 0
-			for position in planned_tents:
-				if position not in blocked:
-					total_x += position.left
-					total_y += position.top
-			mid_x = total_x / float(len(planned) - len(blocked))
-			mid_y = total_y / float(len(planned) - len(blocked))
-			return (mid_x, mid_y)
-
-		def get_centroid_distance_pairs(planned, blocked):
-			centroid = get_centroid(planned_tents, blocked)
-			positions = []
-			for position in planned_tents:
-				if position not in blocked:
-					positions.append((distance_rect_tuple(position, centroid), position))
+		def get_centroid_distance_pairs(replaced):
+			# the centroid of the planned residences other than the replaced one
+			total_x, total_y = planned_total
+			if replaced in planned_set:
+				total_x -= replaced.left
+				total_y -= replaced.top
+			centroid = (total_x / float(len(planned_tents) - 1), total_y / float(len(planned_tents) - 1))
+			positions = [(distance_rect_tuple(position, centroid), position) for position in planned_tents if position is not replaced]
 			positions.sort(reverse=True)
 			return positions
 
@@ -519,9 +516,11 @@ class VillageBuilder(AreaBuilder):
 				break
 			best_score = None
 			best_pos = None
+			planned_set = set(planned_tents)
+			planned_total = (sum(position.left for position in planned_tents), sum(position.top for position in planned_tents))
 
 			for replaced_pos in possible_positions:
-				positions = get_centroid_distance_pairs(planned_tents, set([replaced_pos]))
+				positions = get_centroid_distance_pairs(replaced_pos)
 				score = 0
 				in_range = 0
 				for distance_to_centroid, position in positions:
@@ -534,7 +533,7 @@ class VillageBuilder(AreaBuilder):
 					best_pos = replaced_pos
 
 			in_range = 0
-			positions = list(zip(*get_centroid_distance_pairs(planned_tents, set([best_pos]))))[1]
+			positions = list(zip(*get_centroid_distance_pairs(best_pos)))[1]
 			for position in positions:
 				if in_range < capacity and distance_rect_rect_sq(best_pos, position) <= tent_range_sq:
 					planned_tents.remove(position)
@@ -84,16 +84,10 @@ class Pirate(GenericAI):
 
 	@staticmethod
 	def get_nearest_player_ship(base_ship):
-		lowest_distance = None
-		nearest_ship = None
-		for ship in base_ship.find_nearby_ships():
-			if isinstance(ship, (PirateShip, TradeShip)) or not ship.has_component(SelectableComponent):
-				continue  # don't attack these ships
-			distance = base_ship.position.distance(ship.position)
-			if lowest_distance is None or distance < lowest_distance:
-				lowest_distance = distance
-				nearest_ship = ship
-		return nearest_ship
+		def is_player_ship(ship):
+			# don't attack these ships
+			return not isinstance(ship, (PirateShip, TradeShip)) and ship.has_component(SelectableComponent)
+		return base_ship.find_nearest_ship(is_player_ship)
 
 	def tick(self):
 		self.combat_manager.tick()
@@ -19,8 +19,11 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import importlib
 import logging
+import pkgutil
 
+from horizons.network.codec import BinaryCodec
 from horizons.network.packets import SafeUnpickler
 from horizons.util.python import get_all_subclasses
 from horizons.util.worldobject import WorldObject
@@ -38,6 +41,7 @@ class Command:
 		see documentation inside horizons.network.packets.SafeUnpickler
 		"""
 		SafeUnpickler.add('server', klass)
+		BinaryCodec.add(klass)
 
 	def execute(self, session, local=False):
 		"""Execute command.
@@ -47,6 +51,13 @@ class Command:
 		"""
 		return session.manager.execute(self, local)
 
+	@classmethod
+	def import_all(cls):
+		"""Imports all command modules, which registers every command for the network.
+		The BinaryCodec needs that, otherwise its schema depends on what has been imported."""
+		for module_info in pkgutil.iter_modules(__path__):
+			importlib.import_module(__name__ + '.' + module_info[1])
+
 	@classmethod
 	def get_all_commands(cls):
 		return list(get_all_subclasses(cls))
@@ -72,7 +72,7 @@ class NamedComponent(Component):
 	def load(self, db, worldid):
 		super().load(db, worldid)
 		self.name = None
-		name = db("SELECT name FROM name WHERE rowid = ?", worldid)[0][0]
+		name = db.get_name(worldid)
 		# We need unicode strings as the name is displayed on screen.
 		self.set_name(name)
 
@@ -463,6 +463,8 @@ class GAME:
 	WORLD_WORLDID = 0 # worldid of World object
 	# exit after on tick MAX_TICKS (disabled by setting to None)
 	MAX_TICKS = None # type: Optional[int]
+	# measure the scheduler callbacks and write the results to this file (disabled by None)
+	PROFILE_TICKS_FILE = None # type: Optional[str]
 
 
 # Map related constants
@@ -495,6 +497,7 @@ class AI:
 	HIGHLIGHT_PLANS = False # whether to show the AI players' plans on the map
 	HIGHLIGHT_COMBAT = False # whether to show the AI players' combat ranges around each unit
 	HUMAN_AI = False # whether the human player is controlled by the AI
+	VILLAGE_PLAN_CACHE = None # file that keeps the AI players' village section plans between games
 
 
 class TRADER: # check resource values: ./development/print_db_data.py res
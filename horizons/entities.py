@@ -20,9 +20,7 @@
 # ###################################################
 
 
-import fnmatch
 import logging
-import os
 
 from horizons.util.loaders.tilesetloader import TileSetLoader
 from horizons.util.python.callback import Callback
@@ -93,23 +91,19 @@ class Entities:
 			return
 		cls.buildings = _EntitiesLazyDict()
 		from horizons.world.building import BuildingClass
-		for root, dirnames, filenames in os.walk('content/objects/buildings'):
-			for filename in fnmatch.filter(filenames, '*.yaml'):
-				cls.log.debug("Loading: " + filename)
-				# This is needed for dict lookups! Do not convert to os.join!
-				full_file = root + "/" + filename
-				result = YamlCache.get_file(full_file, game_data=True)
-				if result is None: # discard empty yaml files
-					print("Empty yaml file {file} found, not loading!".format(file=full_file))
-					continue
-
-				result['yaml_file'] = full_file
-
-				building_id = int(result['id'])
-				cls.buildings.create_on_access(building_id, Callback(BuildingClass, db=db, id=building_id, yaml_data=result))
-				# NOTE: The current system now requires all building data to be loaded
-				if load_now or True:
-					cls.buildings[building_id]
+		for full_file, result in YamlCache.get_directory('content/objects/buildings', game_data=True):
+			cls.log.debug("Loading: " + full_file)
+			if result is None: # discard empty yaml files
+				print("Empty yaml file {file} found, not loading!".format(file=full_file))
+				continue
+
+			result['yaml_file'] = full_file
+
+			building_id = int(result['id'])
+			cls.buildings.create_on_access(building_id, Callback(BuildingClass, db=db, id=building_id, yaml_data=result))
+			# NOTE: The current system now requires all building data to be loaded
+			if load_now or True:
+				cls.buildings[building_id]
 
 	@classmethod
 	def load_units(cls, load_now=False):
@@ -120,11 +114,8 @@ class Entities:
 		cls.units = _EntitiesLazyDict()
 
 		from horizons.world.units import UnitClass
-		for root, dirnames, filenames in os.walk('content/objects/units'):
-			for filename in fnmatch.filter(filenames, '*.yaml'):
-				full_file = os.path.join(root, filename)
-				result = YamlCache.get_file(full_file, game_data=True)
-				unit_id = int(result['id'])
-				cls.units.create_on_access(unit_id, Callback(UnitClass, id=unit_id, yaml_data=result))
-				if load_now:
-					cls.units[unit_id]
+		for full_file, result in YamlCache.get_directory('content/objects/units', game_data=True):
+			unit_id = int(result['id'])
+			cls.units.create_on_access(unit_id, Callback(UnitClass, id=unit_id, yaml_data=result))
+			if load_now:
+				cls.units[unit_id]
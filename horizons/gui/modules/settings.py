@@ -105,6 +105,7 @@ class SettingsDialog(PickBeltWidget, Window):
 			# Game
 			Setting(UH, 'AutosaveInterval', 'autosaveinterval', on_change=self._on_slider_changed),
 			Setting(UH, 'AutosaveMaxCount', 'autosavemaxcount', on_change=self._on_slider_changed),
+			Setting(UH, 'BackgroundAutosave', 'background_autosave'),
 			Setting(UH, 'QuicksaveMaxCount', 'quicksavemaxcount', on_change=self._on_slider_changed),
 			Setting(UH, 'Language', 'uni_language', language_names,
 				callback=self._apply_Language, on_change=self._on_Language_changed),
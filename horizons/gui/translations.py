@@ -632,6 +632,7 @@ def set_translations():
 	'settings.xml' : {
 		('auto_unload_label'            , 'text'    ): T("Auto-unload ship:"),
 		('autosave_interval_label'      , 'text'    ): T("Autosave interval in minutes:"),
+		('background_autosave_label'    , 'text'    ): T("Autosave in the background:"),
 		('cursor_centered_zoom_label'   , 'text'    ): T("Cursor centered zoom:"),
 		('debug_log_lbl'                , 'text'    ): T("Enable logging:"),
 		('edge_scrolling_label'         , 'text'    ): T("Scroll at map edge:"),
@@ -662,6 +663,7 @@ def set_translations():
 		('defaultButton'                , 'helptext'): T("Reset to default settings"),
 		('okButton'                     , 'helptext'): T("Save changes"),
 		('auto_unload_label'            , 'helptext'): T("Whether to unload the ship after founding a settlement"),
+		('background_autosave_label'    , 'helptext'): T("When enabled, the game only pauses briefly for autosaves and the savegame is written while you continue playing"),
 		('cursor_centered_zoom_label'   , 'helptext'): T("When enabled, mouse wheel zoom will use the cursor position as new viewport center. When disabled, always zoom to current viewport center."),
 		('debug_log_lbl'                , 'helptext'): T("Don't use in normal game session. Decides whether to write debug information in the logging directory of your user directory. Slows the game down."),
 		('edge_scrolling_label'         , 'helptext'): T("Whether to move the viewport when the mouse pointer is close to map edges"),
@@ -89,10 +89,13 @@ def iter_minimap_points(location, world, island_color, water_color, area=None):
 			# check what's at the covered_area
 			if real_map_coords in full_map:
 				# this pixel is an island
-				tile = full_map[real_map_coords]
-				settlement = tile.settlement
+				# don't create the tiles just for this, tiles that don't exist yet have no settlement
+				tile = full_map.get_instance(real_map_coords)
+				settlement = tile.settlement if tile is not None else None
 				if settlement is None:
 					# island without settlement
+					if tile is None:
+						tile = full_map.get_tile_class(real_map_coords)
 					if tile.id <= 0:
 						color = water_color
 					else:
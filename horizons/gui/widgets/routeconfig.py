@@ -20,6 +20,7 @@
 # ###################################################
 
 import functools
+import logging
 import weakref
 
 from fife import fife
@@ -46,6 +47,8 @@ class RouteConfig(Window):
 	"""
 	Widget that allows configurating a ship's trading route
 	"""
+	log = logging.getLogger("gui.widgets.routeconfig")
+
 	dummy_icon_path = "content/gui/icons/resources/none_gray.png"
 	buy_button_path = "content/gui/images/tabwidget/warehouse_to_ship.png"
 	sell_button_path = "content/gui/images/tabwidget/ship_to_warehouse.png"
@@ -62,10 +65,22 @@ class RouteConfig(Window):
 			CreateRoute(instance).execute(self.session)
 
 			# We must make sure that the createRoute command has successfully finished, even in network games.
-			Scheduler().add_new_object(self._init_gui, self, run_in=MPManager.EXECUTIONDELAY + 2)
+			# There, the delay until it is executed depends on the latency of the other players.
+			self._route_wait_ticks = MPManager.MAX_EXECUTIONDELAY + 2
+			self._init_gui_when_route_exists()
 		else:
 			self._init_gui()
 
+	def _init_gui_when_route_exists(self):
+		if hasattr(self.instance, 'route'):
+			self._init_gui()
+		elif self._route_wait_ticks > 0:
+			self._route_wait_ticks -= 1
+			Scheduler().add_new_object(self._init_gui_when_route_exists, self, run_in=1)
+		else:
+			# the command has been rejected or the ship is gone
+			self.log.warning('%s has no route, not initializing the route config', self.instance)
+
 	@property
 	def session(self):
 		"""
@@ -86,7 +101,7 @@ class RouteConfig(Window):
 	def hide(self):
 		# Check if the deferred init_gui call in __init__ ran already, otherwise cancel it
 		if not hasattr(self, '_gui'):
-			Scheduler().rem_call(self, self._init_gui)
+			Scheduler().rem_call(self, self._init_gui_when_route_exists)
 			return
 
 		self.minimap.disable()
@@ -0,0 +1,78 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Lets the game run without FIFE, e.g. in the tests and in development/simulate.py.
+
+setup_environment() has to be called before anything else from horizons is imported,
+otherwise other modules could get a reference to the real fife module.
+"""
+
+import sys
+from importlib.abc import Loader
+from importlib.machinery import ModuleSpec, PathFinder
+
+_ENVIRONMENT_READY = False
+
+
+def install_fife_dummy():
+	"""
+	Using a custom import hook, we catch all imports of fife and provide a
+	dummy module.
+	"""
+	from horizons.util.dummy import Dummy
+
+	class Finder(PathFinder):
+		@staticmethod
+		def find_spec(fullname, path, target=None):
+			if fullname.startswith('fife'):
+				return ModuleSpec(fullname, DummyLoader())
+
+	class DummyLoader(Loader):
+		@staticmethod
+		def load_module(module):
+			sys.modules.setdefault(module, Dummy())
+
+	sys.meta_path.insert(0, Finder)
+
+
+def setup_environment():
+	"""
+	Installs the fife dummy and initializes the globals a session needs, except for the
+	main database. Calling it again does nothing.
+	"""
+	global _ENVIRONMENT_READY
+	if _ENVIRONMENT_READY:
+		return
+
+	install_fife_dummy()
+
+	import horizons.globals
+	import fife
+	horizons.globals.fife = fife.fife
+
+	from horizons.util import create_user_dirs
+	create_user_dirs()
+
+	import horizons.i18n
+	horizons.i18n.change_language()
+
+	_ENVIRONMENT_READY = True
@@ -0,0 +1,98 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from horizons.extscheduler import ExtScheduler
+from horizons.scheduler import Scheduler
+from horizons.spsession import SPSession
+from horizons.util.color import Color
+from horizons.util.difficultysettings import DifficultySettings
+from horizons.util.dummy import Dummy
+
+
+class HeadlessSession(SPSession):
+	"""
+	Single player session without graphics, gui and autosaves.
+
+	Without FIFE, horizons.headless.setup_environment has to be called before this module
+	is imported.
+	"""
+
+	def __init__(self, db, rng_seed=None):
+		ExtScheduler.create_instance(Dummy())
+		super().__init__(db, rng_seed, ingame_gui_class=Dummy)
+
+	def create_view(self):
+		return Dummy()
+
+	def reset_autosave(self):
+		"""Headless sessions are never autosaved."""
+		pass
+
+	@classmethod
+	def cleanup(cls):
+		"""
+		If a session wasn't ended properly, e.g. because of a crash, the game is left in an
+		unclean state. This method returns the game to a valid state.
+		"""
+		Scheduler.destroy_instance()
+		ExtScheduler.destroy_instance()
+		SPSession._clear_caches()
+
+	def run(self, ticks=1, seconds=None):
+		"""
+		Run the scheduler the given count of ticks or (in-game) seconds. Default is 1 tick,
+		if seconds are passed, they will overwrite the tick count.
+		"""
+		if seconds:
+			ticks = self.timer.get_ticks(seconds)
+
+		while ticks > 0:
+			Scheduler().tick(Scheduler().cur_tick + 1)
+			ticks -= 1
+
+
+def create_players(human_player=True, ai_players=0):
+	"""
+	Return the player list of StartGameOptions with an optional human player with
+	the id 1 and the given number of easy AI players.
+	"""
+	players = []
+	if human_player:
+		players.append({
+			'id': 1,
+			'name': 'foobar',
+			'color': Color.get(1),
+			'local': True,
+			'ai': False,
+			'difficulty': DifficultySettings.DEFAULT_LEVEL,
+		})
+
+	for i in range(ai_players):
+		id = i + human_player + 1
+		players.append({
+			'id': id,
+			'name': ('AI' + str(i)),
+			'color': Color.get(id),
+			'local': (id == 1),
+			'ai': True,
+			'difficulty': DifficultySettings.EASY_LEVEL,
+		})
+	return players
@@ -140,6 +140,9 @@ def start(_command_line_arguments):
 	if command_line_arguments.max_ticks:
 		GAME.MAX_TICKS = command_line_arguments.max_ticks
 
+	if command_line_arguments.profile_ticks:
+		GAME.PROFILE_TICKS_FILE = command_line_arguments.profile_ticks
+
 	# Setup atlases
 	if (command_line_arguments.atlas_generation
 	    and not command_line_arguments.gui_test
@@ -263,6 +266,8 @@ def setup_AI_settings(command_line_arguments):
 		AI.HIGHLIGHT_COMBAT = True
 	if command_line_arguments.human_ai:
 		AI.HUMAN_AI = True
+	if command_line_arguments.ai_plan_cache:
+		AI.VILLAGE_PLAN_CACHE = command_line_arguments.ai_plan_cache
 
 
 def setup_debug_mode(command_line_arguments):
@@ -301,6 +306,9 @@ def setup_gui_logger(command_line_arguments):
 def quit():
 	"""Quits the game"""
 	global preloader
+	if session is not None and session.is_alive:
+		# the session isn't ended when quitting, write the results that it would write then
+		session.export_tick_profile()
 	preloader.wait_for_finish()
 	horizons.globals.fife.quit()
 
@@ -21,14 +21,20 @@
 
 import itertools
 import logging
+import math
 import operator
+import time
 
+from horizons.command import Command
 from horizons.command.building import Build
+from horizons.constants import GAME_SPEED
 from horizons.i18n import gettext as T
 from horizons.network import CommandError, packets
+from horizons.network.codec import BinaryCodec
 from horizons.scheduler import Scheduler
 from horizons.timer import Timer
 from horizons.util.living import LivingObject
+from horizons.util.statechecksum import StateChecksum
 from horizons.util.worldobject import WorldObject
 
 
@@ -70,15 +76,31 @@ class MPManager(LivingObject):
 	EXECUTIONDELAY = 4
 	HASHDELAY = 4
 	HASH_EVAL_DISTANCE = 2 # interval, check hash every nth tick
-
-	def __init__(self, session, networkinterface):
-		"""Initialize the Multiplayer Manager"""
+	# while the local player doesn't issue commands, the packets of this many ticks are
+	# sent together. must be smaller than EXECUTIONDELAY and HASHDELAY.
+	MAX_BATCH_TICKS = 2
+
+	# adaptive mode: the execution delay follows the latency of the other players
+	MIN_EXECUTIONDELAY = MAX_BATCH_TICKS + 1
+	MAX_EXECUTIONDELAY = 48
+	DELAY_DECREASE_TICKS = 16 # only decrease the delay after it has been too high for this long
+	# the game is slowed down when the packets of a player arrive less than this many ticks
+	# before they are needed, instead of stopping when they are late
+	PACING_LEAD = 2
+	MIN_PACING = 0.25
+
+	def __init__(self, session, networkinterface, adaptive=True):
+		"""Initialize the Multiplayer Manager
+		@param adaptive: adapt the execution delay and the game speed to the latency of the
+		                 other players instead of using EXECUTIONDELAY and stopping on lags"""
 		super().__init__()
 		self.session = session
 		self.networkinterface = networkinterface
+		self.adaptive = adaptive
 		self.commandsmanager = MPCommandsManager(self)
 		self.localcommandsmanager = MPCommandsManager(self)
 		self.checkuphashmanager = MPCheckupHashManager(self)
+		self.subhashmanager = MPCheckupHashManager(self)
 		self.gamecommands = [] # commands from the local user, that will be part of next CommandPacket
 		self.localcommands = [] # (only local) commands from the local user (e.g. sounds only this user should hear)
 
@@ -89,9 +111,37 @@ class MPManager(LivingObject):
 		self.session.timer.add_call(self.hash_value_check)
 
 		self._last_local_commands_send_tick = -1 # last tick, where local commands got sent
+		self._outgoing = [] # packets for the other players that haven't been sent yet
+
+		# the packets are pickled until all other players have announced that they use the
+		# same BinaryCodec schema, then the codec is used
+		Command.import_all()
+		self._peer_codecs = {} # { player worldid: schema id }
+		self._binary = False
+
+		# only the digest of the checksum is sent, the sub hashes are kept until the digests
+		# have been compared. if they differ, the sub hashes are exchanged to find out which
+		# part of the game state has diverged.
+		self.checksum = StateChecksum.start()
+		self._sub_hashes = {} # { hash tick: sub hashes }
+		self._diverged_tick = None
+
+		# every player executes its commands execution_delay ticks after sending them. in
+		# adaptive mode, every player announces the delay it needs for the latency it has
+		# measured, and all of them use the highest announced one.
+		self.execution_delay = self.EXECUTIONDELAY
+		self._last_execution_tick = None # tick of the last CommandPacket that has been sent
+		self._latencies = {} # { player worldid: LatencyEstimator }
+		self._send_times = {} # { tick: time at which the packets of this tick were created }
+		self._received = {} # { player worldid: (send tick of its latest packet, arrival time) }
+		self._required_delay = self.EXECUTIONDELAY # delay announced by the local player
+		self._peer_delays = {} # { player worldid: delay announced by that player }
+		self._peer_ticks = {} # { player worldid: tick of the latest CommandPacket received }
+		self._delay_too_high_ticks = 0
 
 	def end(self):
-		pass
+		StateChecksum.stop()
+		super().end()
 
 	def can_tick(self, tick):
 		"""Checks if we can execute this tick via return value"""
@@ -103,50 +153,179 @@ class MPManager(LivingObject):
 			return Timer.TEST_SKIP
 
 		for packet in packets_received:
-			if isinstance(packet, CommandPacket):
+			if isinstance(packet, CheckupSubHashPacket):
+				self.log.debug("Got sub hash packet from " + str(packet.player_id) + " for tick " + str(packet.tick))
+				self.subhashmanager.add_packet(packet)
+			elif isinstance(packet, CommandPacket):
 				self.log.debug("Got command packet from " + str(packet.player_id) + " for tick " + str(packet.tick))
 				self.commandsmanager.add_packet(packet)
+				if packet.codec is not None and not self._binary:
+					self._peer_codecs[packet.player_id] = packet.codec
+					self._update_codec()
+				if packet.send_tick is not None:
+					self._on_adaptive_packet(packet)
 			elif isinstance(packet, CheckupHashPacket):
 				self.log.debug("Got checkuphash packet from " + str(packet.player_id) + " for tick " + str(packet.tick))
 				self.checkuphashmanager.add_packet(packet)
 			else:
 				self.log.warning("invalid packet: " + str(packet))
 
+		if self._diverged_tick is not None and self.subhashmanager.is_tick_ready(self._diverged_tick):
+			self.subhashmanager.are_checkup_hash_values_equal(self._diverged_tick, self.hash_value_diff)
+			self._diverged_tick = None
+
 		# send out new commands
 		# check if we already sent commands for this tick (only 1 packet per tick is allowed,
 		# in case of lags this code would be executed multiple times for the same tick)
 		if self._last_local_commands_send_tick < tick:
 			self._last_local_commands_send_tick = tick
-			commandpacket = CommandPacket(self.calculate_execution_tick(tick),
-					self.session.world.player.worldid, self.gamecommands)
-			self.gamecommands = []
-			self.commandsmanager.add_packet(commandpacket)
-			self.log.debug("sending command for tick %d", commandpacket.tick)
-			self.networkinterface.send_packet(commandpacket)
-
-			self.localcommandsmanager.add_packet(CommandPacket(self.calculate_execution_tick(tick),
-					self.session.world.player.worldid, self.localcommands))
-			self.localcommands = []
+			if self.adaptive:
+				self._update_execution_delay()
+			execution_tick = self.calculate_execution_tick(tick)
+			if self._last_execution_tick is None:
+				self._last_execution_tick = execution_tick - 1
+			if execution_tick > self._last_execution_tick:
+				# if the delay has grown, the ticks in between need packets too
+				for empty_tick in range(self._last_execution_tick + 1, execution_tick):
+					self._add_command_packet(empty_tick, tick, [], [])
+				self._add_command_packet(execution_tick, tick, self.gamecommands, self.localcommands)
+				self.gamecommands = []
+				self.localcommands = []
+				self._last_execution_tick = execution_tick
+			# else the delay has shrunk and there are packets for the next ticks already,
+			# the commands are sent once the ticks have caught up
 
 			# check if we have to evaluate a hash value
-			if self.calculate_hash_tick(tick) % self.HASH_EVAL_DISTANCE == 0:
-				hash_value = self.session.world.get_checkup_hash()
-				#self.log.debug("MPManager: Checkup hash for tick %s is %s", tick, hash_value)
-				checkuphashpacket = CheckupHashPacket(self.calculate_hash_tick(tick),
-			                              self.session.world.player.worldid, hash_value)
+			hash_tick = self.calculate_hash_tick(tick)
+			if hash_tick % self.HASH_EVAL_DISTANCE == 0:
+				sub_hashes = self.checksum.get_sub_hashes(self.session.random.random())
+				self._sub_hashes[hash_tick] = sub_hashes
+				#self.log.debug("MPManager: Checkup hash for tick %s is %s", tick, sub_hashes)
+				checkuphashpacket = CheckupHashPacket(hash_tick, self.session.world.player.worldid,
+				                                      StateChecksum.get_digest(sub_hashes))
 				self.checkuphashmanager.add_packet(checkuphashpacket)
 				self.log.debug("sending checkuphash for tick %d", checkuphashpacket.tick)
-				self.networkinterface.send_packet(checkuphashpacket)
+				self._outgoing.append(checkuphashpacket)
 
 		# decide if tick can be calculated
 		# in the first few ticks, no data is available
 		if self.commandsmanager.is_tick_ready(tick) or tick < (Scheduler.FIRST_TICK_ID + self.EXECUTIONDELAY):
 			#self.log.debug("MPManager: check tick %s ready: yes", tick)
+			self._send_outgoing()
+			if self.adaptive:
+				self._update_pacing(tick)
 			return Timer.TEST_PASS
 		else:
 			self.log.debug("MPManager: check tick %s ready: no", tick)
+			# we have to wait for the others anyway, don't make them wait for us
+			self._send_outgoing(force=True)
 			return Timer.TEST_SKIP
 
+	def _add_command_packet(self, execution_tick, tick, commands, localcommands):
+		player_id = self.session.world.player.worldid
+		adaptive_data = {}
+		if self.adaptive:
+			now = time.time()
+			self._send_times.setdefault(tick, now)
+			adaptive_data = {
+				'send_tick': tick,
+				'delay': self._required_delay,
+				'acks': {player: (send_tick, int((now - arrival) * 1000))
+				         for player, (send_tick, arrival) in self._received.items()},
+			}
+		commandpacket = CommandPacket(execution_tick, player_id, commands,
+				codec=None if self._binary else BinaryCodec.get_schema_id(), **adaptive_data)
+		self.commandsmanager.add_packet(commandpacket)
+		self.log.debug("sending command for tick %d", commandpacket.tick)
+		self._outgoing.append(commandpacket)
+
+		self.localcommandsmanager.add_packet(CommandPacket(execution_tick, player_id, localcommands))
+
+	def _on_adaptive_packet(self, packet):
+		"""Measures the round trip time to the sender of a CommandPacket.
+
+		Every packet acknowledges the latest packet of every other player: it contains its
+		send tick and how many milliseconds ago it has arrived. The time between creating our
+		packet of that tick and receiving the acknowledgement, minus that hold time, is the
+		round trip time.
+		"""
+		player_id = packet.player_id
+		now = time.time()
+		if packet.send_tick >= self._received.get(player_id, (packet.send_tick, None))[0]:
+			self._received[player_id] = (packet.send_tick, now)
+		self._peer_delays[player_id] = packet.delay
+		self._peer_ticks[player_id] = max(self._peer_ticks.get(player_id, packet.tick), packet.tick)
+
+		ack = packet.acks.get(self.session.world.player.worldid)
+		if ack is not None and ack[0] in self._send_times:
+			send_tick, hold = ack
+			if player_id not in self._latencies:
+				self._latencies[player_id] = LatencyEstimator()
+			round_trip_time = now - self._send_times[send_tick] - hold / 1000
+			self._latencies[player_id].add_sample(send_tick, max(0.0, round_trip_time))
+			# older ticks won't be acknowledged anymore
+			for old_tick in [t for t in self._send_times if t < send_tick - self.MAX_EXECUTIONDELAY]:
+				del self._send_times[old_tick]
+
+	def _update_execution_delay(self):
+		"""Chooses the execution delay for the packet that is sent next.
+
+		A player that changes its delay doesn't break the game, it still sends a packet for
+		every tick (see can_tick). Nonetheless all players use the same delay: the highest
+		one that any player needs. It is increased at once, but only decreased slowly so that
+		short lags don't make it jump back and forth."""
+		ticks_per_second = self.session.timer.ticks_per_second or GAME_SPEED.TICKS_PER_SECOND
+		required = [estimator.get_required_delay(ticks_per_second) + self.PACING_LEAD
+		            for estimator in self._latencies.values()]
+		self._required_delay = max(self.MIN_EXECUTIONDELAY,
+		                           min(self.MAX_EXECUTIONDELAY, max(required, default=self.EXECUTIONDELAY)))
+		delay = max([self._required_delay] + list(self._peer_delays.values()))
+		if delay >= self.execution_delay:
+			if delay > self.execution_delay:
+				self.log.debug("MPManager: increasing execution delay to %s", delay)
+			self.execution_delay = delay
+			self._delay_too_high_ticks = 0
+		else:
+			self._delay_too_high_ticks += 1
+			if self._delay_too_high_ticks >= self.DELAY_DECREASE_TICKS:
+				self.execution_delay -= 1
+				self._delay_too_high_ticks = 0
+				self.log.debug("MPManager: decreasing execution delay to %s", self.execution_delay)
+
+	def _update_pacing(self, tick):
+		"""Slows the game down while the packets of other players arrive just in time.
+		The game then keeps running slower instead of stopping every time they are late."""
+		if len(self._peer_ticks) < self.get_player_count() - 1:
+			return
+		lead = min(self._peer_ticks.values()) - tick
+		if lead >= self.PACING_LEAD:
+			pacing = 1.0
+		else:
+			pacing = max(self.MIN_PACING, (lead + 1) / (self.PACING_LEAD + 1))
+		self.session.timer.pacing = pacing
+
+	def _send_outgoing(self, force=False):
+		"""Sends the queued packets in one datagram.
+		If they contain no commands, this waits until there are packets of MAX_BATCH_TICKS ticks
+		(the other players only need them EXECUTIONDELAY ticks later).
+		@param force: send the packets in any case"""
+		if not self._outgoing:
+			return
+		if not force:
+			command_packets = [p for p in self._outgoing if isinstance(p, CommandPacket)]
+			if len(command_packets) < self.MAX_BATCH_TICKS and not any(p.commandlist for p in command_packets):
+				return
+		self.networkinterface.send_packet(self._outgoing, binary=self._binary)
+		self._outgoing = []
+
+	def _update_codec(self):
+		"""Use the BinaryCodec once every other player has announced the same schema as ours."""
+		schema_id = BinaryCodec.get_schema_id()
+		others = self.get_player_count() - 1
+		if len(self._peer_codecs) >= others and all(c == schema_id for c in self._peer_codecs.values()):
+			self.log.debug("MPManager: all players support the binary codec, using it")
+			self._binary = True
+
 	def tick(self, tick):
 		"""Do the tick (execute all commands for this tick)
 		This code may only be reached if we are allowed to tick now (@see can_tick)"""
@@ -164,25 +343,44 @@ class MPManager(LivingObject):
 				command(WorldObject.get_object_by_id(command_packet.player_id))
 
 	def can_hash_value_check(self, tick):
-		if self.checkuphashmanager.is_tick_ready(tick) or tick < self.HASHDELAY:
+		# in adaptive mode, the hashes are compared whenever they have arrived
+		if self.adaptive or self.checkuphashmanager.is_tick_ready(tick) or tick < self.HASHDELAY:
 			return Timer.TEST_PASS
 		else:
 			return Timer.TEST_SKIP
 
 	def hash_value_check(self, tick):
-		if tick % self.HASH_EVAL_DISTANCE == 0:
-			if not self.checkuphashmanager.are_checkup_hash_values_equal(tick, self.hash_value_diff):
-				self.log.error("MPManager: Hash values generated in tick %s are not equal",
-							   str(tick - self.HASHDELAY))
-				# if this is reached, we are screwed. Something went wrong in the simulation,
-				# but we don't know what. Stop the game.
-				msg = T("The games have run out of sync. This indicates an unknown internal error, the game cannot continue.") + "\n" + \
-				  T("We are very sorry and hope to have this bug fixed in a future version.")
-				self.session.ingame_gui.open_error_popup('Out of sync', msg)
+		if self.adaptive:
+			hash_ticks = sorted({packet.tick for packet in self.checkuphashmanager.command_packet_list})
+			for hash_tick in hash_ticks:
+				if hash_tick <= tick and self.checkuphashmanager.is_tick_ready(hash_tick):
+					self._check_hash_values(hash_tick)
+		elif tick % self.HASH_EVAL_DISTANCE == 0:
+			self._check_hash_values(tick)
+
+	def _check_hash_values(self, tick):
+		sub_hashes = self._sub_hashes.pop(tick, None)
+		if not self.checkuphashmanager.are_checkup_hash_values_equal(tick, self.hash_value_diff):
+			self.log.error("MPManager: Hash values generated in tick %s are not equal",
+						   str(tick - self.HASHDELAY))
+			if sub_hashes is not None and self._diverged_tick is None:
+				# drill down: the differences are logged when the sub hashes of all players are there
+				self._diverged_tick = tick
+				packet = CheckupSubHashPacket(tick, self.session.world.player.worldid, sub_hashes)
+				self.subhashmanager.add_packet(packet)
+				self._outgoing.append(packet)
+				self._send_outgoing(force=True)
+			# if this is reached, we are screwed. Something went wrong in the simulation,
+			# but we don't know what. Stop the game.
+			msg = T("The games have run out of sync. This indicates an unknown internal error, the game cannot continue.") + "\n" + \
+			  T("We are very sorry and hope to have this bug fixed in a future version.")
+			self.session.ingame_gui.open_error_popup('Out of sync', msg)
 
 	def hash_value_diff(self, player1, hash1, player2, hash2):
 		"""Called when a divergence has been detected"""
 		self.log.error("MPManager: Hash diff:\n%s hash1: %s\n%s hash2: %s", player1, hash1, player2, hash2)
+		if not isinstance(hash1, dict) or not isinstance(hash2, dict):
+			return # only digests, the sub hashes are compared later on
 		self.log.error("------------------")
 		self.log.error("Differences:")
 		if len(hash1) != len(hash2):
@@ -196,7 +394,7 @@ class MPManager(LivingObject):
 		self.log.error("------------------")
 
 	def calculate_execution_tick(self, tick):
-		return tick + self.EXECUTIONDELAY
+		return tick + self.execution_delay
 
 	def calculate_hash_tick(self, tick):
 		return tick + self.HASHDELAY
@@ -231,6 +429,39 @@ class MPManager(LivingObject):
 		# NOTE: it is supported now, and such outstanding commands are dropped right now
 		pass
 
+
+class LatencyEstimator:
+	"""Smoothed round trip time to one player and its variation, in seconds.
+
+	This is the round trip time estimation of TCP (RFC 6298).
+	"""
+
+	def __init__(self):
+		self.round_trip_time = None
+		self.jitter = 0.0
+		self._last_send_tick = None
+
+	def add_sample(self, send_tick, sample):
+		"""
+		@param send_tick: tick of the packet that has been acknowledged
+		@param sample: measured round trip time
+		"""
+		if send_tick == self._last_send_tick:
+			return # the same acknowledgement in further packets tells nothing new
+		self._last_send_tick = send_tick
+		if self.round_trip_time is None:
+			self.round_trip_time = sample
+			self.jitter = sample / 2
+		else:
+			self.jitter = 0.75 * self.jitter + 0.25 * abs(sample - self.round_trip_time)
+			self.round_trip_time = 0.875 * self.round_trip_time + 0.125 * sample
+
+	def get_required_delay(self, ticks_per_second):
+		"""Returns the number of ticks that nearly all packets need to get from this player to us."""
+		latency = (self.round_trip_time + 2 * self.jitter) / 2
+		return int(math.ceil(latency * ticks_per_second))
+
+
 # Packagemanagers storing Packages for later use
 ################################################
 
@@ -319,6 +550,7 @@ class MPPacket:
 		see documentation inside horizons.network.packets.SafeUnpickler
 		"""
 		packets.SafeUnpickler.add('server', klass)
+		BinaryCodec.add(klass)
 
 	def __str__(self):
 		return "packet " + str(self.__class__)  + " from player " + str(WorldObject.get_object_by_id(self.player_id)) + " for tick " + str(self.tick)
@@ -328,9 +560,28 @@ class CommandPacket(MPPacket):
 	"""Packet to be sent from every player to every player every tick.
 	Contains list of packets to be executed as well as the designated execution time.
 	Also acts as ping (game will stop if a packet for a certain tick hasn't arrived)"""
-	def __init__(self, tick, player_id, commandlist):
+	codec = None
+	# only set in adaptive mode, see MPManager._on_adaptive_packet
+	send_tick = None
+	delay = None
+	acks = None
+
+	def __init__(self, tick, player_id, commandlist, codec=None, send_tick=None, delay=None, acks=None):
+		"""
+		@param codec: BinaryCodec schema id the sender can decode, sent until the codec is used
+		@param send_tick: tick the sender was at when it created the packet
+		@param delay: execution delay the sender needs
+		@param acks: { player worldid: (send tick, milliseconds since its arrival) } of the
+		             latest packets the sender has received
+		"""
 		super().__init__(tick, player_id)
 		self.commandlist = commandlist
+		if codec is not None:
+			self.codec = codec
+		if send_tick is not None:
+			self.send_tick = send_tick
+			self.delay = delay
+			self.acks = acks
 
 
 MPPacket.allow_network(CommandPacket)
@@ -343,3 +594,11 @@ class CheckupHashPacket(MPPacket):
 
 
 MPPacket.allow_network(CheckupHashPacket)
+
+
+class CheckupSubHashPacket(CheckupHashPacket):
+	"""Sent after the checkup hashes of a tick have differed.
+	checkup_hash contains the hashes of the parts of the game state, see StateChecksum."""
+
+
+MPPacket.allow_network(CheckupSubHashPacket)
@@ -0,0 +1,345 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import struct
+import zlib
+from typing import Dict, Tuple
+
+from horizons.network import NetworkException
+
+
+class EncodeError(NetworkException):
+	"""The data contains something the codec can't encode, it has to be pickled."""
+
+
+class DecodeError(NetworkException):
+	pass
+
+
+# first byte of encoded data. pickle (protocol 2) data starts with 0x80, so both formats
+# can be told apart by looking at it.
+MAGIC = 0xB5
+
+# value tags
+NONE, FALSE, TRUE, INT, NEG_INT, FLOAT, STR, STR_REF, BYTES, TUPLE, LIST, SET, DICT, OBJECT = range(14)
+# tags from SMALL_INT on are the ints 0 .. 255 - SMALL_INT
+SMALL_INT = 0x40
+
+MAX_DEPTH = 32
+
+_float = struct.Struct('<d')
+
+
+class BinaryCodec:
+	"""
+	Compact binary encoding of the game data that is sent every tick in multiplayer games.
+
+	Instead of pickling the packets, only the classes registered with add() (the commands and
+	multiplayer packets) and the basic types None, bool, int, float, str, bytes, tuple, list,
+	set and dict can be encoded. Objects are written as the index of their class and their
+	attributes, ints as varints. Strings are interned: the attribute and method names used
+	in the __init__ methods of the registered classes form a table that both sides know,
+	and every other string is written only once per datagram and referenced afterwards.
+
+	Decoding can only create instances of registered classes, it never imports or calls
+	anything, which makes it safer than the SafeUnpickler.
+
+	The table of classes and strings (the schema) is built from the code, every datagram
+	carries a short id of it. Players can only use this codec if their schemas match,
+	otherwise they have to fall back to pickle (see MPManager).
+	"""
+
+	_classes = {} # type: Dict[Tuple[str, str], type]
+	_schema = None # type: _Schema
+
+	@classmethod
+	def add(cls, klass):
+		"""Allow instances of klass to be encoded."""
+		if klass.__module__ == 'builtins':
+			return # basic types are encoded natively
+		cls._classes[(klass.__module__, klass.__qualname__)] = klass
+		cls._schema = None
+
+	@classmethod
+	def _get_schema(cls):
+		if cls._schema is None:
+			cls._schema = _Schema(cls._classes)
+		return cls._schema
+
+	@classmethod
+	def get_schema_id(cls):
+		"""Returns the id of the classes and strings known to this codec.
+		Data can only be exchanged with codecs that have the same id."""
+		return cls._get_schema().id
+
+	@classmethod
+	def is_encoded(cls, data):
+		"""Returns whether data has been created by dumps (and not by pickle)."""
+		return len(data) > 0 and data[0] == MAGIC
+
+	@classmethod
+	def dumps(cls, obj):
+		"""
+		@param obj: value to encode, e.g. a list of packets
+		@return: bytes
+		@raise EncodeError: if obj contains values that can't be encoded
+		"""
+		schema = cls._get_schema()
+		writer = _Writer(schema)
+		writer.write(obj, 0)
+		return bytes([MAGIC]) + schema.id.to_bytes(2, 'little') + writer.buffer
+
+	@classmethod
+	def loads(cls, data):
+		"""
+		@param data: bytes created by dumps
+		@return: the encoded value
+		@raise DecodeError: if the data is malformed or uses a different schema
+		"""
+		schema = cls._get_schema()
+		if not cls.is_encoded(data) or len(data) < 3:
+			raise DecodeError("Not an encoded packet")
+		if int.from_bytes(data[1:3], 'little') != schema.id:
+			raise DecodeError("Packet uses a different schema")
+		reader = _Reader(schema, data, 3)
+		obj = reader.read(0)
+		if reader.pos != len(data):
+			raise DecodeError("Trailing data after packet")
+		return obj
+
+
+class _Schema:
+	"""The registered classes and interned strings, numbered in a reproducible way."""
+
+	def __init__(self, classes):
+		keys = sorted(classes)
+		self.classes = [classes[key] for key in keys]
+		self.class_ids = {klass: i for i, klass in enumerate(self.classes)}
+
+		strings = set()
+		for klass in self.classes:
+			for base in klass.__mro__:
+				init = base.__dict__.get('__init__')
+				code = getattr(init, '__code__', None)
+				if code is None:
+					continue
+				strings.update(code.co_names)
+				strings.update(const for const in code.co_consts
+				               if isinstance(const, str) and const.isidentifier())
+		self.strings = sorted(strings)
+
+		description = '\n'.join(['{}.{}'.format(*key) for key in keys] + [''] + self.strings)
+		self.id = zlib.crc32(description.encode()) & 0xFFFF
+
+
+class _Writer:
+	def __init__(self, schema):
+		self.schema = schema
+		self.buffer = bytearray()
+		self.strings = {string: i for i, string in enumerate(schema.strings)}
+
+	def write_varint(self, value):
+		buffer = self.buffer
+		while value > 0x7F:
+			buffer.append((value & 0x7F) | 0x80)
+			value >>= 7
+		buffer.append(value)
+
+	def write_str(self, value):
+		index = self.strings.get(value)
+		if index is not None:
+			self.buffer.append(STR_REF)
+			self.write_varint(index)
+		else:
+			self.strings[value] = len(self.strings)
+			encoded = value.encode('utf-8')
+			self.buffer.append(STR)
+			self.write_varint(len(encoded))
+			self.buffer += encoded
+
+	def write(self, value, depth):
+		# exact type checks: subclasses (e.g. of int) would lose their type
+		value_type = type(value)
+		buffer = self.buffer
+		if value is None:
+			buffer.append(NONE)
+		elif value_type is bool:
+			buffer.append(TRUE if value else FALSE)
+		elif value_type is int:
+			if 0 <= value < 0x100 - SMALL_INT:
+				buffer.append(SMALL_INT + value)
+			elif value >= 0:
+				buffer.append(INT)
+				self.write_varint(value)
+			else:
+				buffer.append(NEG_INT)
+				self.write_varint(-value - 1)
+		elif value_type is str:
+			self.write_str(value)
+		elif value_type is float:
+			buffer.append(FLOAT)
+			buffer += _float.pack(value)
+		elif value_type is bytes:
+			buffer.append(BYTES)
+			self.write_varint(len(value))
+			buffer += value
+		elif depth >= MAX_DEPTH:
+			raise EncodeError("Data is nested too deeply")
+		elif value_type in (tuple, list, set):
+			buffer.append(TUPLE if value_type is tuple else LIST if value_type is list else SET)
+			self.write_varint(len(value))
+			for item in value:
+				self.write(item, depth + 1)
+		elif value_type is dict:
+			buffer.append(DICT)
+			self.write_varint(len(value))
+			for key, item in value.items():
+				self.write(key, depth + 1)
+				self.write(item, depth + 1)
+		else:
+			class_id = self.schema.class_ids.get(value_type)
+			attributes = getattr(value, '__dict__', None)
+			if class_id is None or attributes is None:
+				raise EncodeError("Can't encode {}".format(value_type))
+			buffer.append(OBJECT)
+			self.write_varint(class_id)
+			self.write_varint(len(attributes))
+			for key, item in attributes.items():
+				self.write_str(key)
+				self.write(item, depth + 1)
+
+
+class _Reader:
+	def __init__(self, schema, data, pos):
+		self.schema = schema
+		self.data = data
+		self.pos = pos
+		self.strings = list(schema.strings)
+
+	def read_byte(self):
+		try:
+			byte = self.data[self.pos]
+		except IndexError:
+			raise DecodeError("Packet is truncated")
+		self.pos += 1
+		return byte
+
+	def read_varint(self):
+		byte = self.read_byte()
+		if byte < 0x80:
+			return byte
+		value = byte & 0x7F
+		shift = 7
+		while True:
+			byte = self.read_byte()
+			value |= (byte & 0x7F) << shift
+			if byte < 0x80:
+				return value
+			shift += 7
+			if shift > 128:
+				raise DecodeError("Invalid varint")
+
+	def read_length(self):
+		"""Reads the size of a str, bytes or collection. Every element needs at least one
+		byte, which makes sure that no huge objects are created for small malformed data."""
+		length = self.read_varint()
+		if length > len(self.data) - self.pos:
+			raise DecodeError("Invalid length")
+		return length
+
+	def read_bytes(self):
+		length = self.read_length()
+		self.pos += length
+		return self.data[self.pos - length:self.pos]
+
+	def read_str(self):
+		tag = self.read_byte()
+		if tag == STR_REF:
+			try:
+				return self.strings[self.read_varint()]
+			except IndexError:
+				raise DecodeError("Invalid string reference")
+		elif tag == STR:
+			try:
+				value = self.read_bytes().decode('utf-8')
+			except UnicodeDecodeError:
+				raise DecodeError("Invalid string")
+			self.strings.append(value)
+			return value
+		raise DecodeError("Expected a string")
+
+	def read(self, depth):
+		tag = self.read_byte()
+		# most common tags first
+		if tag >= SMALL_INT:
+			return tag - SMALL_INT
+		elif tag == STR_REF or tag == STR:
+			self.pos -= 1
+			return self.read_str()
+		elif tag == INT:
+			return self.read_varint()
+		elif tag == NONE:
+			return None
+		elif tag == FALSE:
+			return False
+		elif tag == TRUE:
+			return True
+		elif tag == NEG_INT:
+			return -self.read_varint() - 1
+		elif tag == FLOAT:
+			if self.pos + _float.size > len(self.data):
+				raise DecodeError("Packet is truncated")
+			self.pos += _float.size
+			return _float.unpack_from(self.data, self.pos - _float.size)[0]
+		elif tag == BYTES:
+			return bytes(self.read_bytes())
+		elif depth >= MAX_DEPTH:
+			raise DecodeError("Packet is nested too deeply")
+		elif tag == TUPLE or tag == LIST or tag == SET:
+			items = [self.read(depth + 1) for _ in range(self.read_length())]
+			if tag == TUPLE:
+				return tuple(items)
+			elif tag == SET:
+				try:
+					return set(items)
+				except TypeError:
+					raise DecodeError("Unhashable set item")
+			return items
+		elif tag == DICT:
+			value = {}
+			for _ in range(self.read_length()):
+				key = self.read(depth + 1)
+				try:
+					value[key] = self.read(depth + 1)
+				except TypeError:
+					raise DecodeError("Unhashable dict key")
+			return value
+		elif tag == OBJECT:
+			class_id = self.read_varint()
+			if class_id >= len(self.schema.classes):
+				raise DecodeError("Unknown class")
+			klass = self.schema.classes[class_id]
+			obj = klass.__new__(klass)
+			for _ in range(self.read_length()):
+				key = self.read_str()
+				obj.__dict__[key] = self.read(depth + 1)
+			return obj
+		raise DecodeError("Invalid tag {}".format(tag))
@@ -165,11 +165,13 @@ class NetworkInterface(object, metaclass=ManualConstructionSingleton):
 		if lang:
 			return self.set_props({'lang': lang})
 
-	def send_packet(self, packet, *args, **kwargs):
+	def send_packet(self, packet, binary=False):
 		"""
+		@param packet: packet, or in games packet or list of packets for the other players
+		@param binary: whether to encode game data with the BinaryCodec (see game_data)
 		"""
 		if self._mode is ClientMode.Game:
-			packet = packets.client.game_data(packet)
+			packet = packets.client.game_data(packet, binary=binary)
 		packet.sid = self.sid
 
 		self._connection.send_packet(packet)
@@ -488,7 +490,10 @@ class NetworkInterface(object, metaclass=ManualConstructionSingleton):
 		self.broadcast("game_prepare", game)
 
 	def _on_game_data(self, data):
-		self.received_packets.append(data)
+		if isinstance(data, list): # several packets sent together
+			self.received_packets.extend(data)
+		else:
+			self.received_packets.append(data)
 
 	def _assert_connection(self):
 		if self._mode is None:
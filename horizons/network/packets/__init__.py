@@ -27,6 +27,7 @@ from io import BytesIO
 from typing import Dict, Set
 
 from horizons.network import NetworkException, PacketTooLarge
+from horizons.network.codec import BinaryCodec
 
 __version__ = '0.1'
 
@@ -162,6 +163,11 @@ SafeUnpickler.add('common', cmd_fatalerror)
 
 #-------------------------------------------------------------------------------
 def unserialize(data, validate=False, protocol=0):
+	if BinaryCodec.is_encoded(data):
+		# only the game data that clients send each other in running games is encoded
+		if PICKLE_RECIEVE_FROM != 'server':
+			raise NetworkException("Encoded packets are only allowed in running games")
+		return horizons.network.packets.client.game_data(BinaryCodec.loads(data))
 	mypacket = SafeUnpickler.loads(data)
 	if validate:
 		if not inspect.isfunction(mypacket.validate):
@@ -22,6 +22,7 @@
 import uuid
 
 from horizons.network import NetworkException, SoftNetworkException
+from horizons.network.codec import BinaryCodec, EncodeError
 from horizons.network.packets import SafeUnpickler, packet
 
 
@@ -264,8 +265,21 @@ SafeUnpickler.add('client', cmd_preparedgame)
 
 #-------------------------------------------------------------------------------
 class game_data(packet):
-	def __init__(self, data):
+	def __init__(self, data, binary=False):
+		"""
+		@param data: packet or list of packets of the game
+		@param binary: whether to send data encoded by the BinaryCodec instead of pickled
+		"""
 		self.data = data
+		self.binary = binary
+
+	def serialize(self):
+		if self.binary:
+			try:
+				return BinaryCodec.dumps(self.data)
+			except EncodeError:
+				pass # e.g. a command with unusual arguments, pickle can handle it
+		return super().serialize()
 
 # origin is 'server' as clients will send AND receive them
 
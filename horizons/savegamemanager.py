@@ -191,20 +191,25 @@ class SavegameManager:
 		@param autosaves: set to True if autosaves should be cleaned.
 		@param quicksaves: set to True if quicksaves should be cleaned.
 		"""
-		def tmp_del(pattern, limit):
-			# Casting to int because get_uh_setting below returns floats like
-			# 4.0 (the slider stepping is 1.0) but we use this value as index.
-			limit = int(limit)
-			files = sorted(glob.glob(pattern))
-			for filename in files[:-limit]:
-				os.unlink(filename)
-
 		if autosaves:
-			tmp_del("{}/*.{}".format(cls.autosave_dir, cls.savegame_extension),
-			        horizons.globals.fife.get_uh_setting("AutosaveMaxCount"))
+			cls.delete_oldest_savegames(cls.autosave_dir,
+			                            horizons.globals.fife.get_uh_setting("AutosaveMaxCount"))
 		if quicksaves:
-			tmp_del("{}/*.{}".format(cls.quicksave_dir, cls.savegame_extension),
-			        horizons.globals.fife.get_uh_setting("QuicksaveMaxCount"))
+			cls.delete_oldest_savegames(cls.quicksave_dir,
+			                            horizons.globals.fife.get_uh_setting("QuicksaveMaxCount"))
+
+	@classmethod
+	def delete_oldest_savegames(cls, directory, limit):
+		"""Delete the oldest savegames in directory so that only limit savegames are left.
+
+		This doesn't access the settings, so it can be called from any thread.
+		"""
+		# Casting to int because get_uh_setting returns floats like
+		# 4.0 (the slider stepping is 1.0) but we use this value as index.
+		limit = int(limit)
+		files = sorted(glob.glob("{}/*.{}".format(directory, cls.savegame_extension)))
+		for filename in files[:-limit]:
+			os.unlink(filename)
 
 	@classmethod
 	def get_recommended_number_of_players(cls, mapfile):
@@ -32,11 +32,15 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 	""""Class providing timed callbacks.
 	Master of time.
 
-	TODO:
-	- Refactor to use a data structure that is suitable for iteration (ticking) as well as
-	  searching/deleting by instance, possibly also by callback.
-	  Suggestion: { tick -> { instance -> [callback] }} (basically a k-d tree)
+	Callbacks are kept in a timing wheel: a ring of WHEEL_SIZE buckets, one for each of the
+	next ticks. Callbacks that are due further in the future wait in per-tick overflow buckets
+	and are moved into the wheel when their tick comes into its range. Callbacks of one tick
+	are executed in the order they were added.
 
+	Every scheduled call gets a handle, a one-element list referencing the callback object.
+	Cancelling a call just clears its handle, the bucket entry is skipped when its tick comes.
+	Together with the index of calls by instance, removing calls never has to search through
+	the buckets.
 
 	@param timer: Timer instance the schedular registers itself with.
 	"""
@@ -46,25 +50,37 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 	# the tick with this id is actually executed, and no tick with a smaller number can occur
 	FIRST_TICK_ID = 0
 
+	# number of ticks covered by the wheel
+	WHEEL_SIZE = 256
+
 	def __init__(self, timer):
 		"""
 		@param timer: Timer obj
 		"""
 		super().__init__()
-		self.schedule = {}
+		self.wheel = [None] * self.WHEEL_SIZE # deques of handles of the next ticks
+		self.overflow = {} # { tick: deque of handles } for ticks beyond the wheel
 		self.additional_cur_tick_schedule = [] # jobs to be executed at the same tick they were added
-		self.calls_by_instance = {} # for get_classinst_calls
+		self.calls_by_instance = {} # { instance: { CallbackObject: None } }, for get_classinst_calls
 		self.cur_tick = self.__class__.FIRST_TICK_ID - 1 # before ticking
+		self.profiler = None # optional object with a run_callback(callback) method, see set_profiler
 		self.timer = timer
 		self.timer.add_call(self.tick)
 
 	def end(self):
-		self.log.debug("Scheduler end; len: %s", len(self.schedule))
-		self.schedule = None
+		self.log.debug("Scheduler end; len: %s", self.pending_ticks())
+		self.wheel = None
+		self.overflow = None
 		self.timer.remove_call(self.tick)
 		self.timer = None
 		super().end()
 
+	def pending_ticks(self):
+		"""Returns the number of ticks that have callbacks scheduled"""
+		if self.wheel is None:
+			return 0
+		return sum(1 for bucket in self.wheel if bucket) + len(self.overflow)
+
 	def tick(self, tick_id):
 		"""Threads main loop
 		@param tick_id: int id of the tick.
@@ -76,14 +92,28 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 			horizons.main.quit()
 			return
 
-		if self.cur_tick in self.schedule:
-			self.log.debug("Scheduler: tick %s, cbs: %s", self.cur_tick, len(self.schedule[self.cur_tick]))
-
-			# use iteration method that works in case the list is altered during iteration
-			# this can happen for e.g. rem_all_classinst_calls
-			cur_schedule = self.schedule[self.cur_tick]
+		# the last tick of the wheel's range is now in reach. its slot is the one of the previous
+		# tick, so it is empty and nothing that has been added directly can precede these calls.
+		far_tick = tick_id + self.WHEEL_SIZE - 1
+		if far_tick in self.overflow:
+			self.wheel[far_tick % self.WHEEL_SIZE] = self.overflow.pop(far_tick)
+
+		slot = tick_id % self.WHEEL_SIZE
+		cur_schedule = self.wheel[slot]
+		if cur_schedule is not None:
+			self.log.debug("Scheduler: tick %s, cbs: %s", self.cur_tick, len(cur_schedule))
+
+			# new calls can't be added to this slot while we are processing it,
+			# their delay would have to be a multiple of WHEEL_SIZE
+			self.wheel[slot] = None
+			# changes of the profiler take effect in the next tick
+			profiler = self.profiler
 			while cur_schedule:
-				callback = cur_schedule.popleft()
+				handle = cur_schedule.popleft()
+				callback = handle[0]
+				if callback is None:
+					continue # cancelled by rem_object or rem_call
+				callback.handle = None
 				# TODO: some system-level unit tests fail if this list is not processed in the correct order
 				#       (i.e. if e.g. pop() was used here). This is an indication of invalid assumptions
 				#       in the program and should be fixed.
@@ -92,29 +122,28 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 					self.log.debug("S(t:%s): %s: INVALID", tick_id, callback)
 					continue
 				self.log.debug("S(t:%s): %s", tick_id, callback)
-				callback.callback()
+				if profiler is None:
+					callback.callback()
+				else:
+					profiler.run_callback(callback)
 				assert callback.loops >= -1
 				if callback.loops != 0:
 					self.add_object(callback, readd=True)
 				else: # gone for good
-					if callback.class_instance in self.calls_by_instance:
+					calls = self.calls_by_instance.get(callback.class_instance)
+					if calls is not None:
 						# this can already be removed by e.g. rem_all_classinst_calls
 						if callback.finish_callback is not None:
 							callback.finish_callback()
 
-						try:
-							self.calls_by_instance[callback.class_instance].remove(callback)
-						except ValueError:
-							pass # also the callback can be deleted by e.g. rem_call
-			del self.schedule[self.cur_tick]
+						# also the callback can be deleted by e.g. rem_call
+						self._unindex(callback)
 
 			self.log.debug("Scheduler: finished tick %s", self.cur_tick)
 
 		# run jobs added in the loop above
 		self._run_additional_jobs()
 
-		assert (not self.schedule) or next(iter(self.schedule.keys())) > self.cur_tick
-
 	def before_ticking(self):
 		"""Called after game load and before game has started.
 		Callbacks with run_in=0 are used as generic "do this as soon as the current context
@@ -124,11 +153,22 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 		self._run_additional_jobs()
 
 	def _run_additional_jobs(self):
+		profiler = self.profiler
 		for callback in self.additional_cur_tick_schedule:
 			assert callback.loops == 0 # can't loop with no delay
-			callback.callback()
+			if profiler is None:
+				callback.callback()
+			else:
+				profiler.run_callback(callback)
 		self.additional_cur_tick_schedule = []
 
+	def set_profiler(self, profiler):
+		"""Lets profiler execute all callbacks from the next tick on, e.g. to measure their run time.
+		@param profiler: object with a run_callback(callback_obj) method that has to call
+		                 callback_obj.callback() exactly once, or None to disable profiling
+		"""
+		self.profiler = profiler
+
 	def add_object(self, callback_obj, readd=False):
 		"""Adds a new CallbackObject instance to the callbacks list for the first time
 		@param callback_obj: CallbackObject type object, containing all necessary  information
@@ -141,14 +181,22 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 		else: # default: run in future tick
 			interval = callback_obj.loop_interval if readd else callback_obj.run_in
 			tick_key = self.cur_tick + interval
-			if tick_key not in self.schedule:
-				self.schedule[tick_key] = deque()
 			callback_obj.tick = tick_key
-			self.schedule[tick_key].append(callback_obj)
+			handle = [callback_obj]
+			callback_obj.handle = handle
+			if interval < self.WHEEL_SIZE:
+				slot = tick_key % self.WHEEL_SIZE
+				if self.wheel[slot] is None:
+					self.wheel[slot] = deque()
+				self.wheel[slot].append(handle)
+			else:
+				if tick_key not in self.overflow:
+					self.overflow[tick_key] = deque()
+				self.overflow[tick_key].append(handle)
 			if not readd:  # readded calls haven't been removed here
 				if callback_obj.class_instance not in self.calls_by_instance:
-					self.calls_by_instance[callback_obj.class_instance] = []
-				self.calls_by_instance[callback_obj.class_instance].append(callback_obj)
+					self.calls_by_instance[callback_obj.class_instance] = {}
+				self.calls_by_instance[callback_obj.class_instance][callback_obj] = None
 
 	def add_new_object(self, callback, class_instance, run_in=1, loops=1, loop_interval=None, finish_callback=None):
 		"""Creates a new CallbackObject instance and calls the self.add_object() function.
@@ -160,36 +208,42 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 		callback_obj = _CallbackObject(self, callback, class_instance, run_in, loops, loop_interval, finish_callback=finish_callback)
 		self.add_object(callback_obj)
 
+	def _cancel(self, callback_obj):
+		"""Cancels the scheduled call of callback_obj in O(1).
+		@return: bool, whether there was a scheduled call"""
+		handle = getattr(callback_obj, 'handle', None)
+		if handle is None:
+			return False
+		handle[0] = None
+		callback_obj.handle = None
+		return True
+
+	def _unindex(self, callback_obj):
+		"""Removes callback_obj from the calls_by_instance index."""
+		calls = self.calls_by_instance.get(callback_obj.class_instance)
+		if calls is not None:
+			calls.pop(callback_obj, None)
+			if not calls:
+				del self.calls_by_instance[callback_obj.class_instance]
+
 	def rem_object(self, callback_obj):
 		"""Removes a CallbackObject from all callback lists
 		@param callback_obj: CallbackObject to remove
 		@return: int, number of removed calls
 		"""
 		removed_objs = 0
-		if self.schedule is not None:
-			for key in self.schedule:
-				while callback_obj in self.schedule[key]:
-					self.schedule[key].remove(callback_obj)
-					self.calls_by_instance[callback_obj.class_instance].remove(callback_obj)
-					removed_objs += 1
-
-		if not self.calls_by_instance[callback_obj.class_instance]:
-			del self.calls_by_instance[callback_obj.class_instance]
+		if self.wheel is not None and self._cancel(callback_obj):
+			self._unindex(callback_obj)
+			removed_objs += 1
 
 		return removed_objs
 
 	def rem_all_classinst_calls(self, class_instance):
 		"""Removes all callbacks from the scheduler that belong to the class instance class_inst."""
-		"""
-		for key in self.schedule:
-			callback_objects = self.schedule[key]
-			for i in xrange(len(callback_objects) - 1, -1, -1):
-				if callback_objects[i].class_instance is class_instance:
-					del callback_objects[i]
-		"""
 		if class_instance in self.calls_by_instance:
 			for callback_obj in self.calls_by_instance[class_instance]:
-				callback_obj.invalid = True # don't remove, finding them all takes too long
+				callback_obj.invalid = True # also catches the call that is currently executed
+				self._cancel(callback_obj)
 			del self.calls_by_instance[class_instance]
 
 		# filter additional callbacks as well
@@ -205,30 +259,18 @@ class Scheduler(LivingObject, metaclass=ManualConstructionSingleton):
 		"""
 		assert callable(callback)
 		removed_calls = 0
-		for key in self.schedule:
-			callback_objects = self.schedule[key]
-			for i in range(len(callback_objects) - 1, -1, -1):
-				if (callback_objects[i].class_instance is instance
-				    and callback_objects[i].callback == callback
-				    and not hasattr(callback_objects[i], "invalid")):
-					del callback_objects[i]
+		if instance in self.calls_by_instance:
+			for callback_obj in list(self.calls_by_instance[instance]):
+				if (callback_obj.callback == callback
+				    and not hasattr(callback_obj, "invalid")
+				    and self._cancel(callback_obj)):
+					self._unindex(callback_obj)
 					removed_calls += 1
 
-		test = 0
-		if removed_calls > 0: # there also must be calls in the calls_by_instance dict
-			for i in range(len(self.calls_by_instance[instance]) - 1, -1, -1):
-				obj = self.calls_by_instance[instance][i]
-				if obj.callback == callback:
-					del self.calls_by_instance[instance][i]
-					test += 1
-			assert test == removed_calls, "{}, {}".format(test, removed_calls)
-			if not self.calls_by_instance[instance]:
-				del self.calls_by_instance[instance]
-
 		for i in range(len(self.additional_cur_tick_schedule) - 1, -1, -1):
 			if self.additional_cur_tick_schedule[i].class_instance is instance and \
 				self.additional_cur_tick_schedule[i].callback == callback:
-					del callback_objects[i]
+					del self.additional_cur_tick_schedule[i]
 					removed_calls += 1
 
 		return removed_calls
@@ -289,6 +331,8 @@ class _CallbackObject:
 		self.loops = loops
 		self.loop_interval = loop_interval if loop_interval is not None else run_in
 		self.class_instance = class_instance
+		self.tick = None # tick of the next scheduled call
+		self.handle = None # handle of the next scheduled call, see Scheduler
 
 	def __str__(self):
 		cb = str(self.callback)
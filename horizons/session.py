@@ -35,7 +35,7 @@ from horizons.command.unit import RemoveUnit
 from horizons.component.ambientsoundcomponent import AmbientSoundComponent
 from horizons.component.namedcomponent import NamedComponent
 from horizons.component.selectablecomponent import SelectableBuildingComponent
-from horizons.constants import GAME_SPEED
+from horizons.constants import GAME, GAME_SPEED
 from horizons.entities import Entities
 from horizons.extscheduler import ExtScheduler
 from horizons.gui.ingamegui import IngameGui
@@ -45,9 +45,11 @@ from horizons.messaging.queuingmessagebus import QueuingMessageBus
 from horizons.savegamemanager import SavegameManager
 from horizons.scenario import ScenarioEventHandler
 from horizons.scheduler import Scheduler
-from horizons.util.dbreader import DbReader
+from horizons.util.backgroundsave import BackgroundSave
+from horizons.util.dbreader import BatchedDbWriter
 from horizons.util.living import LivingObject, livingProperty
 from horizons.util.savegameaccessor import SavegameAccessor
+from horizons.util.tickprofiler import TickProfiler
 from horizons.util.uhdbaccessor import read_savegame_template
 from horizons.util.worldobject import WorldObject
 from horizons.view import View
@@ -89,6 +91,8 @@ class Session(LivingObject):
 
 	log = logging.getLogger('session')
 
+	BACKGROUND_SAVE_CHECK_INTERVAL = 0.5 # seconds between checks whether a background save is done
+
 	def __init__(self, db, rng_seed=None, ingame_gui_class=IngameGui):
 		super().__init__()
 		assert isinstance(db, horizons.util.uhdbaccessor.UhDbAccessor)
@@ -106,8 +110,10 @@ class Session(LivingObject):
 		assert isinstance(self.random, Random)
 		self.timer = self.create_timer()
 		Scheduler.create_instance(self.timer)
+		if GAME.PROFILE_TICKS_FILE:
+			Scheduler().set_profiler(TickProfiler(Scheduler()))
 		self.manager = self.create_manager()
-		self.view = View()
+		self.view = self.create_view()
 		Entities.load(self.db)
 		self.scenario_eventhandler = ScenarioEventHandler(self) # dummy handler with no events
 
@@ -119,6 +125,8 @@ class Session(LivingObject):
 		self.selection_groups = [set() for _unused in range(10)]
 
 		self._old_autosave_interval = None
+		self._background_save = None # BackgroundSave that is being written
+		self._background_save_callback = None
 
 	def start(self):
 		"""Actually starts the game."""
@@ -154,6 +162,10 @@ class Session(LivingObject):
 		"""Returns a Timer instance."""
 		raise NotImplementedError
 
+	def create_view(self):
+		"""Returns the View that shows the game."""
+		return View()
+
 	@classmethod
 	def _clear_caches(cls):
 		"""Clear all data caches in global namespace related to a session"""
@@ -162,6 +174,13 @@ class Session(LivingObject):
 		AIPlayer.clear_caches()
 		SelectableBuildingComponent.reset()
 
+	def export_tick_profile(self):
+		"""Writes the results of the tick profiler, if it was enabled by --profile-ticks."""
+		profiler = Scheduler().profiler
+		if profiler is not None and GAME.PROFILE_TICKS_FILE:
+			self.log.info("Writing tick profile to %s", GAME.PROFILE_TICKS_FILE)
+			profiler.export(GAME.PROFILE_TICKS_FILE)
+
 	def end(self):
 		self.log.debug("Ending session")
 		self.is_alive = False
@@ -170,6 +189,12 @@ class Session(LivingObject):
 		Scheduler().rem_all_classinst_calls(self)
 		ExtScheduler().rem_all_classinst_calls(self)
 
+		if self._background_save is not None:
+			# don't leave a half-written savegame behind
+			self._background_save.wait()
+			self._background_save = None
+			self._background_save_callback = None
+
 		horizons.globals.fife.sound.end()
 
 		# these will call end() if the attribute still exists by the LivingObject magic
@@ -184,6 +209,7 @@ class Session(LivingObject):
 		self.timer = None
 		self.scenario_eventhandler = None
 
+		self.export_tick_profile()
 		Scheduler().end()
 		Scheduler.destroy_instance()
 
@@ -389,17 +415,80 @@ class Session(LivingObject):
 			else:
 				self.log.error('Unable to remove unknown object %s', instance)
 
+	def _write_savegame(self, db):
+		"""Writes the complete game state into the empty database db."""
+		read_savegame_template(db)
+
+		db("BEGIN")
+		self.world.save(db)
+		self.view.save(db)
+		self.ingame_gui.save(db)
+		self.scenario_eventhandler.save(db)
+
+		# Store RNG state
+		rng_state = json.dumps(self.random.getstate())
+		SavegameManager.write_metadata(db, self.savecounter, rng_state)
+
+		# Make sure everything gets written now
+		db("COMMIT")
+
+	def _do_background_save(self, savegame, callback, cleanup=None):
+		"""Saves the game like _do_save, but only the in-memory copy of the game state is
+		created right away. Writing it to disk happens on a worker thread.
+		@param savegame: absolute path
+		@param callback: function that is called with a bool whether saving succeeded,
+		                 on the main thread after the savegame has been written
+		@param cleanup: optional function that is called on the worker thread after saving
+		@return: bool, whether the game state could be copied (callback is only called then)"""
+		assert os.path.isabs(savegame)
+		if self._background_save is not None:
+			self.log.warning("Session: previous background save is still running, not saving to %s", savegame)
+			return False
+		self.log.debug("Session: Saving to %s in the background", savegame)
+		self.savecounter += 1
+		snapshot = BatchedDbWriter(':memory:', check_same_thread=False)
+		try:
+			self._write_savegame(snapshot)
+		except Exception:
+			self.log.error("Save Exception:")
+			traceback.print_exc()
+			snapshot.close()
+			return False
+
+		self._background_save = BackgroundSave(snapshot, savegame, cleanup)
+		self._background_save_callback = callback
+		self._background_save.start()
+		ExtScheduler().add_new_object(self._check_background_save, self,
+		                              self.BACKGROUND_SAVE_CHECK_INTERVAL, -1)
+		return True
+
+	def _check_background_save(self):
+		background_save = self._background_save
+		if not background_save.done:
+			return
+		ExtScheduler().rem_call(self, self._check_background_save)
+		callback = self._background_save_callback
+		self._background_save = None
+		self._background_save_callback = None
+		callback(background_save.error is None)
+
 	def _do_save(self, savegame):
 		"""Actual save code.
+
+		The savegame is written to a temporary file next to it, which replaces the savegame
+		once it is complete. Therefore sqlite doesn't need to protect the file against
+		crashes and can skip journaling and syncing, and an existing savegame stays intact
+		if saving fails.
 		@param savegame: absolute path"""
 		assert os.path.isabs(savegame)
 		self.log.debug("Session: Saving to %s", savegame)
+		temp_savegame = savegame + '.tmp'
 		try:
-			if os.path.exists(savegame):
-				os.unlink(savegame)
+			if os.path.exists(temp_savegame):
+				os.unlink(temp_savegame)
 			self.savecounter += 1
 
-			db = DbReader(savegame)
+			db = BatchedDbWriter(temp_savegame)
 		except IOError as e: # usually invalid filename
 			headline = T("Failed to create savegame file")
 			descr = T("There has been an error while creating your savegame file.")
@@ -416,26 +505,19 @@ class Session(LivingObject):
 			return self.save()
 
 		try:
-			read_savegame_template(db)
-
-			db("BEGIN")
-			self.world.save(db)
-			self.view.save(db)
-			self.ingame_gui.save(db)
-			self.scenario_eventhandler.save(db)
-
-			# Store RNG state
-			rng_state = json.dumps(self.random.getstate())
-			SavegameManager.write_metadata(db, self.savecounter, rng_state)
-
-			# Make sure everything gets written now
-			db("COMMIT")
+			db("PRAGMA journal_mode = MEMORY")
+			db("PRAGMA synchronous = OFF")
+			self._write_savegame(db)
 			db.close()
+			# sqlite didn't sync the file, it has to be on disk before it replaces the savegame
+			with open(temp_savegame, 'r+b') as f:
+				os.fsync(f.fileno())
+			os.replace(temp_savegame, savegame)
 			return True
 		except Exception:
 			self.log.error("Save Exception:")
 			traceback.print_exc()
 			# remove invalid savegamefile (but close db connection before deleting)
 			db.close()
-			os.unlink(savegame)
+			os.unlink(temp_savegame)
 			return False
@@ -20,7 +20,9 @@
 # ###################################################
 
 import random
+from functools import partial
 
+import horizons.globals
 from horizons.constants import SINGLEPLAYER
 from horizons.i18n import gettext as T
 from horizons.manager import SPManager
@@ -49,11 +51,29 @@ class SPSession(Session):
 	def autosave(self):
 		"""Called automatically in an interval"""
 		self.log.debug("Session: autosaving")
-		success = self._do_save(SavegameManager.create_autosave_filename())
+		savegame = SavegameManager.create_autosave_filename()
+		if horizons.globals.fife.get_uh_setting("BackgroundAutosave"):
+			# only the in-memory copy of the game is made now, see _on_autosave_done
+			limit = horizons.globals.fife.get_uh_setting("AutosaveMaxCount")
+			cleanup = partial(SavegameManager.delete_oldest_savegames, SavegameManager.autosave_dir, limit)
+			self._do_background_save(savegame, self._on_autosave_done, cleanup)
+			return
+
+		success = self._do_save(savegame)
 		if success:
 			SavegameManager.delete_dispensable_savegames(autosaves=True)
 			self.ingame_gui.message_widget.add('AUTOSAVE')
 
+	def _on_autosave_done(self, success):
+		if success:
+			self.ingame_gui.message_widget.add('AUTOSAVE')
+		else:
+			headline = T("Failed to autosave.")
+			descr = T("An error happened during autosave.") + "\n" + T("Your game has not been saved.")
+			advice = T("If this error happens again, please contact the development team: "
+			           "{website}").format(website="http://unknown-horizons.org/support/")
+			self.ingame_gui.open_error_popup(headline, descr, advice)
+
 	def quicksave(self):
 		"""Called when user presses the quicksave hotkey"""
 		self.log.debug("Session: quicksaving")
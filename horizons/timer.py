@@ -46,6 +46,8 @@ class Timer(LivingObject):
 		super().__init__()
 		self._freeze_protection = freeze_protection
 		self.ticks_per_second = GAME_SPEED.TICKS_PER_SECOND
+		# factor of ticks_per_second, multiplayer games use it to slow down when other players lag
+		self.pacing = 1.0
 		self.tick_next_id = tick_next_id
 		self.tick_next_time = 0.0
 		self.tick_func_test = []
@@ -91,6 +93,10 @@ class Timer(LivingObject):
 		"""
 		return int(round(seconds * GAME_SPEED.TICKS_PER_SECOND))
 
+	def get_tick_interval(self):
+		"""Returns the number of seconds between two ticks."""
+		return 1.0 / (self.ticks_per_second * self.pacing)
+
 	def check_tick(self):
 		"""check_tick is called by the engines _pump function to signal a frame idle."""
 		if self.ticks_per_second == 0:
@@ -101,7 +107,7 @@ class Timer(LivingObject):
 				if r == self.TEST_SKIP:
 					# If a callback changed the speed to zero, we have to exit
 					if self.ticks_per_second != 0:
-						self.tick_next_time = (self.tick_next_time or time.time()) + 1.0 / self.ticks_per_second
+						self.tick_next_time = (self.tick_next_time or time.time()) + self.get_tick_interval()
 					return
 			if self._freeze_protection and self.tick_next_time:
 				# stretch time if we're too slow
@@ -114,4 +120,4 @@ class Timer(LivingObject):
 			if self.ticks_per_second == 0:
 				# If a callback changed the speed to zero, we have to exit
 				return
-			self.tick_next_time = (self.tick_next_time or time.time()) + 1.0 / self.ticks_per_second
+			self.tick_next_time = (self.tick_next_time or time.time()) + self.get_tick_interval()
@@ -0,0 +1,119 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import logging
+import os
+import threading
+import traceback
+
+from horizons.util.dbreader import DbReader
+from horizons.util.uhdbaccessor import read_savegame_template
+
+
+def write_snapshot(snapshot, savegame):
+	"""Copies a savegame from a database into the file savegame.
+
+	The file is written as a temporary file next to savegame first, which then replaces
+	savegame, so an existing savegame is kept if anything goes wrong.
+	@param snapshot: DbReader of the complete savegame, usually an in-memory database
+	@param savegame: absolute path
+	"""
+	temp_savegame = savegame + '.tmp'
+	if os.path.exists(temp_savegame):
+		os.unlink(temp_savegame)
+	db = DbReader(temp_savegame)
+	try:
+		read_savegame_template(db)
+	finally:
+		db.close()
+
+	try:
+		snapshot("ATTACH DATABASE ? AS disk", temp_savegame)
+		try:
+			# like Session._do_save, the temporary file doesn't need to be crash safe
+			snapshot("PRAGMA disk.journal_mode = MEMORY")
+			snapshot("PRAGMA disk.synchronous = OFF")
+			snapshot("BEGIN")
+			tables = snapshot("SELECT name FROM main.sqlite_master WHERE type = 'table' "
+			                  "AND name NOT LIKE 'sqlite_%'")
+			for (table, ) in tables:
+				columns = ', '.join('"{}"'.format(column[1])
+				                    for column in snapshot('PRAGMA main.table_info("{}")'.format(table)))
+				# copy the rowids too, they are used as ids by some tables
+				snapshot('INSERT INTO disk."{0}"(rowid, {1}) SELECT rowid, {1} FROM main."{0}"'
+				         .format(table, columns))
+			snapshot("COMMIT")
+		finally:
+			snapshot("DETACH DATABASE disk")
+
+		with open(temp_savegame, 'r+b') as f:
+			os.fsync(f.fileno())
+		os.replace(temp_savegame, savegame)
+	except Exception:
+		if os.path.exists(temp_savegame):
+			os.unlink(temp_savegame)
+		raise
+
+
+class BackgroundSave:
+	"""Writes a savegame snapshot to disk on a worker thread.
+
+	The snapshot is a complete savegame in a database that is only used by this class from
+	then on (usually an in-memory database that was created with check_same_thread=False).
+	The owner has to check `done` regularly from the main thread and then handle `error`.
+	"""
+	log = logging.getLogger("backgroundsave")
+
+	def __init__(self, snapshot, savegame, cleanup=None):
+		"""
+		@param snapshot: DbReader, is closed by this class
+		@param savegame: absolute path of the savegame to write
+		@param cleanup: optional function that is called on the worker thread after the
+		                savegame has been written successfully
+		"""
+		self.snapshot = snapshot
+		self.savegame = savegame
+		self.cleanup = cleanup
+		self.error = None # traceback as str if saving failed
+		self._thread = threading.Thread(target=self._run, name='BackgroundSave')
+
+	def start(self):
+		self._thread.start()
+
+	@property
+	def done(self):
+		return not self._thread.is_alive()
+
+	def wait(self):
+		"""Blocks until the savegame has been written."""
+		self._thread.join()
+
+	def _run(self):
+		try:
+			write_snapshot(self.snapshot, self.savegame)
+			if self.cleanup is not None:
+				self.cleanup()
+		except Exception:
+			self.error = traceback.format_exc()
+			self.log.error("Background save to %s failed:\n%s", self.savegame, self.error)
+		finally:
+			self.snapshot.close()
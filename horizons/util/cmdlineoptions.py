@@ -78,6 +78,8 @@ def get_option_parser():
 	             help="Shows AI plans as highlights (for development only).")
 	ai_group.add_option("--ai-combat-highlights", dest="ai_combat_highlights", action="store_true",
 	             help="Highlights combat ranges for units controlled by AI Players (for development only).")
+	ai_group.add_option("--ai-plan-cache", dest="ai_plan_cache", metavar="<filename>",
+	             help="Keeps the village section plans of the AI players in <filename> between games.")
 	p.add_option_group(ai_group)
 
 	dev_group = optparse.OptionGroup(p, "Development options")
@@ -90,6 +92,9 @@ def get_option_parser():
 	             help="Writes log to <filename> instead of to the uh-userdir")
 	dev_group.add_option("--max-ticks", dest="max_ticks", metavar="<max_ticks>", type="int",
 	             help="Run the game for <max_ticks> ticks.")
+	dev_group.add_option("--profile-ticks", dest="profile_ticks", metavar="<filename>",
+	             help="Measure the run time of all scheduled callbacks and write the results to "
+	                  "<filename> (CSV if it ends with .csv, JSON otherwise) when the game ends.")
 	dev_group.add_option("--no-freeze-protection", dest="freeze_protection", action="store_false",
 	             default=True, help="Disable freeze protection.")
 	dev_group.add_option("--string-previewer", dest="stringpreview", action="store_true",
@@ -27,10 +27,11 @@ from horizons.util.python import decorators
 
 class DbReader:
 	"""Class that handles connections to sqlite databases
-	@param file: str containing the database file."""
-	def __init__(self, dbfile):
+	@param file: str containing the database file.
+	@param check_same_thread: whether only the creating thread may use the connection"""
+	def __init__(self, dbfile, check_same_thread=True):
 		self.db_path = dbfile
-		self.connection = sqlite3.connect(dbfile)
+		self.connection = sqlite3.connect(dbfile, check_same_thread=check_same_thread)
 		self.connection.isolation_level = None
 		def regexp(expr, item):
 			r = re.compile(expr)
@@ -72,3 +73,76 @@ class DbReader:
 	def close(self):
 		"""Closes the db"""
 		self.connection.close()
+
+
+class BatchedDbWriter(DbReader):
+	"""DbReader for writing savegames, which executes INSERTs in batches.
+
+	Saving issues one db("INSERT INTO ... VALUES ...", *values) per row. Instead of executing
+	every one of these on its own, the commands are appended to a buffer per table and
+	executed with executemany when enough of them have been collected or the buffers are
+	flushed. UPDATEs and DELETEs only change the table they name, so they are buffered the
+	same way. Any other command (including the final COMMIT) flushes all buffers first, so
+	queries always see the rows that have been written before them.
+
+	The commands of a table are executed in the order they were issued, which keeps the
+	rowids and the result the same as without buffering.
+	"""
+
+	BATCH_SIZE = 1000 # consecutive commands that are buffered before they are executed
+
+	_write_regexp = re.compile(r'\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)'
+	                           r'\s+["`\[]?(\w+)', re.IGNORECASE)
+
+	def __init__(self, dbfile, check_same_thread=True):
+		super().__init__(dbfile, check_same_thread)
+		self._buffers = {} # { table: [[command, [args, ...]], ...] }, consecutive commands share an entry
+		self._command_buffers = {} # { command: buffer of its table or None if it can't be buffered }
+
+	def _get_buffer(self, command):
+		"""Returns the buffer of the table that command writes to, None if it isn't a simple write."""
+		match = self._write_regexp.match(command)
+		# a subquery could read rows that are still buffered
+		if match is None or 'SELECT' in command.upper():
+			buffer = None
+		else:
+			buffer = self._buffers.setdefault(match.group(1).lower(), [])
+		self._command_buffers[command] = buffer
+		return buffer
+
+	def __call__(self, command, *args):
+		try:
+			buffer = self._command_buffers[command]
+		except KeyError:
+			buffer = self._get_buffer(command)
+		if buffer is None:
+			self.flush()
+			return super().__call__(command, *args)
+
+		if buffer and buffer[-1][0] is command:
+			rows = buffer[-1][1]
+			rows.append(args)
+			if len(rows) >= self.BATCH_SIZE:
+				self._write(buffer)
+		else:
+			buffer.append([command, [args]])
+		return []
+
+	def _write(self, buffer):
+		for command, rows in buffer:
+			self.cur.executemany(command, rows)
+		del buffer[:]
+
+	def flush(self):
+		"""Executes all buffered commands."""
+		for buffer in self._buffers.values():
+			if buffer:
+				self._write(buffer)
+
+	def execute_many(self, command, parameters):
+		self.flush()
+		return super().execute_many(command, parameters)
+
+	def execute_script(self, script):
+		self.flush()
+		return super().execute_script(script)
@@ -0,0 +1,369 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import logging
+from collections import defaultdict, deque
+from heapq import heappop, heappush
+
+from horizons.util.pathfinding.pathfinding import GridFindPath
+from horizons.util.shapes import Point
+
+
+"""
+Hierarchical pathfinding (HPA*) for big node sets such as the world's water.
+
+The grid is divided into square clusters. Where two neighboring clusters touch, entrances
+(pairs of adjacent tiles, one on each side) are placed. Long paths are first searched on
+the abstract graph of entrances and then refined into single steps by searches that only
+ever span one or two clusters.
+"""
+
+
+class ClusterGraph:
+	"""Abstract graph of cluster entrances over a NodeGrid.
+
+	Entrances are computed when the graph is created, the distances between the entrances
+	of a cluster are computed the first time the cluster is used and cached afterwards.
+	Call update_tiles() whenever the walkability of some tiles changes.
+	"""
+	log = logging.getLogger("world.pathfinding")
+
+	CLUSTER_SIZE = 16
+
+	# border runs of open tiles that are at least this long get an entrance at each end
+	# instead of a single one in the middle
+	MAX_SINGLE_ENTRANCE_LENGTH = 6
+
+	def __init__(self, nodes, diagonal=True):
+		"""
+		@param nodes: NodeGrid to build the graph for
+		@param diagonal: whether units using it can move diagonally
+		"""
+		self.nodes = nodes
+		if diagonal:
+			self.moves = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+		else:
+			self.moves = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+		size = self.CLUSTER_SIZE
+		self.clusters_x = (nodes.width + size - 1) // size
+		self.clusters_y = (nodes.height + size - 1) // size
+
+		# {cluster: set of entrance coords in that cluster}
+		self.entrances = defaultdict(set)
+		# {entrance coords: set of entrance coords in the neighboring cluster}
+		self.links = defaultdict(set)
+		# {cluster: {entrance coords: {entrance coords: distance}}}, filled lazily
+		self._distances = {}
+		# {cluster: walkable neighbors of each cell}, filled lazily
+		self._adjacency = {}
+
+		for cx in range(self.clusters_x):
+			for cy in range(self.clusters_y):
+				self._add_border_entrances((cx, cy), (cx + 1, cy))
+				self._add_border_entrances((cx, cy), (cx, cy + 1))
+
+	def get_cluster(self, coords):
+		return ((coords[0] - self.nodes.left) // self.CLUSTER_SIZE,
+		        (coords[1] - self.nodes.top) // self.CLUSTER_SIZE)
+
+	def get_cluster_borders(self, cluster):
+		"""@return: tuple (left, top, right, bottom) of the coords in the cluster"""
+		size = self.CLUSTER_SIZE
+		left = self.nodes.left + cluster[0] * size
+		top = self.nodes.top + cluster[1] * size
+		right = min(left + size, self.nodes.left + self.nodes.width) - 1
+		bottom = min(top + size, self.nodes.top + self.nodes.height) - 1
+		return (left, top, right, bottom)
+
+	def _add_border_entrances(self, cluster1, cluster2):
+		"""Adds entrances between cluster1 and cluster2, which is right of or below cluster1."""
+		if cluster2[0] >= self.clusters_x or cluster2[1] >= self.clusters_y:
+			return
+		left, top, right, bottom = self.get_cluster_borders(cluster1)
+		if cluster2[0] != cluster1[0]:
+			# vertical border: pairs ((right, y), (right + 1, y))
+			pairs = [((right, y), (right + 1, y)) for y in range(top, bottom + 1)]
+		else:
+			# horizontal border: pairs ((x, bottom), (x, bottom + 1))
+			pairs = [((x, bottom), (x, bottom + 1)) for x in range(left, right + 1)]
+
+		nodes = self.nodes
+		run = []
+		for pair in pairs + [None]:
+			if pair is not None and pair[0] in nodes and pair[1] in nodes:
+				run.append(pair)
+				continue
+			if run:
+				if len(run) < self.MAX_SINGLE_ENTRANCE_LENGTH:
+					chosen = [run[len(run) // 2]]
+				else:
+					chosen = [run[0], run[-1]]
+				for coords1, coords2 in chosen:
+					self.entrances[cluster1].add(coords1)
+					self.entrances[cluster2].add(coords2)
+					self.links[coords1].add(coords2)
+					self.links[coords2].add(coords1)
+				run = []
+
+	def _remove_border_entrances(self, cluster1, cluster2):
+		"""Removes all entrances that link cluster1 and cluster2."""
+		for coords in list(self.entrances.get(cluster1, ())):
+			for other in list(self.links[coords]):
+				if self.get_cluster(other) == cluster2:
+					self.links[coords].discard(other)
+					self.links[other].discard(coords)
+					if not self.links[other]:
+						del self.links[other]
+						self.entrances[cluster2].discard(other)
+			if not self.links[coords]:
+				del self.links[coords]
+				self.entrances[cluster1].discard(coords)
+
+	def update_tiles(self, coords_list):
+		"""Updates the graph after the walkability of the tiles in coords_list changed
+		(the NodeGrid itself has to be updated before).
+		Only the borders of the affected clusters are recomputed."""
+		affected = {self.get_cluster(coords) for coords in coords_list}
+		borders = set()
+		for cx, cy in affected:
+			borders.update((((cx - 1, cy), (cx, cy)), ((cx, cy), (cx + 1, cy)),
+			                ((cx, cy - 1), (cx, cy)), ((cx, cy), (cx, cy + 1))))
+		for cluster1, cluster2 in sorted(borders):
+			if cluster1[0] < 0 or cluster1[1] < 0:
+				continue
+			self._remove_border_entrances(cluster1, cluster2)
+			self._add_border_entrances(cluster1, cluster2)
+			# the entrances of both clusters might have changed
+			affected.update((cluster1, cluster2))
+		for cluster in affected:
+			self._distances.pop(cluster, None)
+			self._adjacency.pop(cluster, None)
+
+	def _get_adjacency(self, cluster):
+		"""@return: list of walkable neighbors (as local indices) for every cell of the cluster
+		or None if every cell of the cluster is walkable.
+		Cells are numbered (x - left) * height + (y - top) inside the cluster."""
+		if cluster not in self._adjacency:
+			left, top, right, bottom = self.get_cluster_borders(cluster)
+			width = right - left + 1
+			height = bottom - top + 1
+			walkable = self.nodes.walkable
+			cluster_walkable = []
+			for x in range(width):
+				start = self.nodes.get_index((left + x, top))
+				cluster_walkable.extend(walkable[start:start + height])
+			if all(cluster_walkable):
+				# open sea, distances can be calculated directly
+				self._adjacency[cluster] = None
+				return None
+			adjacency = []
+			for x in range(width):
+				for y in range(height):
+					adjacency.append([(x + dx) * height + y + dy for dx, dy in self.moves
+					                  if 0 <= x + dx < width and 0 <= y + dy < height and
+					                  cluster_walkable[(x + dx) * height + y + dy]])
+			self._adjacency[cluster] = adjacency
+		return self._adjacency[cluster]
+
+	def get_distances_in_cluster(self, cluster, sources, targets):
+		"""Breadth-first search that never leaves the cluster.
+		@param sources: iterable of coords in the cluster to start at
+		@param targets: iterable of coords in the cluster we want to know the distance of
+		@return: dict {target: number of steps from the nearest source} of reachable targets"""
+		adjacency = self._get_adjacency(cluster)
+		if adjacency is None:
+			sources = list(sources)
+			if len(self.moves) == 8:
+				return {(x, y): min(max(abs(x - sx), abs(y - sy)) for (sx, sy) in sources)
+				        for (x, y) in targets}
+			return {(x, y): min(abs(x - sx) + abs(y - sy) for (sx, sy) in sources)
+			        for (x, y) in targets}
+
+		left, top, right, bottom = self.get_cluster_borders(cluster)
+		height = bottom - top + 1
+		distances = [-1] * len(adjacency)
+		queue = deque()
+		for x, y in sources:
+			index = (x - left) * height + y - top
+			distances[index] = 0
+			queue.append(index)
+		while queue:
+			index = queue.popleft()
+			dist = distances[index] + 1
+			for neighbor in adjacency[index]:
+				if distances[neighbor] == -1:
+					distances[neighbor] = dist
+					queue.append(neighbor)
+		result = {}
+		for coords in targets:
+			dist = distances[(coords[0] - left) * height + coords[1] - top]
+			if dist != -1:
+				result[coords] = dist
+		return result
+
+	def _get_entrance_distances(self, cluster):
+		"""@return: {entrance: {other entrance: distance}} for entrances of the cluster"""
+		if cluster not in self._distances:
+			entrances = sorted(self.entrances.get(cluster, ()))
+			cluster_distances = {}
+			for entrance in entrances:
+				reachable = self.get_distances_in_cluster(cluster, [entrance], entrances)
+				del reachable[entrance]
+				cluster_distances[entrance] = reachable
+			self._distances[cluster] = cluster_distances
+		return self._distances[cluster]
+
+	def find_waypoints(self, source, destination_coords):
+		"""Searches the abstract graph.
+		@param source: coords tuple to start at
+		@param destination_coords: list of walkable destination coords
+		@return: list of entrance coords to pass on the way (possibly empty) or None if the
+		         destination is unreachable via the abstract graph
+		"""
+		get_cluster = self.get_cluster
+
+		# connect the destination to the entrances of its clusters
+		by_cluster = defaultdict(list)
+		for coords in destination_coords:
+			by_cluster[get_cluster(coords)].append(coords)
+		source_cluster = get_cluster(source)
+		to_destination = {}
+		for cluster, coords in sorted(by_cluster.items()):
+			targets = list(self.entrances.get(cluster, ()))
+			if cluster == source_cluster:
+				targets.append(source)
+			to_destination[cluster] = self.get_distances_in_cluster(cluster, coords, targets)
+
+		# admissible heuristic: chebyshev distance to the bounding box of the destination
+		dest_left = min(coords[0] for coords in destination_coords)
+		dest_right = max(coords[0] for coords in destination_coords)
+		dest_top = min(coords[1] for coords in destination_coords)
+		dest_bottom = max(coords[1] for coords in destination_coords)
+
+		def estimate(coords):
+			dx = max(dest_left - coords[0], 0, coords[0] - dest_right)
+			dy = max(dest_top - coords[1], 0, coords[1] - dest_bottom)
+			return max(dx, dy)
+
+		# the destination itself is represented by an empty tuple, which sorts before coords
+		destination = ()
+		previous = {}
+		best = {}
+		heap = []
+		from_source = self.get_distances_in_cluster(source_cluster, [source],
+		                                            sorted(self.entrances.get(source_cluster, ())))
+		starts = sorted(from_source.items())
+		if source_cluster in to_destination and source in to_destination[source_cluster]:
+			starts.append((destination, to_destination[source_cluster][source]))
+		for coords, dist in starts:
+			best[coords] = dist
+			previous[coords] = source
+			heappush(heap, (dist + (estimate(coords) if coords else 0), dist, coords))
+
+		done = set()
+		while heap:
+			_, dist, coords = heappop(heap)
+			if coords == destination:
+				# collect the entrances passed on the way
+				waypoints = []
+				coords = previous[destination]
+				while coords != source:
+					waypoints.append(coords)
+					coords = previous[coords]
+				waypoints.reverse()
+				return waypoints
+			if coords in done:
+				continue
+			done.add(coords)
+
+			cluster = get_cluster(coords)
+			neighbors = [(other, 1) for other in sorted(self.links.get(coords, ()))]
+			neighbors.extend(sorted(self._get_entrance_distances(cluster)[coords].items()))
+			if cluster in to_destination and coords in to_destination[cluster]:
+				neighbors.append((destination, to_destination[cluster][coords]))
+
+			for other, cost in neighbors:
+				new_dist = dist + cost
+				if other in done or (other in best and best[other] <= new_dist):
+					continue
+				best[other] = new_dist
+				previous[other] = coords
+				heappush(heap, (new_dist + (estimate(other) if other else 0), new_dist, other))
+		return None
+
+
+class HierarchicalFindPath(GridFindPath):
+	"""GridFindPath that plans long paths on a ClusterGraph first.
+
+	The path between two consecutive waypoints of the abstract path is then searched
+	with GridFindPath, so temporarily blocked coords are still respected. Paths are
+	close to, but not always exactly as short as the ones FindPath finds.
+	Short paths, and everything the abstract graph can't handle, use GridFindPath directly.
+	"""
+
+	def __init__(self, graph):
+		"""
+		@param graph: ClusterGraph built for the path nodes that will be searched
+		"""
+		self.graph = graph
+
+	def execute(self):
+		graph = self.graph
+		path_nodes = self.path_nodes
+		if graph is None or graph.nodes is not path_nodes:
+			return super().execute()
+
+		source_coords = self.source.get_coordinates()
+		if len(source_coords) != 1:
+			return super().execute()
+		source = source_coords[0]
+		destination_coords = self.destination.get_coordinates()
+		if not self.make_target_walkable:
+			destination_coords = [coords for coords in destination_coords if coords in path_nodes]
+		if not destination_coords:
+			return None
+
+		get_index = path_nodes.get_index
+		if get_index(source) is None or any(get_index(coords) is None for coords in destination_coords):
+			return super().execute()
+
+		# short paths are cheap enough to be searched directly
+		min_distance = min(max(abs(source[0] - x), abs(source[1] - y)) for (x, y) in destination_coords)
+		if min_distance < 2 * graph.CLUSTER_SIZE:
+			return super().execute()
+
+		waypoints = graph.find_waypoints(source, destination_coords)
+		if waypoints is None:
+			# e.g. only connected via a diagonal step across a cluster corner
+			self.log.debug("HierarchicalFindPath: no abstract path from %s to %s", source, self.destination)
+			return super().execute()
+
+		path = [source]
+		targets = [Point(*waypoint) for waypoint in waypoints] + [self.destination]
+		for target in targets:
+			segment = GridFindPath()(Point(*path[-1]), target, path_nodes, self.blocked_coords,
+			                         self.diagonal, self.make_target_walkable)
+			if segment is None:
+				# a waypoint is blocked right now, the full search might find a way around it
+				return super().execute()
+			path.extend(segment[1:])
+		return path
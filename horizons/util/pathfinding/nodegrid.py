@@ -0,0 +1,225 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from array import array
+from collections.abc import Mapping, MutableMapping
+from itertools import count
+
+
+class NodeGrid(MutableMapping):
+	"""Path nodes {(x, y): speed} that are stored in a dense grid.
+
+	This acts like a dict for everyone using it (membership tests, iteration, ...), but the
+	nodes are kept in flat arrays covering a fixed rectangle instead of a dict keyed by
+	coordinate tuples. That needs a fraction of the memory for big node collections like the
+	water of the world, and GridFindPath can search on these arrays directly.
+
+	The cell of (x, y) has the index (x - left) * height + (y - top), which means that
+	ordering cells by index is the same as ordering the coordinate tuples. Iteration yields
+	the nodes on the grid in this order.
+
+	Nodes outside of the rectangle are allowed (they are kept in a small dict), they just
+	can't be used by the grid search.
+
+	Every change increases `version`. Together with the `serial`, which is unique for every
+	grid, it identifies the exact state of the nodes (used by PathCache).
+	"""
+	_serials = count()
+
+	def __init__(self, rect, nodes=None):
+		"""
+		@param rect: Rect that is covered by the grid
+		@param nodes: optional iterable of coords or dict {(x, y): speed} to start with
+		"""
+		self.left = rect.left
+		self.top = rect.top
+		self.width = rect.right - rect.left + 1
+		self.height = rect.bottom - rect.top + 1
+		self.size = self.width * self.height
+		self.walkable = bytearray(self.size)
+		self.speed = array('d', bytes(array('d').itemsize * self.size))
+		self._outside = {} # { (x, y): speed } of the nodes that are not on the grid
+		self._len = 0
+		self._search_state = None
+		self.serial = next(self._serials)
+		self.version = 0
+		if nodes is not None:
+			if isinstance(nodes, Mapping):
+				self.update(nodes)
+			else:
+				self.update(dict.fromkeys(nodes, 1.0))
+
+	@property
+	def outside_nodes(self):
+		"""Number of nodes that are not on the grid."""
+		return len(self._outside)
+
+	def get_index(self, coords):
+		"""Returns the grid index of coords or None if they are not on the grid."""
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return x * self.height + y
+		return None
+
+	def get_coords(self, index):
+		x, y = divmod(index, self.height)
+		return (x + self.left, y + self.top)
+
+	def get_search_state(self):
+		"""Returns the reusable scratch buffers of this grid, see SearchState."""
+		if self._search_state is None:
+			self._search_state = SearchState(self.size)
+		return self._search_state
+
+	def __contains__(self, coords):
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return self.walkable[x * self.height + y] == 1
+		return coords in self._outside
+
+	def __getitem__(self, coords):
+		index = self.get_index(coords)
+		if index is None:
+			return self._outside[coords]
+		if not self.walkable[index]:
+			raise KeyError(coords)
+		return self.speed[index]
+
+	def get(self, coords, default=None):
+		index = self.get_index(coords)
+		if index is None:
+			return self._outside.get(coords, default)
+		if not self.walkable[index]:
+			return default
+		return self.speed[index]
+
+	def __setitem__(self, coords, speed):
+		index = self.get_index(coords)
+		if index is None:
+			if coords in self._outside:
+				if self._outside[coords] == speed:
+					return
+			else:
+				self._len += 1
+			self._outside[coords] = speed
+		else:
+			if self.walkable[index]:
+				if self.speed[index] == speed:
+					return
+			else:
+				self.walkable[index] = 1
+				self._len += 1
+			self.speed[index] = speed
+		self.version += 1
+
+	def __delitem__(self, coords):
+		index = self.get_index(coords)
+		if index is None:
+			del self._outside[coords]
+		else:
+			if not self.walkable[index]:
+				raise KeyError(coords)
+			self.walkable[index] = 0
+			self.speed[index] = 0.0
+		self._len -= 1
+		self.version += 1
+
+	def __iter__(self):
+		walkable = self.walkable
+		height = self.height
+		left = self.left
+		top = self.top
+		index = walkable.find(1)
+		while index != -1:
+			yield (left + index // height, top + index % height)
+			index = walkable.find(1, index + 1)
+		yield from list(self._outside)
+
+	def __len__(self):
+		return self._len
+
+	def __repr__(self):
+		return '{}({!r})'.format(self.__class__.__name__, dict(self.items()))
+
+	def clear(self):
+		self.walkable = bytearray(self.size)
+		self.speed = array('d', bytes(array('d').itemsize * self.size))
+		self._outside = {}
+		self._len = 0
+		self.version += 1
+
+	def copy(self):
+		grid = NodeGrid.__new__(NodeGrid)
+		grid.left, grid.top = self.left, self.top
+		grid.width, grid.height, grid.size = self.width, self.height, self.size
+		grid.walkable = bytearray(self.walkable)
+		grid.speed = array('d', self.speed)
+		grid._outside = dict(self._outside)
+		grid._len = self._len
+		grid._search_state = None
+		grid.serial = next(self._serials)
+		grid.version = 0
+		return grid
+
+	__copy__ = copy
+
+	def __reduce__(self):
+		from horizons.util.shapes import Rect
+		rect = Rect.init_from_borders(self.left, self.top,
+		                              self.left + self.width - 1, self.top + self.height - 1)
+		return (self.__class__, (rect, dict(self.items())))
+
+
+class SearchState:
+	"""Scratch buffers of one grid, reused by every search on it.
+
+	Instead of clearing the buffers before each search, every search gets a new generation
+	number. A cell only counts as set in a buffer if its stamp equals the current generation.
+	"""
+
+	# stamps are stored as unsigned ints, 32 bit on all supported platforms
+	MAX_GENERATION = 2 ** (8 * array('I').itemsize) - 1
+
+	def __init__(self, size):
+		self.size = size
+		self.generation = 0
+		self._allocate()
+
+	def _allocate(self):
+		size = self.size
+		stamps = bytes(array('I').itemsize * size)
+		self.seen = array('I', stamps) # cells that have been added to the open list
+		self.target = array('I', stamps) # destination cells
+		self.passable = array('I', stamps) # source and destination cells, always walkable
+		self.blocked = array('I', stamps) # temporarily blocked cells
+		self.previous = array('l', bytes(array('l').itemsize * size))
+		self.distance = array('d', bytes(array('d').itemsize * size))
+
+	def next_generation(self):
+		"""Starts a new search, which invalidates all data of the previous one.
+		@return: the new generation number"""
+		if self.generation == self.MAX_GENERATION:
+			self.generation = 0
+			self._allocate()
+		self.generation += 1
+		return self.generation
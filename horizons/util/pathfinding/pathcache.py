@@ -0,0 +1,112 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import logging
+from collections import OrderedDict
+
+from horizons.util.pathfinding.nodegrid import NodeGrid
+
+
+class PathCache:
+	"""Bounded LRU cache of found paths.
+
+	Entries are keyed by the identity and version of the path nodes, so every change of the
+	nodes (a new road, a building blocking some tiles, ...) implicitly invalidates all paths
+	that were found on the old state. Temporarily blocked coords (e.g. other units) are part
+	of the key as well: they can change the path even if none of its steps is blocked (e.g. a
+	detour around a ship that has left since), and the cache isn't saved, so the found paths
+	must not depend on what is in the cache.
+
+	Only paths on NodeGrids are cached, since other node collections have no version.
+	"""
+	log = logging.getLogger("world.pathfinding")
+
+	DEFAULT_SIZE = 512
+
+	def __init__(self, size=DEFAULT_SIZE):
+		self.size = size
+		self._paths = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	@classmethod
+	def get_key(cls, source, destination, path_nodes, blocked_coords, diagonal, make_target_walkable):
+		"""@return: hashable key for the search or None if it can't be cached"""
+		if not isinstance(path_nodes, NodeGrid):
+			return None
+		if hasattr(source, 'position'):
+			source = source.position
+		if hasattr(destination, 'position'):
+			destination = destination.position
+		# the class is part of the key because the shape defines the distance estimation
+		return (path_nodes.serial, path_nodes.version,
+		        source.__class__.__name__, tuple(source.tuple_iter()),
+		        destination.__class__.__name__, tuple(destination.tuple_iter()),
+		        frozenset(blocked_coords or ()), diagonal, make_target_walkable)
+
+	def find_path(self, find_path, source, destination, path_nodes, blocked_coords=None,
+	              diagonal=False, make_target_walkable=True):
+		"""Returns a cached path or calls find_path, which has to have the interface of FindPath.
+		@return: list of coords or None, see FindPath"""
+		key = self.get_key(source, destination, path_nodes, blocked_coords, diagonal, make_target_walkable)
+		if key is not None:
+			path = self.get(key)
+			if path is not None:
+				return path
+
+		path = find_path(source, destination, path_nodes, blocked_coords, diagonal,
+		                 make_target_walkable)
+		if key is not None and path is not None:
+			self.add(key, path)
+		return path
+
+	def get(self, key):
+		"""@return: copy of the cached path or None"""
+		path = self._paths.get(key)
+		if path is None:
+			self.misses += 1
+			return None
+		self._paths.move_to_end(key)
+		self.hits += 1
+		return list(path)
+
+	def add(self, key, path):
+		self._paths[key] = tuple(path)
+		self._paths.move_to_end(key)
+		while len(self._paths) > self.size:
+			self._paths.popitem(last=False)
+
+	def clear(self):
+		self._paths.clear()
+
+	def get_stats(self):
+		"""@return: dict with the counters of the cache, useful for tuning its size"""
+		lookups = self.hits + self.misses
+		return {
+			'size': len(self._paths),
+			'max_size': self.size,
+			'hits': self.hits,
+			'misses': self.misses,
+			'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+		}
+
+	def __len__(self):
+		return len(self._paths)
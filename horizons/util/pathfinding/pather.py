@@ -24,7 +24,8 @@ import weakref
 from typing import List, Tuple
 
 from horizons.util.pathfinding import PathBlockedError
-from horizons.util.pathfinding.pathfinding import FindPath
+from horizons.util.pathfinding.hierarchical import HierarchicalFindPath
+from horizons.util.pathfinding.pathfinding import GridFindPath
 from horizons.util.shapes import Point
 
 
@@ -68,6 +69,11 @@ class AbstractPather:
 		Return value type must be supported by FindPath"""
 		raise NotImplementedError
 
+	def _get_path_finder(self):
+		"""Returns the pathfinding algorithm to use.
+		Return value must support the interface of FindPath"""
+		return GridFindPath()
+
 	def _get_blocked_coords(self):
 		"""Returns blocked coordinates
 		Return value type must be supported by FindPath"""
@@ -105,11 +111,11 @@ class AbstractPather:
 		if source is None:
 			source = self._get_position()
 
-		# call algorithm
-		# to use a different pathfinding code, just change the following line
-		path = FindPath()(source, destination, self._get_path_nodes(),
-		                  self._get_blocked_coords(), self.move_diagonal,
-		                  self.make_target_walkable)
+		# call algorithm, paths that have been found before are reused
+		# to use a different pathfinding code, override _get_path_finder
+		path = self.session.world.path_cache.find_path(
+		    self._get_path_finder(), source, destination, self._get_path_nodes(),
+		    self._get_blocked_coords(), self.move_diagonal, self.make_target_walkable)
 
 		if path is None:
 			return False
@@ -219,6 +225,9 @@ class ShipPather(AbstractPather):
 	def _get_path_nodes(self):
 		return self.session.world.water
 
+	def _get_path_finder(self):
+		return HierarchicalFindPath(self.session.world.water_graph)
+
 	def _get_blocked_coords(self):
 		return self.session.world.ship_map
 
@@ -228,6 +237,10 @@ class FisherShipPather(ShipPather):
 	def _get_path_nodes(self):
 		return self.session.world.water_and_coastline
 
+	def _get_path_finder(self):
+		# fishers stay close to their home, no need for the hierarchical search
+		return GridFindPath()
+
 	def _get_blocked_coords(self):
 		# don't let fisher be blocked by other ships (#1023)
 		return []
@@ -293,4 +306,4 @@ class StaticPather:
 		@param island: island to search path on
 		@param source, destination: Point or anything supported by FindPath
 		@return: list of tuples or None in case no path is found"""
-		return FindPath()(source, destination, island.path_nodes.road_nodes)
+		return GridFindPath()(source, destination, island.path_nodes.road_nodes)
@@ -20,6 +20,10 @@
 # ###################################################
 
 import logging
+from collections.abc import Mapping
+from heapq import heappop, heappush
+
+from horizons.util.pathfinding.nodegrid import NodeGrid
 
 
 """
@@ -41,7 +45,7 @@ class FindPath:
 		"""
 		@param source: Rect, Point or BasicBuilding
 		@param destination: Rect, Point or BasicBuilding
-		@param path_nodes: dict { (x, y) = speed_on_coords }  or list [(x, y), ..]
+		@param path_nodes: dict-like { (x, y) = speed_on_coords }  or list [(x, y), ..]
 		@param blocked_coords: temporarily blocked coords (e.g. by a unit) as list or dict of tuples
 		@param diagonal: whether the unit is able to move diagonally
 		@param make_target_walkable: whether we force the tiles of the target to be walkable,
@@ -55,7 +59,7 @@ class FindPath:
 		#assert isinstance(source, (Rect, Point, BasicBuilding))
 		#assert isinstance(destination, (Rect, Point, BasicBuilding))
 		blocked_coords = blocked_coords or []
-		assert isinstance(path_nodes, (dict, list, set))
+		assert isinstance(path_nodes, (Mapping, list, set))
 		assert isinstance(blocked_coords, (dict, list, set))
 
 		# save args
@@ -87,7 +91,7 @@ class FindPath:
 		if hasattr(self.destination, 'position'):
 			self.destination = self.destination.position
 
-		if isinstance(self.path_nodes, list) or isinstance(self.path_nodes, set):
+		if isinstance(self.path_nodes, (list, set)):
 			self.path_nodes = dict.fromkeys(self.path_nodes, 1.0)
 
 		# check if target is blocked
@@ -149,7 +153,6 @@ class FindPath:
 		if not dest_coords_set:
 			return None
 
-		from heapq import heappush, heappop
 		heap = []
 		for coords, data in to_check.items():
 			heappush(heap, (data[2], coords))
@@ -246,3 +249,112 @@ class FindPath:
 
 		else:
 			return None
+
+
+class GridFindPath(FindPath):
+	"""A* on the dense grid of a NodeGrid.
+
+	This has the same interface and returns exactly the same paths as FindPath, but keeps
+	all search data in the reusable, generation-stamped buffers of the grid instead of
+	creating new dicts and tuples for every search.
+	Path nodes that aren't a NodeGrid (or searches that leave the grid) are handled by FindPath.
+	"""
+
+	def execute(self):
+		path_nodes = self.path_nodes
+		if not isinstance(path_nodes, NodeGrid) or path_nodes.outside_nodes:
+			return super().execute()
+
+		get_index = path_nodes.get_index
+		source_coords = self.source.get_coordinates()
+		source_indices = [get_index(coords) for coords in source_coords]
+		dest_indices = [get_index(coords) for coords in self.destination.tuple_iter()]
+		if None in source_indices or None in dest_indices:
+			# the search could leave the grid, which only the generic implementation supports
+			return super().execute()
+
+		state = path_nodes.get_search_state()
+		generation = state.next_generation()
+		seen = state.seen
+		target = state.target
+		passable = state.passable
+		blocked = state.blocked
+		previous = state.previous
+		distance = state.distance
+		walkable = path_nodes.walkable
+		speed = path_nodes.speed
+		height = path_nodes.height
+		left = path_nodes.left
+		top = path_nodes.top
+
+		if not self.make_target_walkable:
+			# restrict destination coords to walkable tiles, by default they are counted as walkable
+			dest_indices = [index for index in dest_indices if walkable[index]]
+		if not dest_indices:
+			return None
+
+		# source and destination cells may always be entered
+		for index in source_indices:
+			passable[index] = generation
+		for index in dest_indices:
+			passable[index] = generation
+			target[index] = generation
+
+		for coords in self.blocked_coords:
+			index = get_index(coords)
+			if index is not None:
+				blocked[index] = generation
+
+		destination = self.destination
+		distance_func = destination.get_distance_function((0, 0))
+
+		# cell indices are ordered like coordinate tuples, so using them in the heap
+		# breaks ties the same way FindPath does
+		heap = []
+		for index, coords in zip(source_indices, source_coords):
+			seen[index] = generation
+			previous[index] = -1
+			distance[index] = 0
+			heappush(heap, (distance_func(destination, coords), index))
+
+		if self.diagonal:
+			moves = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+		else:
+			moves = ((-1, 0), (1, 0), (0, -1), (0, 1))
+		moves = tuple((dx * height + dy, dx, dy) for dx, dy in moves)
+		max_x = path_nodes.width - 1
+		max_y = height - 1
+
+		while heap:
+			cur = heappop(heap)[1]
+			if target[cur] == generation:
+				# we're done, follow the previous cells back to a source
+				path = []
+				while cur != -1:
+					path.append((cur // height + left, cur % height + top))
+					cur = previous[cur]
+				path.reverse()
+				return path
+
+			dist_to_here = distance[cur] + speed[cur]
+			x, y = divmod(cur, height)
+			# only cells at the edge of the grid need bounds checks for their neighbors
+			on_edge = x == 0 or y == 0 or x == max_x or y == max_y
+			for offset, dx, dy in moves:
+				if on_edge and not (0 <= x + dx <= max_x and 0 <= y + dy <= max_y):
+					continue
+				neighbor = cur + offset
+				if seen[neighbor] == generation:
+					# NOTE: like FindPath, nodes that are already known are never updated
+					continue
+				if not walkable[neighbor] and passable[neighbor] != generation:
+					continue
+				if blocked[neighbor] == generation:
+					continue
+				seen[neighbor] = generation
+				previous[neighbor] = cur
+				distance[neighbor] = dist_to_here
+				neighbor_coords = (x + dx + left, y + dy + top)
+				heappush(heap, (distance_func(destination, neighbor_coords) + dist_to_here, neighbor))
+
+		return None
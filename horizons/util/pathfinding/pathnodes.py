@@ -21,6 +21,9 @@
 
 import logging
 
+from horizons.util.pathfinding.nodegrid import NodeGrid
+from horizons.util.shapes import Rect
+
 
 class PathNodes:
 	"""
@@ -46,7 +49,10 @@ class ConsumerBuildingPathNodes(PathNodes):
 	def __init__(self, consumerbuilding):
 		super().__init__()
 		ground_map = consumerbuilding.island.ground_map
-		self.nodes = {}
+		position = consumerbuilding.position
+		radius = consumerbuilding.radius
+		self.nodes = NodeGrid(Rect.init_from_borders(position.left - radius, position.top - radius,
+		                                             position.right + radius, position.bottom + radius))
 		for coords in consumerbuilding.position.get_radius_coordinates(consumerbuilding.radius, include_self=False):
 			if coords in ground_map and 'coastline' not in ground_map[coords].classes:
 				self.nodes[coords] = self.NODE_DEFAULT_SPEED
@@ -71,13 +77,13 @@ class IslandPathNodes(PathNodes):
 		# generate list of walkable tiles
 		# we keep this up to date, so that path finding can use it and we don't have
 		# to calculate it every time (rather expensive!).
-		self.nodes = {}
+		self.nodes = NodeGrid(island.position)
 		for coord in self.island:
 			if self.is_walkable(coord):
 				self.nodes[coord] = self.NODE_DEFAULT_SPEED
 
 		# nodes where a real road is built on.
-		self.road_nodes = {}
+		self.road_nodes = NodeGrid(island.position)
 
 	def register_road(self, road):
 		for i in road.position:
@@ -97,18 +103,20 @@ class IslandPathNodes(PathNodes):
 		      walls against enemies)
 		@param coord: tuple: (x, y)
 		"""
-		tile_object = self.island.get_tile_tuple(coord)
+		ground_map = self.island.ground_map
+		tile_class = ground_map.get_tile_class(coord)
 
-		if tile_object is None:
+		if tile_class is None:
 			# tile is water
 			return False
 
 		# if it's not constructable, it is usually also not walkable
 		# NOTE: this isn't really a clean implementation, but it works for now
 		# it eliminates e.g. water and beaches, that shouldn't be walked on
-		if "constructible" not in tile_object.classes:
+		if "constructible" not in tile_class.classes:
 			return False
-		if tile_object.blocked and not tile_object.object.walkable:
+		tile_object = ground_map.get_instance(coord) # None if nothing was ever built there
+		if tile_object is not None and tile_object.blocked and not tile_object.object.walkable:
 			return False
 		# every test is passed, tile is walkable
 		return True
@@ -20,10 +20,12 @@
 # ###################################################
 
 import hashlib
+import logging
 import os
 import os.path
+import re
 import tempfile
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 
 from horizons.constants import MAP, PATHS
 from horizons.savegamemanager import SavegameManager
@@ -43,10 +45,22 @@ class SavegameAccessor(DbReader):
 	"""
 	SavegameAccessor is the class used for loading saved games.
 
-	Frequent select queries are preloaded for faster access.
+	Frequent select queries are preloaded for faster access: the tables that are read for
+	every single object are read with one query each and kept in dicts keyed by the worldid
+	of the object (or of its owner), the get_* methods look the rows up there.
+
+	Every query is counted per table it reads from or writes to (see get_query_counts),
+	which shows which tables are still queried per object while loading.
 	"""
 
+	log = logging.getLogger("util.savegameaccessor")
+
+	# table names following FROM, JOIN, INTO or UPDATE
+	_table_regexp = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+"?(\w+)"?', re.IGNORECASE)
+
 	def __init__(self, game_identifier, is_map, options=None):
+		self.query_counts = Counter() # { table: number of queries }
+		self._query_tables = {} # { command: tables of the command }
 		is_random_map = False
 		if is_map:
 			self.upgrader = None
@@ -114,20 +128,39 @@ class SavegameAccessor(DbReader):
 
 		self._load_building()
 		self._load_settlement()
+		self._load_name()
+		self._load_remaining_ticks_of_month()
 		self._load_concrete_object()
 		self._load_production()
 		self._load_storage()
 		self._load_wildanimal()
 		self._load_unit()
+		self._load_collector()
 		self._load_building_collector()
 		self._load_production_line()
 		self._load_unit_path()
 		self._load_storage_global_limit()
 		self._load_health()
 		self._load_fish_data()
+		self._load_ai_single_resource_manager()
 		self._hash = None
 
+	def __call__(self, command, *args):
+		tables = self._query_tables.get(command)
+		if tables is None:
+			tables = self._query_tables[command] = set(self._table_regexp.findall(command))
+		for table in tables:
+			self.query_counts[table] += 1
+		return super().__call__(command, *args)
+
+	def get_query_counts(self):
+		"""Returns [(table, number of queries)] of all queries so far, most queried first"""
+		return self.query_counts.most_common()
+
 	def close(self):
+		if self.query_counts:
+			self.log.debug("Issued %d queries: %s", sum(self.query_counts.values()),
+			               ', '.join('{} {}'.format(*item) for item in self.get_query_counts()))
 		super().close()
 		if self.upgrader is not None:
 			self.upgrader.close()
@@ -138,8 +171,10 @@ class SavegameAccessor(DbReader):
 
 	def _load_building(self):
 		self._building = {}
-		for row in self("SELECT rowid, x, y, location, rotation, level FROM building"):
-			self._building[int(row[0])] = row[1:]
+		self._buildings_by_location = defaultdict(list)
+		for row in self("SELECT rowid, x, y, location, rotation, level, type FROM building"):
+			self._building[int(row[0])] = row[1:6]
+			self._buildings_by_location[int(row[3])].append((row[0], row[6]))
 
 	def get_building_row(self, worldid):
 		"""Returns (x, y, location, rotation, level)"""
@@ -148,10 +183,16 @@ class SavegameAccessor(DbReader):
 	def get_building_location(self, worldid):
 		return self._building[int(worldid)][2]
 
+	def get_buildings_by_location(self, location):
+		"""Returns potentially empty list of (worldid, type) of the buildings at the location"""
+		return self._buildings_by_location.get(int(location), [])
+
 	def _load_settlement(self):
 		self._settlement = {}
+		self._settlements_by_island = defaultdict(list)
 		for row in self("SELECT rowid, owner, island FROM settlement"):
 			self._settlement[int(row[0])] = row[1:]
+			self._settlements_by_island[int(row[2])].append(row[0])
 
 	def get_settlement_owner(self, worldid):
 		"""Returns the id of the owner of the settlement or None otherwise"""
@@ -160,6 +201,27 @@ class SavegameAccessor(DbReader):
 	def get_settlement_island(self, worldid):
 		return self._settlement[int(worldid)][1]
 
+	def get_settlements_by_island(self, island):
+		"""Returns potentially empty list of worldids of the settlements on the island"""
+		return self._settlements_by_island.get(int(island), [])
+
+	def _load_name(self):
+		self._name = {}
+		for row in self("SELECT rowid, name FROM name"):
+			self._name[int(row[0])] = row[1]
+
+	def get_name(self, worldid):
+		return self._name[int(worldid)]
+
+	def _load_remaining_ticks_of_month(self):
+		self._remaining_ticks_of_month = {}
+		for row in self("SELECT rowid, ticks FROM remaining_ticks_of_month"):
+			self._remaining_ticks_of_month[int(row[0])] = row[1]
+
+	def get_remaining_ticks_of_month(self, worldid):
+		"""Returns the ticks until the next month of the object or None if they weren't saved"""
+		return self._remaining_ticks_of_month.get(int(worldid))
+
 	def _load_concrete_object(self):
 		self._concrete_object = {}
 		for row in self("SELECT id, action_runtime, action_set_id FROM concrete_object"):
@@ -234,12 +296,33 @@ class SavegameAccessor(DbReader):
 
 	def _load_unit(self):
 		self._unit = {}
-		for row in self("SELECT rowid, owner FROM unit"):
-			self._unit[int(row[0])] = int(row[1])
+		for row in self("SELECT rowid, x, y, owner FROM unit"):
+			self._unit[int(row[0])] = (row[1], row[2], int(row[3]))
 
-	def get_unit_owner(self, worldid):
+	def get_unit_row(self, worldid):
+		"""Returns (x, y, owner)"""
 		return self._unit[int(worldid)]
 
+	def get_unit_owner(self, worldid):
+		return self._unit[int(worldid)][2]
+
+	def _load_collector(self):
+		self._collector = {}
+		for row in self("SELECT rowid, state, remaining_ticks, start_hidden FROM collector"):
+			self._collector[int(row[0])] = row[1:]
+
+		self._collector_job = defaultdict(list)
+		for row in self("SELECT collector, object, resource, amount FROM collector_job"):
+			self._collector_job[int(row[0])].append(row[1:])
+
+	def get_collector_row(self, worldid):
+		"""Returns (state, remaining_ticks, start_hidden)"""
+		return self._collector[int(worldid)]
+
+	def get_collector_job_rows(self, worldid):
+		"""Returns potentially empty list of (object, resource, amount) of the collector's job"""
+		return self._collector_job.get(int(worldid), [])
+
 	def _load_building_collector(self):
 		self._building_collector = {}
 		for row in self("SELECT rowid, home_building, creation_tick FROM building_collector"):
@@ -300,6 +383,23 @@ class SavegameAccessor(DbReader):
 	def get_last_fish_usage_tick(self, worldid):
 		return self._fish_data[worldid]
 
+	def _load_ai_single_resource_manager(self):
+		self._ai_single_resource_manager = {}
+		for row in self("SELECT rowid, resource_id, building_id, low_priority, available, total FROM ai_single_resource_manager"):
+			self._ai_single_resource_manager[int(row[0])] = row[1:]
+
+		self._ai_single_resource_manager_quota = defaultdict(list)
+		for row in self("SELECT single_resource_manager, identifier, quota, priority FROM ai_single_resource_manager_quota"):
+			self._ai_single_resource_manager_quota[int(row[0])].append(row[1:])
+
+	def get_ai_single_resource_manager_row(self, worldid):
+		"""Returns (resource_id, building_id, low_priority, available, total)"""
+		return self._ai_single_resource_manager[int(worldid)]
+
+	def get_ai_single_resource_manager_quotas(self, worldid):
+		"""Returns potentially empty list of (identifier, quota, priority)"""
+		return self._ai_single_resource_manager_quota.get(int(worldid), [])
+
 	# Random savegamefile related utility that i didn't know where to put
 
 	@classmethod
@@ -0,0 +1,142 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import math
+from itertools import count
+
+
+class SpatialHash:
+	"""
+	Uniform grid of objects with a `position` Point, for range queries on moving units.
+
+	Every object is stored in the bucket of the cell that contains its position, so a query
+	only has to look at the objects of the cells that overlap the queried circle. The owner
+	of the objects has to call move() whenever the position of an object changes.
+
+	Query results are ordered by the time the objects were added, which makes them
+	independent of the layout of the grid (e.g. the same order as a list of the objects
+	that is appended to when an object is added).
+	"""
+
+	def __init__(self, cell_size=8):
+		"""
+		@param cell_size: int, width and height of a cell in tiles
+		"""
+		self.cell_size = cell_size
+		self._cells = {} # { (cell x, cell y): { obj: sequence number } }
+		self._entries = {} # { obj: (sequence number, cell) }
+		self._sequence = count()
+
+	def _get_cell(self, position):
+		return (position.x // self.cell_size, position.y // self.cell_size)
+
+	def add(self, obj, position):
+		"""Starts tracking obj, which is at position."""
+		assert obj not in self._entries
+		cell = self._get_cell(position)
+		sequence = next(self._sequence)
+		self._entries[obj] = (sequence, cell)
+		self._cells.setdefault(cell, {})[obj] = sequence
+
+	def remove(self, obj):
+		sequence, cell = self._entries.pop(obj)
+		bucket = self._cells[cell]
+		del bucket[obj]
+		if not bucket:
+			del self._cells[cell]
+
+	def move(self, obj, position):
+		"""Updates the cell of obj after it moved to position."""
+		sequence, old_cell = self._entries[obj]
+		cell = self._get_cell(position)
+		if cell == old_cell:
+			return
+		bucket = self._cells[old_cell]
+		del bucket[obj]
+		if not bucket:
+			del self._cells[old_cell]
+		self._entries[obj] = (sequence, cell)
+		self._cells.setdefault(cell, {})[obj] = sequence
+
+	def __contains__(self, obj):
+		return obj in self._entries
+
+	def __len__(self):
+		return len(self._entries)
+
+	def _get_candidates(self, center, radius):
+		"""Yields (sequence number, distance squared, obj) of all objects in the circle."""
+		size = self.cell_size
+		cx, cy = center.x, center.y
+		radius_sq = radius * radius
+		min_x = int(math.floor((cx - radius) / size))
+		max_x = int(math.floor((cx + radius) / size))
+		min_y = int(math.floor((cy - radius) / size))
+		max_y = int(math.floor((cy + radius) / size))
+		cells = self._cells
+		if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+			# the circle covers more cells than there are occupied ones
+			buckets = [bucket for (x, y), bucket in cells.items()
+			           if min_x <= x <= max_x and min_y <= y <= max_y]
+		else:
+			buckets = []
+			for x in range(min_x, max_x + 1):
+				for y in range(min_y, max_y + 1):
+					bucket = cells.get((x, y))
+					if bucket is not None:
+						buckets.append(bucket)
+
+		for bucket in buckets:
+			for obj, sequence in bucket.items():
+				position = obj.position
+				dx = position.x - cx
+				dy = position.y - cy
+				distance_sq = dx * dx + dy * dy
+				if distance_sq <= radius_sq:
+					yield (sequence, distance_sq, obj)
+
+	def get_in_circle(self, center, radius):
+		"""Returns all objects whose position is in Circle(center, radius).
+		@param center: Point
+		@param radius: int or float
+		@return: list of objects, in the order they were added
+		"""
+		candidates = sorted(self._get_candidates(center, radius), key=lambda entry: entry[0])
+		return [obj for _sequence, _distance_sq, obj in candidates]
+
+	def get_nearest(self, center, radius, condition=None):
+		"""Returns the object closest to center in Circle(center, radius).
+		Ties are resolved in favor of the object that was added first.
+		@param center: Point
+		@param radius: int or float
+		@param condition: optional function, only objects for which it returns True count
+		@return: object or None
+		"""
+		best = None
+		best_key = None
+		for sequence, distance_sq, obj in self._get_candidates(center, radius):
+			key = (distance_sq, sequence)
+			if best_key is not None and key >= best_key:
+				continue
+			if condition is not None and not condition(obj):
+				continue
+			best, best_key = obj, key
+		return best
@@ -0,0 +1,117 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+MASK = 2 ** 64 - 1
+
+
+def _mix(value):
+	"""Scrambles the bits of a 64 bit int (finalizer of splitmix64)."""
+	value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+	value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+	return value ^ (value >> 31)
+
+
+def _hash_entry(subsystem, values):
+	# hash() of numbers isn't randomized (unlike the one of strings), it is the same in
+	# every client. Other types must not be used here.
+	result = subsystem
+	for value in values:
+		result = _mix((result + hash(value) + 0x9E3779B97F4A7C15) & MASK)
+	return result
+
+
+class StateChecksum:
+	"""Checksum of the game state that is updated whenever the state changes.
+
+	Multiplayer games compare the state of all clients every few ticks to find out whether
+	they have run out of sync. Instead of collecting the state each time, the places that
+	change it (storages, islands, moving objects) update this checksum right away.
+
+	The state is a set of entries per subsystem, e.g. (building id, x, y) for every building.
+	The hash of a subsystem is the sum of the hashes of its entries modulo 2**64, so adding
+	and removing an entry is cheap and the order of the changes doesn't matter: the same
+	state always has the same hash.
+
+	Only one checksum is active at a time (`current`), and only in multiplayer games.
+	Otherwise `current` is None, which the callers check before doing anything.
+	"""
+
+	SUBSYSTEMS = ('storage', 'buildings', 'units')
+	STORAGE, BUILDINGS, UNITS = range(len(SUBSYSTEMS))
+
+	current = None # type: StateChecksum
+
+	def __init__(self):
+		self.hashes = [0] * len(self.SUBSYSTEMS)
+
+	@classmethod
+	def start(cls):
+		"""Makes a new, empty checksum the active one and returns it."""
+		cls.current = cls()
+		return cls.current
+
+	@classmethod
+	def stop(cls):
+		cls.current = None
+
+	def add(self, subsystem, *values):
+		"""Adds the entry `values` to a subsystem.
+		@param subsystem: one of STORAGE, BUILDINGS, UNITS
+		@param values: numbers describing the entry"""
+		self.hashes[subsystem] = (self.hashes[subsystem] + _hash_entry(subsystem, values)) & MASK
+
+	def remove(self, subsystem, *values):
+		"""Removes an entry that has been added before."""
+		self.hashes[subsystem] = (self.hashes[subsystem] - _hash_entry(subsystem, values)) & MASK
+
+	def replace(self, subsystem, old, new):
+		"""Replaces the entry with the values `old` by the one with the values `new`."""
+		hashes = self.hashes
+		hashes[subsystem] = (hashes[subsystem] - _hash_entry(subsystem, old) +
+		                     _hash_entry(subsystem, new)) & MASK
+
+	def update_storage(self, res, old_amount, new_amount):
+		"""Called when the amount of res in a storage changes. Empty slots don't count."""
+		if old_amount == new_amount:
+			return
+		hashes = self.hashes
+		value = hashes[self.STORAGE]
+		if old_amount:
+			value -= _hash_entry(self.STORAGE, (res, old_amount))
+		if new_amount:
+			value += _hash_entry(self.STORAGE, (res, new_amount))
+		hashes[self.STORAGE] = value & MASK
+
+	def get_sub_hashes(self, rng_value):
+		"""Returns the hashes of the subsystems, which are compared when the digests differ.
+		@param rng_value: a number drawn from the game's rng, it represents the rng state
+		@return: dict { subsystem name: int }"""
+		sub_hashes = dict(zip(self.SUBSYSTEMS, self.hashes))
+		sub_hashes['rng'] = _hash_entry(len(self.SUBSYSTEMS), (rng_value, ))
+		return sub_hashes
+
+	@staticmethod
+	def get_digest(sub_hashes):
+		"""Combines sub hashes to a single 64 bit int, this is sent to the other players."""
+		digest = 0
+		for name in sorted(sub_hashes):
+			digest = _mix(digest ^ sub_hashes[name])
+		return digest
@@ -0,0 +1,264 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import csv
+import heapq
+import json
+from collections import deque
+from functools import partial
+from itertools import count
+from time import perf_counter
+
+from horizons.constants import GAME_SPEED
+from horizons.util.python.callback import Callback
+from horizons.world.ingametype import IngameType
+
+
+class TickProfiler:
+	"""Measures the wall time of the scheduler callbacks.
+
+	Install it with Scheduler().set_profiler(profiler); without a profiler, the scheduler
+	calls the callbacks directly. Callbacks are grouped by the class of the instance they
+	were scheduled for and by the name of the called function.
+
+	The profiler keeps
+	- totals for the whole run,
+	- the totals of the last `max_windows` windows of `window_size` ticks each,
+	- the `max_longest` slowest single callbacks.
+	"""
+
+	CSV_FIELDS = ('owner', 'method', 'subsystem', 'calls', 'time', 'mean_time', 'max_time')
+
+	def __init__(self, scheduler, window_size=GAME_SPEED.TICKS_PER_SECOND, max_windows=60,
+	             max_longest=20):
+		"""
+		@param scheduler: the Scheduler whose callbacks are measured, used to get the tick
+		@param window_size: number of ticks of a window
+		@param max_windows: number of finished windows that are kept for get_summary
+		@param max_longest: number of slowest callbacks that are kept
+		"""
+		self.scheduler = scheduler
+		self.window_size = window_size
+		self.max_longest = max_longest
+		self.totals = {} # { (owner, method, subsystem): [calls, time, max_time] }
+		self.windows = deque(maxlen=max_windows) # finished windows, see _new_window
+		self.longest = [] # min-heap of (time, nr, tick, owner, method)
+		self._window = None
+		self._first_tick = None
+		self._last_tick = None
+		self._keys = {} # { (class, function name): key in totals }
+		self._counter = count()
+
+	def run_callback(self, callback_obj):
+		start = perf_counter()
+		try:
+			callback_obj.callback()
+		finally:
+			duration = perf_counter() - start
+			self._add(callback_obj, duration)
+
+	def _add(self, callback_obj, duration):
+		tick = self.scheduler.cur_tick
+		if self._first_tick is None:
+			self._first_tick = tick
+		self._last_tick = tick
+
+		window = self._window
+		if window is None or tick >= window['first_tick'] + self.window_size:
+			if window is not None:
+				self.windows.append(window)
+			window = self._window = self._new_window(tick)
+
+		key = self._get_key(callback_obj)
+		entry = self.totals.get(key)
+		if entry is None:
+			entry = self.totals[key] = [0, 0.0, 0.0]
+		entry[0] += 1
+		entry[1] += duration
+		if duration > entry[2]:
+			entry[2] = duration
+
+		window['calls'] += 1
+		window['time'] += duration
+		owners = window['owners']
+		owners[key[0]] = owners.get(key[0], 0.0) + duration
+
+		longest = self.longest
+		if len(longest) < self.max_longest:
+			heapq.heappush(longest, (duration, next(self._counter), tick, key[0], key[1]))
+		elif duration > longest[0][0]:
+			heapq.heapreplace(longest, (duration, next(self._counter), tick, key[0], key[1]))
+
+	def _new_window(self, tick):
+		first_tick = tick - tick % self.window_size
+		return {'first_tick': first_tick, 'calls': 0, 'time': 0.0, 'owners': {}}
+
+	def _get_key(self, callback_obj):
+		function = callback_obj.callback
+		# unwrap the usual wrappers to get to the function that does the work
+		while True:
+			if isinstance(function, Callback):
+				function = function.callback
+			elif isinstance(function, partial):
+				function = function.func
+			else:
+				break
+		function_name = getattr(function, '__name__', function.__class__.__name__)
+
+		instance = callback_obj.class_instance
+		cls = instance if isinstance(instance, type) else instance.__class__
+		key = self._keys.get((cls, function_name))
+		if key is None:
+			owner, subsystem = self.get_owner_info(cls)
+			key = self._keys[(cls, function_name)] = (owner, function_name, subsystem)
+		return key
+
+	@staticmethod
+	def get_owner_info(cls):
+		"""Returns the name and the subsystem of the class that owns callbacks.
+
+		The subsystem is the module of the class, shortened to two levels below horizons,
+		e.g. 'ai.aiplayer' or 'world.production'.
+		@return: tuple (name, subsystem)
+		"""
+		if isinstance(cls, IngameType):
+			# building and unit types are created at runtime, use the class they are based on
+			cls = cls.__bases__[0]
+		parts = cls.__module__.split('.')
+		if parts[0] == 'horizons':
+			parts = parts[1:]
+		return (cls.__name__, '.'.join(parts[:2]) or cls.__module__)
+
+	def get_ticks(self):
+		"""@return: number of ticks between the first and the last measured callback"""
+		if self._first_tick is None:
+			return 0
+		return self._last_tick - self._first_tick + 1
+
+	def get_callback_data(self):
+		"""@return: list of dicts with the totals per owner and method, slowest first"""
+		data = []
+		for (owner, method, subsystem), (calls, time, max_time) in self.totals.items():
+			data.append({
+				'owner': owner,
+				'method': method,
+				'subsystem': subsystem,
+				'calls': calls,
+				'time': time,
+				'mean_time': time / calls,
+				'max_time': max_time,
+			})
+		data.sort(key=lambda entry: (-entry['time'], entry['owner'], entry['method']))
+		return data
+
+	def get_owner_data(self):
+		"""@return: dict { owner: {'calls': int, 'time': float} }"""
+		return self._group(0)
+
+	def get_subsystem_data(self):
+		"""@return: dict { subsystem: {'calls': int, 'time': float} }"""
+		return self._group(2)
+
+	def _group(self, index):
+		groups = {}
+		for key, (calls, time, _max_time) in self.totals.items():
+			group = groups.get(key[index])
+			if group is None:
+				group = groups[key[index]] = {'calls': 0, 'time': 0.0}
+			group['calls'] += calls
+			group['time'] += time
+		return groups
+
+	def get_longest_callbacks(self):
+		"""@return: list of dicts describing the slowest single callbacks, slowest first"""
+		return [
+			{'time': time, 'tick': tick, 'owner': owner, 'method': method}
+			for time, _nr, tick, owner, method in sorted(self.longest, reverse=True)
+		]
+
+	def get_summary(self, windows=None, top=5):
+		"""Returns a summary of the most recent windows, e.g. for a debug overlay.
+
+		@param windows: number of recent windows to include, all kept windows if None
+		@param top: number of owners to list
+		@return: dict with the average time per tick and the owners that took most time
+		"""
+		recent = list(self.windows)
+		if self._window is not None:
+			recent.append(self._window)
+		if windows is not None:
+			recent = recent[-windows:]
+
+		owners = {}
+		time = 0.0
+		calls = 0
+		for window in recent:
+			time += window['time']
+			calls += window['calls']
+			for owner, owner_time in window['owners'].items():
+				owners[owner] = owners.get(owner, 0.0) + owner_time
+		ticks = len(recent) * self.window_size
+		top_owners = sorted(owners.items(), key=lambda item: (-item[1], item[0]))[:top]
+		return {
+			'first_tick': recent[0]['first_tick'] if recent else None,
+			'ticks': ticks,
+			'calls': calls,
+			'time': time,
+			'time_per_tick': time / ticks if ticks else 0.0,
+			'top': [
+				{'owner': owner, 'time': owner_time, 'share': owner_time / time if time else 0.0}
+				for owner, owner_time in top_owners
+			],
+		}
+
+	def get_data(self):
+		"""@return: all results as dict that can be serialized to JSON"""
+		return {
+			'ticks': self.get_ticks(),
+			'window_size': self.window_size,
+			'time': sum(entry[1] for entry in self.totals.values()),
+			'callbacks': self.get_callback_data(),
+			'owners': self.get_owner_data(),
+			'subsystems': self.get_subsystem_data(),
+			'longest': self.get_longest_callbacks(),
+			'windows': [
+				{'first_tick': window['first_tick'], 'calls': window['calls'], 'time': window['time']}
+				for window in list(self.windows) + ([self._window] if self._window else [])
+			],
+		}
+
+	def export_json(self, f):
+		"""Writes get_data() as JSON to the file object f."""
+		json.dump(self.get_data(), f, indent=2, sort_keys=True)
+
+	def export_csv(self, f):
+		"""Writes the totals per owner and method as CSV to the file object f."""
+		writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS)
+		writer.writeheader()
+		writer.writerows(self.get_callback_data())
+
+	def export(self, filename):
+		"""Writes the results to filename, as CSV if it ends with .csv, as JSON otherwise."""
+		with open(filename, 'w', newline='') as f:
+			if filename.lower().endswith('.csv'):
+				self.export_csv(f)
+			else:
+				self.export_json(f)
@@ -19,10 +19,13 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import fnmatch
+import hashlib
 import logging
 import os
+import pickle
 import threading
-from typing import Optional
+from typing import Any, Dict, Optional
 
 import yaml
 
@@ -86,14 +89,24 @@ class YamlCache:
 	Threadsafe.
 
 	Use get_file for files to cache (default case) or load_yaml_data for special use cases (behaves like yaml.load).
+	Use get_directory to load all YAML files below a directory.
+
+	Cache entries are keyed by the file name and validated by modification time and size of
+	the file, so unchanged files are neither read nor parsed. If those don't match, a stable
+	digest of the content decides whether the file has to be parsed again.
+	The parsed (and converted, for game data) content is stored pickled and only unpickled
+	when it is accessed.
 	"""
 
 	cache = None # type: Optional[YamlCacheStorage]
 	cache_filename = os.path.join(PATHS.USER_DIR, 'yamldata.cache')
 
+	# { filename: data } for entries of the cache that have been unpickled already
+	_loaded_data = {} # type: Dict[str, Any]
+
 	sync_scheduled = False
 
-	lock = threading.Lock()
+	lock = threading.RLock()
 
 	log = logging.getLogger("yamlcache")
 
@@ -108,49 +121,103 @@ class YamlCache:
 		@param filename: path to the file
 		@param game_data: Whether this file contains data like BUILDINGS.LUMBERJACK to resolve
 		"""
-		with open(filename, 'r', encoding="utf-8") as f:
+		stat = os.stat(filename)
+		with cls.lock:
+			if cls.cache is None:
+				cls._open_cache()
+
+			entry = cls.cache[filename] if filename in cls.cache else None
+			if entry is not None and entry[1:4] == (stat.st_mtime_ns, stat.st_size, game_data):
+				return cls._get_data(filename)
+
+		with open(filename, 'rb') as f:
 			filedata = f.read()
+		digest = hashlib.sha1(filedata).hexdigest()
+
+		with cls.lock:
+			if entry is not None and entry[0] == digest and entry[3] == game_data:
+				# only touched, the content is still the same
+				cls.cache[filename] = (digest, stat.st_mtime_ns, stat.st_size, game_data, entry[4])
+				cls._schedule_sync()
+				return cls._get_data(filename)
+
+		data = cls.load_yaml_data(filedata.decode('utf-8'))
+		if game_data: # need to convert some values
+			try:
+				data = convert_game_data(data)
+			except Exception as e:
+				# add info about file
+				to_add = "\nThis error happened in {0!s} .".format(filename)
+				e.args = ( e.args[0] + to_add, ) + e.args[1:]
+				raise
+
+		with cls.lock:
+			pickled_data = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+			cls.cache[filename] = (digest, stat.st_mtime_ns, stat.st_size, game_data, pickled_data)
+			cls._loaded_data[filename] = data
+			cls._schedule_sync()
+
+		return data # returns an object from the YAML
+
+	@classmethod
+	def get_directory(cls, directory, game_data=False, pattern='*.yaml'):
+		"""Get contents of all yaml files below directory.
+		If none of the files has been added, removed or changed since the last call, all of
+		them are validated at once by one pass of stat calls.
+		@param directory: path of the directory, is searched recursively
+		@param game_data: see get_file
+		@param pattern: only files matching this pattern are loaded
+		@return: list of tuples (filename, data), sorted by filename
+		"""
+		signature = []
+		for root, dirnames, filenames in os.walk(directory):
+			for filename in fnmatch.filter(filenames, pattern):
+				# This is needed for dict lookups! Do not convert to os.join!
+				full_file = root + "/" + filename
+				stat = os.stat(full_file)
+				signature.append((full_file, stat.st_mtime_ns, stat.st_size))
+		signature.sort()
+		key = 'directory:{}:{}:{}'.format(directory, pattern, game_data)
+
+		with cls.lock:
+			if cls.cache is None:
+				cls._open_cache()
+			valid = key in cls.cache and cls.cache[key] == signature and all(
+			    full_file in cls.cache and cls.cache[full_file][3] == game_data
+			    for full_file, _, _ in signature)
+			if valid:
+				return [(full_file, cls._get_data(full_file)) for full_file, _, _ in signature]
+
+		result = [(full_file, cls.get_file(full_file, game_data=game_data))
+		          for full_file, _, _ in signature]
+		with cls.lock:
+			cls.cache[key] = signature
+			cls._schedule_sync()
+		return result
 
-		# calc the hash
-		h = hash(filedata)
-
-		# check for updates or new files
-		if cls.cache is None:
-			cls._open_cache()
-
-		yaml_file_in_cache = (filename in cls.cache and cls.cache[filename][0] == h)
-		if not yaml_file_in_cache:
-			data = cls.load_yaml_data(filedata)
-			if game_data: # need to convert some values
-				try:
-					data = convert_game_data(data)
-				except Exception as e:
-					# add info about file
-					to_add = "\nThis error happened in {0!s} .".format(filename)
-					e.args = ( e.args[0] + to_add, ) + e.args[1:]
-					e.message = ( e.message + to_add )
-					raise
-
-			cls.lock.acquire()
-			cls.cache[filename] = (h, data)
-			if not cls.sync_scheduled:
-				cls.sync_scheduled = True
-				from horizons.extscheduler import ExtScheduler
-				ExtScheduler().add_new_object(cls._do_sync, cls, run_in=1)
-			cls.lock.release()
-
-		return cls.cache[filename][1] # returns an object from the YAML
+	@classmethod
+	def _get_data(cls, filename):
+		"""Returns the data of a valid cache entry, unpickling it on first access."""
+		if filename not in cls._loaded_data:
+			cls._loaded_data[filename] = pickle.loads(cls.cache[filename][4])
+		return cls._loaded_data[filename]
+
+	@classmethod
+	def _schedule_sync(cls):
+		if not cls.sync_scheduled:
+			cls.sync_scheduled = True
+			from horizons.extscheduler import ExtScheduler
+			ExtScheduler().add_new_object(cls._do_sync, cls, run_in=1)
 
 	@classmethod
 	def _open_cache(cls):
-		cls.lock.acquire()
-		cls.cache = YamlCacheStorage.open(cls.cache_filename)
-		cls.lock.release()
+		with cls.lock:
+			cls.cache = YamlCacheStorage.open(cls.cache_filename)
+			cls._loaded_data = {}
 
 	@classmethod
 	def _do_sync(cls):
 		"""Only write to disc once in a while, it's too slow when done every time"""
-		cls.lock.acquire()
-		cls.sync_scheduled = False
-		cls.cache.sync()
-		cls.lock.release()
+		with cls.lock:
+			cls.sync_scheduled = False
+			cls.cache.sync()
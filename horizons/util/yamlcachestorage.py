@@ -20,6 +20,7 @@
 # ###################################################
 
 import logging
+import os
 import os.path
 import pickle
 
@@ -36,7 +37,7 @@ class YamlCacheStorage:
 	log = logging.getLogger("yamlcachestorage")
 
 	# Increment this when the users of this class change the way they use it.
-	version = 1
+	version = 2
 
 	def __init__(self, filename):
 		super().__init__() # TODO: check if this call is needed
@@ -90,9 +91,12 @@ class YamlCacheStorage:
 	def sync(self):
 		"""Write the file to disk if possible. Do nothing otherwise."""
 		try:
-			with open(self._filename, 'wb') as f:
-				pickle.dump((self.version, self._data), f)
-				self.log.debug('%s.sync(): success', self)
+			# write to a temporary file first, so an interrupted write can't corrupt the cache
+			tmp_filename = self._filename + '.tmp'
+			with open(tmp_filename, 'wb') as f:
+				pickle.dump((self.version, self._data), f, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(tmp_filename, self._filename)
+			self.log.debug('%s.sync(): success', self)
 		except Exception as e:
 			# Ignore all exceptions because saving the cache on disk is not critical.
 			self.log.warning("Warning: Unable to save cache into {0!s}: {1!s}".
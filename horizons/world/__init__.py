@@ -19,7 +19,6 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
-import copy
 import importlib
 import json
 import logging
@@ -36,19 +35,25 @@ from horizons.component.selectablecomponent import SelectableComponent
 from horizons.component.storagecomponent import StorageComponent
 from horizons.constants import BUILDINGS, GAME, GROUND, MAP, PATHS, RES, UNITS
 from horizons.entities import Entities
-from horizons.messaging import LoadingProgress
+from horizons.messaging import LoadingProgress, ZoomChanged
 from horizons.scheduler import Scheduler
 from horizons.util.buildingindexer import BuildingIndexer
 from horizons.util.color import Color
+from horizons.util.pathfinding.hierarchical import ClusterGraph
+from horizons.util.pathfinding.nodegrid import NodeGrid
+from horizons.util.pathfinding.pathcache import PathCache
 from horizons.util.savegameaccessor import SavegameAccessor
 from horizons.util.shapes import Circle, Point, Rect
+from horizons.util.spatialhash import SpatialHash
 from horizons.util.worldobject import WorldObject
 from horizons.world import worldutils
 from horizons.world.buildingowner import BuildingOwner
 from horizons.world.diplomacy import Diplomacy
 from horizons.world.disaster.disastermanager import DisasterManager
+from horizons.world.gridmap import GridMap, IslandMap
 from horizons.world.island import Island
 from horizons.world.player import HumanPlayer
+from horizons.world.tilemap import WaterTileMap, WorldTileMap
 from horizons.world.units.weapon import Weapon
 
 
@@ -66,7 +71,7 @@ class World(BuildingOwner, WorldObject):
 	   * ground_map - a dictionary that binds tuples of coordinates with a reference to the tile:
 	                  { (x, y): tileref, ...}
 	                 This is important for pathfinding and quick tile fetching.
-	   * island_map - a dictionary that binds tuples of coordinates with a reference to the island
+	   * island_map - a dict-like GridMap that binds tuples of coordinates with a reference to the island
 	   * ships - a list of all the ships ingame - horizons.world.units.ship.Ship instances
 	   * ship_map - same as ground_map, but for ships
 	   * session - reference to horizons.session.Session instance of the current game
@@ -94,15 +99,24 @@ class World(BuildingOwner, WorldObject):
 		# and having at least one reference to them
 		self.ships = []
 		self.ground_units = []
+		# the same units, indexed by position for range queries
+		self.ship_index = SpatialHash()
+		self.ground_unit_index = SpatialHash()
 
 		self.islands = []
 
+		# paths found by unit pathers, see PathCache
+		self.path_cache = PathCache()
+
 		super().__init__(worldid=GAME.WORLD_WORLDID)
 
 	def end(self):
 		# destructor-like thing.
 		super().end()
 
+		self.session.view.discard_change_listener(self._create_visible_tiles)
+		ZoomChanged.discard(self._on_zoom_changed)
+
 		# let the AI players know that the end is near to speed up destruction
 		for player in self.players:
 			if hasattr(player, 'early_end'):
@@ -124,10 +138,14 @@ class World(BuildingOwner, WorldObject):
 		self.full_map = None
 		self.island_map = None
 		self.water = None
+		self.water_graph = None
+		self.path_cache = None
 		self.ships = None
+		self.ship_index = None
 		self.ship_map = None
 		self.fish_indexer = None
 		self.ground_units = None
+		self.ground_unit_index = None
 
 		if self.pirate is not None:
 			self.pirate.end()
@@ -163,16 +181,24 @@ class World(BuildingOwner, WorldObject):
 		LoadingProgress.broadcast(self, 'world_load_map')
 		self.load_raw_map(savegame_db)
 
+		# the island tiles are created lazily, make sure the ones on the screen exist
+		self.session.view.add_change_listener(self._create_visible_tiles)
+		ZoomChanged.subscribe(self._on_zoom_changed)
+
 		# load world buildings (e.g. fish)
 		LoadingProgress.broadcast(self, 'world_load_buildings')
-		buildings = savegame_db("SELECT rowid, type FROM building WHERE location = ?", self.worldid)
+		buildings = savegame_db.get_buildings_by_location(self.worldid)
 		for (building_worldid, building_typeid) in buildings:
 			load_building(self.session, savegame_db, building_typeid, building_worldid)
 
-		# use a dict because it's directly supported by the pathfinding algo
+		# use a NodeGrid because it's directly supported by the pathfinding algo
 		LoadingProgress.broadcast(self, 'world_init_water')
-		self.water = {tile: 1.0 for tile in self.ground_map}
+		self.water = NodeGrid(self.map_dimensions)
+		for coords in self.ground_map:
+			self.water[coords] = 1.0
 		self._init_water_bodies()
+		# abstract graph for fast long distance ship pathfinding
+		self.water_graph = ClusterGraph(self.water)
 		self.sea_number = self.water_body[(self.min_x, self.min_y)]
 		for island in self.islands:
 			island.terrain_cache.create_sea_cache()
@@ -181,10 +207,12 @@ class World(BuildingOwner, WorldObject):
 		# NOTE: this is rather a temporary fix to make the fisher be able to move
 		# since there are tile between coastline and deep sea, all non-constructible tiles
 		# are added to this list as well, which will contain a few too many
-		self.water_and_coastline = copy.copy(self.water)
+		self.water_and_coastline = self.water.copy()
 		for island in self.islands:
-			for coord, tile in island.ground_map.items():
-				if 'coastline' in tile.classes or 'constructible' not in tile.classes:
+			ground_map = island.ground_map
+			for coord in ground_map:
+				classes = ground_map.get_tile_class(coord).classes
+				if 'coastline' in classes or 'constructible' not in classes:
 					self.water_and_coastline[coord] = 1.0
 		self._init_shallow_water_bodies()
 		self.shallow_sea_number = self.shallow_water_body[(self.min_x, self.min_y)]
@@ -279,7 +307,6 @@ class World(BuildingOwner, WorldObject):
 
 		# Add water.
 		self.log.debug("Filling world with water...")
-		self.ground_map = {}
 
 		# big sea water tile class
 		if not preview:
@@ -287,29 +314,39 @@ class World(BuildingOwner, WorldObject):
 
 		fake_tile_class = Entities.grounds['-1-special']
 		fake_tile_size = 10
-		for x in range(self.min_x - MAP.BORDER, self.max_x + MAP.BORDER, fake_tile_size):
-			for y in range(self.min_y - MAP.BORDER, self.max_y + MAP.BORDER, fake_tile_size):
-				fake_tile_x = x - 1
-				fake_tile_y = y + fake_tile_size - 1
-				if not preview:
+		if not preview:
+			for x in range(self.min_x - MAP.BORDER, self.max_x + MAP.BORDER, fake_tile_size):
+				for y in range(self.min_y - MAP.BORDER, self.max_y + MAP.BORDER, fake_tile_size):
 					# we don't need no references, we don't need no mem control
-					default_grounds(self.session, fake_tile_x, fake_tile_y)
-				for x_offset in range(fake_tile_size):
-					if self.min_x <= x + x_offset < self.max_x:
-						for y_offset in range(fake_tile_size):
-							if self.min_y <= y + y_offset < self.max_y:
-								self.ground_map[(x + x_offset, y + y_offset)] = fake_tile_class(self.session, fake_tile_x, fake_tile_y)
-		self.fake_tile_map = copy.copy(self.ground_map)
+					default_grounds(self.session, x - 1, y + fake_tile_size - 1)
+		# the placeholder tiles below the big water tiles are only created when they are needed
+		water_rect = Rect.init_from_borders(self.min_x, self.min_y, self.max_x - 1, self.max_y - 1)
+		self.fake_tile_map = WaterTileMap(self.session, water_rect, fake_tile_class,
+		                                  self.min_x - MAP.BORDER, self.min_y - MAP.BORDER, fake_tile_size)
 
 		# Remove parts that are occupied by islands, create the island map and the full map.
-		self.island_map = {}
-		self.full_map = copy.copy(self.ground_map)
+		self.ground_map = self.fake_tile_map.copy()
+		self.island_map = IslandMap(water_rect, self.islands)
 		for island in self.islands:
 			for coords in island.ground_map:
 				if coords in self.ground_map:
-					self.full_map[coords] = island.ground_map[coords]
 					del self.ground_map[coords]
 					self.island_map[coords] = island
+		self.full_map = WorldTileMap(self.fake_tile_map, self.island_map)
+
+	def _create_visible_tiles(self):
+		"""Create the island tiles around the displayed area, otherwise they aren't rendered."""
+		area = self.session.view.get_displayed_area()
+		# the displayed area is only a rough estimate of what is visible of the rotated map
+		margin = max(area.width, area.height)
+		area = Rect.init_from_borders(area.left - margin, area.top - margin,
+		                              area.right + margin, area.bottom + margin)
+		for island in self.islands:
+			if island.position.intersects(area):
+				island.ground_map.create_tiles(area)
+
+	def _on_zoom_changed(self, message):
+		self._create_visible_tiles()
 
 	def _load_players(self, savegame_db, force_player_id):
 		human_players = []
@@ -356,38 +393,40 @@ class World(BuildingOwner, WorldObject):
 			                 'are no or multiple candidates.')
 
 	@classmethod
-	def _recognize_water_bodies(cls, map_dict):
+	def _recognize_water_bodies(cls, nodes, bodies):
 		"""This function runs the flood fill algorithm on the water to make it easy
-		to recognize different water bodies."""
+		to recognize different water bodies.
+		@param nodes: the water tiles, e.g. a NodeGrid
+		@param bodies: empty GridMap, is filled with {(x, y): number of the water body}"""
 		moves = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
 
 		n = 0
-		for coords, num in map_dict.items():
-			if num is not None:
+		for coords in nodes:
+			if coords in bodies:
 				continue
 
-			map_dict[coords] = n
+			bodies[coords] = n
 			queue = deque([coords])
 			while queue:
 				x, y = queue.popleft()
 				for dx, dy in moves:
 					coords2 = (x + dx, y + dy)
-					if coords2 in map_dict and map_dict[coords2] is None:
-						map_dict[coords2] = n
+					if coords2 in nodes and coords2 not in bodies:
+						bodies[coords2] = n
 						queue.append(coords2)
 			n += 1
 
 	def _init_water_bodies(self):
 		"""This function runs the flood fill algorithm on the water to make it easy
 		to recognize different water bodies."""
-		self.water_body = dict.fromkeys(self.water)
-		self._recognize_water_bodies(self.water_body)
+		self.water_body = GridMap(self.map_dimensions)
+		self._recognize_water_bodies(self.water, self.water_body)
 
 	def _init_shallow_water_bodies(self):
 		"""This function runs the flood fill algorithm on the water and the coast to
 		make it easy to recognise different water bodies for fishers."""
-		self.shallow_water_body = dict.fromkeys(self.water_and_coastline)
-		self._recognize_water_bodies(self.shallow_water_body)
+		self.shallow_water_body = GridMap(self.map_dimensions)
+		self._recognize_water_bodies(self.water_and_coastline, self.shallow_water_body)
 
 	def init_fish_indexer(self):
 		radius = Entities.buildings[ BUILDINGS.FISHER ].radius
@@ -598,19 +637,26 @@ class World(BuildingOwner, WorldObject):
 		@return: List of ships.
 		"""
 		if position is not None and radius is not None:
-			circle = Circle(position, radius)
-			return [ship for ship in self.ships if circle.contains(ship.position)]
+			return self.ship_index.get_in_circle(position, radius)
 		else:
 			return self.ships
 
 	def get_ground_units(self, position=None, radius=None):
 		"""@see get_ships"""
 		if position is not None and radius is not None:
-			circle = Circle(position, radius)
-			return [unit for unit in self.ground_units if circle.contains(unit.position)]
+			return self.ground_unit_index.get_in_circle(position, radius)
 		else:
 			return self.ground_units
 
+	def get_nearest_ship(self, position, radius, condition=None):
+		"""Returns the ship closest to position within radius.
+		@param position: Point
+		@param radius: int radius to use.
+		@param condition: optional function, only ships for which it returns True are considered
+		@return: Ship or None
+		"""
+		return self.ship_index.get_nearest(position, radius, condition)
+
 	def get_buildings(self, position=None, radius=None):
 		"""@see get_ships"""
 		buildings = []
@@ -670,8 +716,8 @@ class World(BuildingOwner, WorldObject):
 		self.disaster_manager.save(db)
 
 	def get_checkup_hash(self):
-		"""Returns a collection of important game state values. Used to check if two mp games have diverged.
-		Not designed to be reliable."""
+		"""Returns a collection of important game state values. Used to check if two games have diverged.
+		Not designed to be reliable. Multiplayer games use the cheaper StateChecksum instead."""
 		# NOTE: don't include float values, they are represented differently in python 2.6 and 2.7
 		# and will differ at some insignificant place. Also make sure to handle them correctly in the game logic.
 		data = {
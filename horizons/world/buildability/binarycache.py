@@ -22,53 +22,6 @@
 from horizons.world.buildability.terraincache import TerrainBuildabilityCache
 
 
-class LazyBinaryBuildabilityCacheElement:
-	"""
-	Lazily computed cache element of a BinaryBuildabilityCache instance.
-
-	Instances of this class are used to make less frequently needed caches of the
-	BinaryBuildabilityCache class instances get computed lazily just when it is needed.
-	"""
-
-	def __init__(self, buildability_cache, width):
-		self._buildability_cache = buildability_cache
-		self._width = width
-		self._cache = None
-
-	def _init_size_cache(self):
-		if self._cache is not None:
-			return
-
-		r3x3 = self._buildability_cache.cache[(3, 3)]
-		offset = self._width - 3
-
-		usable = set()
-		for coords in r3x3:
-			x, y = coords
-			if (x + offset, y) in r3x3 and (x, y + offset) in r3x3 and (x + offset, y + offset) in r3x3:
-				usable.add(coords)
-
-		self._cache = usable
-		size = (self._width, self._width)
-		# Replace the reference to this instance with the actual cache
-		self._buildability_cache.cache[size] = usable
-
-	def __getattr__(self, name):
-		# required to make set methods such as set.intersect work
-		self._init_size_cache()
-		return getattr(self._cache, name)
-
-	def __contains__(self, key):
-		# required to make the syntax "coords in cache" work efficiently
-		self._init_size_cache()
-		return key in self._cache
-
-	def __iter__(self):
-		# required to make iteration work
-		self._init_size_cache()
-		return iter(self._cache)
-
-
 class BinaryBuildabilityCache:
 	"""
 	A cache that knows where rectangles can be placed such that they are entirely inside the area.
@@ -84,39 +37,34 @@ class BinaryBuildabilityCache:
 
 	All elements of instance.cache[(width, height)] can be iterated to get a complete list
 	of all such coordinates.
+
+	The area and the caches are BitGrids over the island's rectangle, so that a change of
+	the area only requires recomputing the affected columns with a few bitwise operations.
 	"""
 
 	def __init__(self, terrain_cache):
 		self.terrain_cache = terrain_cache
-		self.coords_set = set() # set((x, y), ...)
-		self._row2 = set()
+		self.coords_set = terrain_cache.land_or_coast.empty_copy() # BitGrid of (x, y)
 
-		self.cache = {} # {(width, height): set((x, y), ...), ...}
+		self.cache = {} # {(width, height): BitGrid of (x, y), ...}
 		self.cache[(1, 1)] = self.coords_set
 		for size in TerrainBuildabilityCache.sizes:
 			if size != (1, 1):
-				self.cache[size] = set()
+				self.cache[size] = self.coords_set.empty_copy()
 				if size[0] != size[1]:
-					self.cache[(size[1], size[0])] = set()
+					self.cache[(size[1], size[0])] = self.coords_set.empty_copy()
 
-	def _reset_lazy_sets(self):
-		self.cache[(4, 4)] = LazyBinaryBuildabilityCacheElement(self, 4)
-		self.cache[(6, 6)] = LazyBinaryBuildabilityCacheElement(self, 6)
-
-	@classmethod
-	def _extend_set(cls, cur_set, prev_set, prev_set_additions, dx, dy):
-		base_set_additions = set()
-		for coords in prev_set_additions:
-			x, y = coords
-			prev_coords = (x - dx, y - dy)
-			if prev_coords in prev_set:
-				cur_set.add(prev_coords)
-				base_set_additions.add(prev_coords)
-			next_coords = (x + dx, y + dy)
-			if next_coords not in prev_set_additions and next_coords in prev_set:
-				cur_set.add(coords)
-				base_set_additions.add(coords)
-		return base_set_additions
+	def _update_area(self, coords_list):
+		"""Recompute the rectangles that contain any of the given changed coordinates."""
+		if not coords_list:
+			return
+		coords_set = self.coords_set
+		first_x = min(x for x, _ in coords_list) - coords_set.left
+		last_x = max(x for x, _ in coords_list) - coords_set.left
+		for (width, height), size_set in self.cache.items():
+			if size_set is not coords_set:
+				# only rectangles starting in these columns can contain a changed coordinate
+				size_set.update_erosion(coords_set, width, height, first_x - width + 1, last_x)
 
 	def add_area(self, new_coords_list):
 		"""
@@ -132,36 +80,7 @@ class BinaryBuildabilityCache:
 			assert coords not in self.coords_set
 			assert coords in self.terrain_cache.land_or_coast
 			self.coords_set.add(coords)
-
-		coords_set = self.coords_set
-		new_coords_set = set(new_coords_list)
-
-		new_row2 = self._extend_set(self._row2, coords_set, new_coords_set, 1, 0)
-		new_r2x2 = self._extend_set(self.cache[(2, 2)], self._row2, new_row2, 0, 1)
-
-		new_r2x3 = self._extend_set(self.cache[(2, 3)], self.cache[(2, 2)], new_r2x2, 0, 1)
-		new_r2x4 = self._extend_set(self.cache[(2, 4)], self.cache[(2, 3)], new_r2x3, 0, 1)
-
-		new_r3x2 = self._extend_set(self.cache[(3, 2)], self.cache[(2, 2)], new_r2x2, 1, 0)
-		new_r4x2 = self._extend_set(self.cache[(4, 2)], self.cache[(3, 2)], new_r3x2, 1, 0)
-
-		self._extend_set(self.cache[(3, 3)], self.cache[(3, 2)], new_r3x2, 0, 1)
-		self._reset_lazy_sets()
-
-	@classmethod
-	def _reduce_set(cls, cur_set, prev_set_removals, dx, dy):
-		base_set_removals = set()
-		for coords in prev_set_removals:
-			x, y = coords
-			prev_coords = (x - dx, y - dy)
-			if prev_coords in cur_set:
-				cur_set.discard(prev_coords)
-				base_set_removals.add(prev_coords)
-			next_coords = (x + dx, y + dy)
-			if next_coords not in prev_set_removals and coords in cur_set:
-				cur_set.discard(coords)
-				base_set_removals.add(coords)
-		return base_set_removals
+		self._update_area(new_coords_list)
 
 	def remove_area(self, removed_coords_list):
 		"""Remove a list of existing coordinates from the area."""
@@ -169,16 +88,4 @@ class BinaryBuildabilityCache:
 			assert coords in self.coords_set
 			assert coords in self.terrain_cache.land_or_coast
 			self.coords_set.discard(coords)
-		removed_coords_set = set(removed_coords_list)
-
-		removed_row2 = self._reduce_set(self._row2, removed_coords_set, 1, 0)
-		removed_r2x2 = self._reduce_set(self.cache[(2, 2)], removed_row2, 0, 1)
-
-		removed_r2x3 = self._reduce_set(self.cache[(2, 3)], removed_r2x2, 0, 1)
-		removed_r2x4 = self._reduce_set(self.cache[(2, 4)], removed_r2x3, 0, 1)
-
-		removed_r3x2 = self._reduce_set(self.cache[(3, 2)], removed_r2x2, 1, 0)
-		removed_r4x2 = self._reduce_set(self.cache[(4, 2)], removed_r3x2, 1, 0)
-
-		self._reduce_set(self.cache[(3, 3)], removed_r3x2, 0, 1)
-		self._reset_lazy_sets()
+		self._update_area(removed_coords_list)
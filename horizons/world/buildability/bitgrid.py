@@ -0,0 +1,170 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+class BitGrid:
+	"""
+	Set of coordinates inside a fixed rectangle, stored as a dense bitmap.
+
+	Every column of the rectangle is one integer that is used as bitset: bit (y - top) of
+	column (x - left) is set if and only if (x, y) is in the set. Whole columns can be
+	combined with a single bitwise operation, which makes it cheap to find all positions
+	where a rectangle of some size fits entirely into the set (see erode).
+
+	Instances act like a set of (x, y) tuples for membership tests, iteration (in sorted
+	order), len, intersection and union, so they can be used in place of the sets the
+	buildability caches used to consist of.
+	"""
+
+	def __init__(self, left, top, width, height, columns=None):
+		self.left = left
+		self.top = top
+		self.width = width
+		self.height = height
+		self.columns = columns if columns is not None else [0] * width
+
+	@classmethod
+	def from_rect(cls, rect, coords_list=()):
+		"""Returns a grid covering the Rect rect that contains the coords of coords_list."""
+		grid = cls(rect.left, rect.top, rect.right - rect.left + 1, rect.bottom - rect.top + 1)
+		for coords in coords_list:
+			grid.add(coords)
+		return grid
+
+	def empty_copy(self):
+		"""Returns an empty grid that covers the same rectangle."""
+		return BitGrid(self.left, self.top, self.width, self.height)
+
+	def copy(self):
+		return BitGrid(self.left, self.top, self.width, self.height, list(self.columns))
+
+	def _same_area(self, other):
+		return isinstance(other, BitGrid) and self.left == other.left and self.top == other.top \
+		       and self.width == other.width and self.height == other.height
+
+	def add(self, coords):
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		assert 0 <= x < self.width and 0 <= y < self.height, \
+		       '{} is outside of the grid'.format(coords)
+		self.columns[x] |= 1 << y
+
+	def discard(self, coords):
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		if 0 <= x < self.width and 0 <= y < self.height:
+			self.columns[x] &= ~(1 << y)
+
+	def __contains__(self, coords):
+		x = coords[0] - self.left
+		if 0 <= x < self.width:
+			y = coords[1] - self.top
+			return y >= 0 and (self.columns[x] >> y) & 1 == 1
+		return False
+
+	def __iter__(self):
+		left = self.left
+		top = self.top
+		for x, column in enumerate(self.columns):
+			while column:
+				lowest_bit = column & -column
+				yield (left + x, top + lowest_bit.bit_length() - 1)
+				column ^= lowest_bit
+
+	def __len__(self):
+		return sum(bin(column).count('1') for column in self.columns)
+
+	def __bool__(self):
+		return any(self.columns)
+
+	def __eq__(self, other):
+		if self._same_area(other):
+			return self.columns == other.columns
+		if isinstance(other, (BitGrid, set, frozenset)):
+			return set(self) == set(other)
+		return NotImplemented
+
+	def __ne__(self, other):
+		result = self.__eq__(other)
+		return result if result is NotImplemented else not result
+
+	__hash__ = None # mutable
+
+	def intersection(self, *others):
+		"""Returns the coords that are in this and all other collections.
+		@return: BitGrid if all others are BitGrids of the same area, otherwise a set"""
+		columns = self.columns
+		rest = []
+		for other in others:
+			if self._same_area(other):
+				columns = [a & b for a, b in zip(columns, other.columns)]
+			elif isinstance(other, (BitGrid, set, frozenset, dict)):
+				rest.append(other)
+			else:
+				rest.append(set(other))
+
+		grid = BitGrid(self.left, self.top, self.width, self.height, list(columns))
+		if not rest:
+			return grid
+		return {coords for coords in grid if all(coords in other for other in rest)}
+
+	def union(self, *others):
+		"""Returns the coords that are in this or any other collection.
+		@return: BitGrid if all others are BitGrids of the same area, otherwise a set"""
+		if all(self._same_area(other) for other in others):
+			columns = list(self.columns)
+			for other in others:
+				columns = [a | b for a, b in zip(columns, other.columns)]
+			return BitGrid(self.left, self.top, self.width, self.height, columns)
+		return set(self).union(*others)
+
+	def difference(self, *others):
+		"""Returns the coords of this grid that are in none of the other BitGrids of the same area."""
+		columns = list(self.columns)
+		for other in others:
+			assert self._same_area(other)
+			columns = [a & ~b for a, b in zip(columns, other.columns)]
+		return BitGrid(self.left, self.top, self.width, self.height, columns)
+
+	def erode(self, width, height):
+		"""Returns the grid of all (x, y) such that the rectangle with the origin (x, y) and
+		the given size is entirely part of this grid."""
+		grid = self.empty_copy()
+		grid.update_erosion(self, width, height, 0, self.width - 1)
+		return grid
+
+	def update_erosion(self, source, width, height, first_x, last_x):
+		"""Recomputes the columns first_x to last_x (grid indices) of this grid as the
+		erosion of the grid source (of the same area) by a rectangle of the given size.
+		@see erode"""
+		source_columns = source.columns
+		columns = self.columns
+		for x in range(max(0, first_x), min(self.width - width, last_x) + 1):
+			column = source_columns[x]
+			for dx in range(1, width):
+				column &= source_columns[x + dx]
+			vertical = column
+			for dy in range(1, height):
+				column &= vertical >> dy
+			columns[x] = column
+		# the rectangles starting in the last width - 1 columns stick out of the grid
+		for x in range(max(0, first_x, self.width - width + 1), min(self.width - 1, last_x) + 1):
+			columns[x] = 0
@@ -22,6 +22,25 @@
 from collections import deque
 
 
+class _AreaNumbers:
+	"""Read-only {(x, y): area id} view of a ConnectedAreaCache."""
+
+	def __init__(self, cache):
+		self._cache = cache
+
+	def __contains__(self, coords):
+		return coords in self._cache
+
+	def __getitem__(self, coords):
+		return self._cache.get_area_id(coords)
+
+	def __iter__(self):
+		return iter(self._cache._labels)
+
+	def __len__(self):
+		return len(self._cache._labels)
+
+
 class ConnectedAreaCache:
 	"""
 	Query whether (x1, y1) and (x2, y2) are connected.
@@ -34,85 +53,191 @@ class ConnectedAreaCache:
 	connected area. It is only valid between updates of the cache (any addition/removal
 	may change the area id). Thus the ids should never be used for anything other than
 	(in)equality checks.
+
+	Internally every coordinate has a label and the labels form a union-find forest, so
+	adding coordinates only merges the sets of the neighboring areas. Removing coordinates
+	can split an area; unless a look at the 8 surrounding tiles proves that the area stays
+	connected, the area is marked as dirty and split up the next time one of its
+	coordinates is queried. That way all removals between two queries (usually everything
+	that happens in one tick) cost a single relabeling of the affected area.
+
+	tiles_touched counts the coordinates that were (re)labeled or moved between areas,
+	including the deferred splits.
 	"""
 
 	__moves = [(-1, 0), (0, -1), (0, 1), (1, 0)]
+	# the 8 surrounding tiles in clockwise order, consecutive ones are neighbors
+	__ring = [(-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0)]
 
 	def __init__(self):
-		self.area_numbers = {} # {(x, y): area id, ...}
-		self.areas = {} # {area id: set((x, y), ...), ...}
-		self._next_area_id = 1
-
-	def _label_area(self, seed_coords):
-		area_id = self._next_area_id
-		self._next_area_id += 1
-
-		area_numbers = self.area_numbers
-		area_numbers[seed_coords] = area_id
-		new_area = {seed_coords}
-		self.areas[area_id] = new_area
+		self._labels = {} # {(x, y): label, ...}
+		self._parent = {} # {label: parent label, ...}, roots are their own parents
+		self._members = {} # {root label: set((x, y), ...), ...}
+		self._dirty = set() # root labels of areas that may have to be split
+		self._next_label = 1
+		self.area_numbers = _AreaNumbers(self) # {(x, y): area id, ...}
+		self.tiles_touched = 0
+
+	def _new_label(self):
+		label = self._next_label
+		self._next_label += 1
+		self._parent[label] = label
+		return label
+
+	def _find(self, label):
+		parent = self._parent
+		while parent[label] != label:
+			parent[label] = parent[parent[label]]
+			label = parent[label]
+		return label
+
+	def _union(self, root1, root2):
+		"""Merge two areas, return the number of moved coordinates."""
+		members = self._members
+		if len(members[root1]) < len(members[root2]):
+			root1, root2 = root2, root1
+		moved = members.pop(root2)
+		members[root1].update(moved)
+		self._parent[root2] = root1
+		if root2 in self._dirty:
+			self._dirty.discard(root2)
+			self._dirty.add(root1)
+		return len(moved)
+
+	def _split(self, root):
+		"""Relabel the connected parts of the (dirty) area with the given root."""
+		self._dirty.discard(root)
+		remaining = self._members.pop(root)
+		labels = self._labels
+		parent = self._parent
+		for coords in remaining:
+			parent.pop(labels[coords], None)
+		parent.pop(root, None)
 
 		moves = self.__moves
-		queue = deque([seed_coords])
-		while queue:
-			(x, y) = queue.popleft()
-			for (dx, dy) in moves:
-				coords = (x + dx, y + dy)
-				if coords not in area_numbers:
-					continue
-				if area_numbers[coords] == area_id:
-					continue
-
-				area_numbers[coords] = area_id
-				new_area.add(coords)
-				queue.append(coords)
-
-	def _renumber_affected_areas(self, affected_areas):
-		for area_id in affected_areas:
-			for coords in self.areas[area_id]:
-				if self.area_numbers[coords] == area_id:
-					self._label_area(coords)
-					assert self.area_numbers[coords] != area_id
-			del self.areas[area_id]
+		unvisited = set(remaining)
+		for seed_coords in sorted(remaining):
+			if seed_coords not in unvisited:
+				continue
+			unvisited.discard(seed_coords)
+			label = self._new_label()
+			labels[seed_coords] = label
+			new_area = {seed_coords}
+			queue = deque([seed_coords])
+			while queue:
+				(x, y) = queue.popleft()
+				for (dx, dy) in moves:
+					coords = (x + dx, y + dy)
+					if coords in unvisited:
+						unvisited.discard(coords)
+						labels[coords] = label
+						new_area.add(coords)
+						queue.append(coords)
+			self._members[label] = new_area
+		self.tiles_touched += len(remaining)
+
+	def _compact(self):
+		"""Relabel everything to get rid of the labels of removed coordinates."""
+		roots = sorted(self._members)
+		self._parent = {}
+		for root in roots:
+			self._split(root)
+
+	def _may_split(self, x, y):
+		"""Return False if removing (x, y) (already done) can't have disconnected its area.
+
+		This is the case if the remaining neighbors of (x, y) are connected to each other
+		through the 8 tiles around (x, y).
+		"""
+		labels = self._labels
+		present = [(x + dx, y + dy) in labels for (dx, dy) in self.__ring]
+		if sum(present[1::2]) <= 1:
+			return False # at most one direct neighbor left
+		if all(present):
+			return False
+
+		# find the runs of present tiles on the ring, each run is connected
+		start = present.index(False)
+		runs_with_neighbors = 0
+		in_run = False
+		run_has_neighbor = False
+		for i in range(start + 1, start + 9):
+			index = i % 8
+			if present[index]:
+				in_run = True
+				if index % 2 == 1:
+					run_has_neighbor = True
+			elif in_run:
+				runs_with_neighbors += run_has_neighbor
+				in_run = False
+				run_has_neighbor = False
+		return runs_with_neighbors > 1
+
+	def __contains__(self, coords):
+		return coords in self._labels
+
+	def get_area_id(self, coords):
+		"""Return the id of the area (x, y) is in, splitting the area first if necessary."""
+		root = self._find(self._labels[coords])
+		if root in self._dirty:
+			self._split(root)
+			root = self._find(self._labels[coords])
+		return root
+
+	def is_connected(self, coords1, coords2):
+		"""Return True if and only if both coordinates are part of the same area."""
+		if coords1 not in self._labels or coords2 not in self._labels:
+			return False
+		return self.get_area_id(coords1) == self.get_area_id(coords2)
+
+	@property
+	def areas(self):
+		"""{area id: set((x, y), ...), ...} of all areas (resolves all pending splits)."""
+		for root in sorted(self._dirty):
+			self._split(root)
+		return self._members
 
 	def add_area(self, coords_list):
-		"""Add a list of new coordinates to the area."""
+		"""Add a list of new coordinates to the area.
+		@return: number of tiles whose label or area changed"""
+		labels = self._labels
+		members = self._members
 		moves = self.__moves
-		affected_areas = set()
+		touched = 0
 		for coords in coords_list:
-			assert coords not in self.area_numbers
-			nearby_areas = []
+			assert coords not in labels
+			root = self._new_label()
+			labels[coords] = root
+			members[root] = {coords}
+			touched += 1
 			for (dx, dy) in moves:
 				neighbor_coords = (coords[0] + dx, coords[1] + dy)
-				if neighbor_coords in self.area_numbers:
-					area_id = self.area_numbers[neighbor_coords]
-					if area_id not in nearby_areas:
-						nearby_areas.append(area_id)
-
-			if not nearby_areas:
-				# create a new area
-				area_id = self._next_area_id
-				self._next_area_id += 1
-				self.area_numbers[coords] = area_id
-				self.areas[area_id] = {coords}
-			else:
-				# add to one of the nearby areas
-				area_id = nearby_areas[0]
-				self.area_numbers[coords] = area_id
-				self.areas[area_id].add(coords)
-				if len(nearby_areas) > 1:
-					# more than one nearby area; merge them later on
-					for nearby_area_id in nearby_areas:
-						affected_areas.add(nearby_area_id)
-
-		self._renumber_affected_areas(affected_areas)
+				if neighbor_coords in labels:
+					neighbor_root = self._find(labels[neighbor_coords])
+					if neighbor_root != root:
+						touched += self._union(root, neighbor_root)
+						root = self._find(root)
+		self.tiles_touched += touched
+		return touched
 
 	def remove_area(self, coords_list):
-		"""Remove a list of existing coordinates from the area."""
-		affected_areas = set()
+		"""Remove a list of existing coordinates from the area.
+
+		Areas that may have been split are only relabeled when they are queried.
+		@return: number of tiles whose label or area changed so far"""
+		labels = self._labels
 		for coords in coords_list:
-			area_id = self.area_numbers[coords]
-			del self.area_numbers[coords]
-			affected_areas.add(area_id)
-			self.areas[area_id].discard(coords)
-		self._renumber_affected_areas(affected_areas)
+			root = self._find(labels.pop(coords))
+			area = self._members[root]
+			area.discard(coords)
+			if not area:
+				del self._members[root]
+				self._dirty.discard(root)
+			elif root not in self._dirty and self._may_split(*coords):
+				self._dirty.add(root)
+
+		touched = len(coords_list)
+		self.tiles_touched += touched
+		if len(self._parent) > 2 * len(labels) + 64:
+			self._compact()
+		return touched
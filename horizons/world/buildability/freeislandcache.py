@@ -44,10 +44,15 @@ class FreeIslandBuildabilityCache:
 
 	def _init(self):
 		land_or_coast = self._binary_cache.terrain_cache.land_or_coast
+		ground_map = self.island.ground_map
 		coords_list = []
-		for (coords, tile) in self.island.ground_map.items():
+		for coords in ground_map:
 			if coords not in land_or_coast:
 				continue
+			tile = ground_map.get_instance(coords)
+			if tile is None:
+				coords_list.append(coords) # the tile hasn't been used yet
+				continue
 			if tile.settlement is not None:
 				continue
 			if tile.object is not None and not tile.object.buildable_upon:
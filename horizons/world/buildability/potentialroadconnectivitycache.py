@@ -87,12 +87,13 @@ class PotentialRoadConnectivityCache:
 		the area. This is done cheaply using the underlying ConnectedAreaCache.
 		"""
 
+		cache = self._cache
 		areas1 = set()
 		for coords in coords_set1:
-			if coords in self.area_numbers:
-				areas1.add(self.area_numbers[coords])
+			if coords in cache:
+				areas1.add(cache.get_area_id(coords))
 		for coords in coords_set2:
-			if coords in self.area_numbers:
-				if self.area_numbers[coords] in areas1:
+			if coords in cache:
+				if cache.get_area_id(coords) in areas1:
 					return True
 		return False
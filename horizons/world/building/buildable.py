@@ -514,7 +514,7 @@ class BuildableSingleOnOcean(BuildableSingleOnCoast):
 				raise _NotBuildableError(BuildableErrorTypes.NO_ISLAND)
 		posis = position.get_coordinates()
 		for tile in posis:
-			for rad in Circle(Point(*tile), 3):
+			for rad in Circle(Point(*tile), 3).tuple_iter():
 				if rad in session.world.water_body and session.world.water_body[rad] == session.world.sea_number:
 					# Found legit see tile
 					return island
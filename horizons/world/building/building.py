@@ -146,16 +146,14 @@ class BasicBuilding(ComponentHolder, ConcreteObject):
 
 		remaining_ticks_of_month = None
 		if self.has_running_costs:
-			db_data = db("SELECT ticks FROM remaining_ticks_of_month WHERE rowid=?", worldid)
-			if not db_data:
+			remaining_ticks_of_month = db.get_remaining_ticks_of_month(worldid)
+			if remaining_ticks_of_month is None:
 				# this can happen when running costs are set when there were no before
 				# we shouldn't crash because of changes in yaml code, still it's suspicious
 				self.log.warning('Object %s of type %s does not know when to pay its rent.\n'
 					'Disregard this when loading old savegames or on running cost changes.',
 					self.worldid, self.id)
 				remaining_ticks_of_month = 1
-			else:
-				remaining_ticks_of_month = db_data[0][0]
 
 		self.__init(remaining_ticks_of_month=remaining_ticks_of_month)
 
@@ -0,0 +1,128 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from array import array
+from collections.abc import MutableMapping
+
+
+class GridMap(MutableMapping):
+	"""
+	Dict-like {(x, y): value} covering a fixed rectangle, stored in a flat array.
+
+	The values are non-negative integers (e.g. the number of a water body). The array holds
+	value + 1 for every coordinate, 0 meaning that there is no entry, so a map of the whole
+	world needs a few bytes per tile instead of a dict entry and a tuple per tile.
+
+	Like NodeGrid, the cell of (x, y) has the index (x - left) * height + (y - top), and
+	iteration yields the coordinates in this order.
+	"""
+
+	def __init__(self, rect, typecode='I'):
+		"""
+		@param rect: Rect that is covered by the map
+		@param typecode: array typecode, has to be big enough for the largest value + 1
+		"""
+		self.left = rect.left
+		self.top = rect.top
+		self.width = rect.right - rect.left + 1
+		self.height = rect.bottom - rect.top + 1
+		self._codes = array(typecode, [0]) * (self.width * self.height)
+		self._len = 0
+
+	def _get_index(self, coords):
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		if 0 <= x < self.width and 0 <= y < self.height:
+			return x * self.height + y
+		return -1
+
+	def _encode(self, value):
+		return value + 1
+
+	def _decode(self, code):
+		return code - 1
+
+	def __contains__(self, coords):
+		index = self._get_index(coords)
+		return index >= 0 and self._codes[index] != 0
+
+	def __getitem__(self, coords):
+		index = self._get_index(coords)
+		code = self._codes[index] if index >= 0 else 0
+		if not code:
+			raise KeyError(coords)
+		return self._decode(code)
+
+	def get(self, coords, default=None):
+		index = self._get_index(coords)
+		code = self._codes[index] if index >= 0 else 0
+		if not code:
+			return default
+		return self._decode(code)
+
+	def __setitem__(self, coords, value):
+		index = self._get_index(coords)
+		assert index >= 0, '{} is outside of the map'.format(coords)
+		if not self._codes[index]:
+			self._len += 1
+		self._codes[index] = self._encode(value)
+
+	def __delitem__(self, coords):
+		index = self._get_index(coords)
+		if index < 0 or not self._codes[index]:
+			raise KeyError(coords)
+		self._codes[index] = 0
+		self._len -= 1
+
+	def __iter__(self):
+		codes = self._codes
+		height = self.height
+		left = self.left
+		top = self.top
+		for index, code in enumerate(codes):
+			if code:
+				yield (left + index // height, top + index % height)
+
+	def __len__(self):
+		return self._len
+
+
+class IslandMap(GridMap):
+	"""GridMap {(x, y): island}, storing the index of the island in the list of islands."""
+
+	def __init__(self, rect, islands):
+		"""
+		@param islands: list of the islands, the map follows later additions to it
+		"""
+		super().__init__(rect, 'H')
+		self._islands = islands
+		self._indices = {} # { island: index in islands }
+
+	def _encode(self, island):
+		index = self._indices.get(island)
+		if index is None:
+			index = self._indices[island] = self._islands.index(island)
+		assert index + 1 < 0xFFFF
+		return index + 1
+
+	def _decode(self, code):
+		return self._islands[code - 1]
@@ -32,12 +32,14 @@ from horizons.scheduler import Scheduler
 from horizons.util.buildingindexer import BuildingIndexer
 from horizons.util.pathfinding.pathnodes import IslandBarrierNodes, IslandPathNodes
 from horizons.util.shapes import Circle, Rect
+from horizons.util.statechecksum import StateChecksum
 from horizons.util.worldobject import WorldObject
 from horizons.world.buildability.freeislandcache import FreeIslandBuildabilityCache
 from horizons.world.buildability.terraincache import TerrainBuildabilityCache, TerrainRequirement
 from horizons.world.buildingowner import BuildingOwner
 from horizons.world.ground import MapPreviewTile
 from horizons.world.settlement import Settlement
+from horizons.world.tilemap import IslandTileMap
 
 
 class Island(BuildingOwner, WorldObject):
@@ -93,7 +95,7 @@ class Island(BuildingOwner, WorldObject):
 			self.building_indexers[BUILDINGS.TREE] = BuildingIndexer(WildAnimal.walking_range, self, self.session.random)
 
 		# Load settlements.
-		for (settlement_id,) in db("SELECT rowid FROM settlement WHERE island = ?", island_id):
+		for settlement_id in db.get_settlements_by_island(island_id):
 			settlement = Settlement.load(db, settlement_id, self.session, self)
 			self.settlements.append(settlement)
 
@@ -117,7 +119,7 @@ class Island(BuildingOwner, WorldObject):
 
 		# Load buildings.
 		from horizons.world import load_building
-		buildings = db("SELECT rowid, type FROM building WHERE location = ?", island_id)
+		buildings = db.get_buildings_by_location(island_id)
 		for (building_worldid, building_typeid) in buildings:
 			load_building(self.session, db, building_typeid, building_worldid)
 
@@ -126,18 +128,22 @@ class Island(BuildingOwner, WorldObject):
 		Load the actual island from a file
 		@param preview: flag, map preview mode
 		"""
+		# the rectangle with the smallest area that contains every island tile is its position
 		p_x, p_y, width, height = db("SELECT MIN(x), MIN(y), (1 + MAX(x) - MIN(x)), (1 + MAX(y) - MIN(y)) FROM ground WHERE island_id = ?", island_id - 1001)[0]
+		self.position = Rect.init_from_topleft_and_size(p_x, p_y, width, height)
 
-		self.ground_map = {}
+		# These are important for pathfinding and building to check if the ground tile
+		# is blocked in any way. In actual games, the tiles are created when they are needed.
+		if not preview:
+			self.ground_map = IslandTileMap(self.session, self.position)
+		else:
+			self.ground_map = {}
 		for (x, y, ground_id, action_id, rotation) in db("SELECT x, y, ground_id, action_id, rotation FROM ground WHERE island_id = ?", island_id - 1001): # Load grounds
 			if not preview: # actual game, need actual tiles
-				ground = Entities.grounds[str('{:d}-{}'.format(ground_id, action_id))](self.session, x, y)
-				ground.act(rotation)
+				ground_class = Entities.grounds[str('{:d}-{}'.format(ground_id, action_id))]
+				self.ground_map.add_tile(x, y, ground_class, rotation)
 			else:
-				ground = MapPreviewTile(x, y, ground_id)
-			# These are important for pathfinding and building to check if the ground tile
-			# is blocked in any way.
-			self.ground_map[(ground.x, ground.y)] = ground
+				self.ground_map[(x, y)] = MapPreviewTile(x, y, ground_id)
 
 		self._init_cache()
 
@@ -150,13 +156,6 @@ class Island(BuildingOwner, WorldObject):
 		self.wild_animals = []
 		self.num_trees = 0
 
-		# define the rectangle with the smallest area that contains every island tile its position
-		min_x = min(list(zip(*self.ground_map.keys()))[0])
-		max_x = max(list(zip(*self.ground_map.keys()))[0])
-		min_y = min(list(zip(*self.ground_map.keys()))[1])
-		max_y = max(list(zip(*self.ground_map.keys()))[1])
-		self.position = Rect.init_from_borders(min_x, min_y, max_x, max_y)
-
 		if not preview:
 			# This isn't needed for map previews, but it is in actual games.
 			self.path_nodes = IslandPathNodes(self)
@@ -361,6 +360,11 @@ class Island(BuildingOwner, WorldObject):
 		if building.id == BUILDINGS.TREE:
 			self.num_trees += 1
 
+		checksum = StateChecksum.current
+		if checksum is not None:
+			origin = building.position.origin
+			checksum.add(StateChecksum.BUILDINGS, building.id, origin.x, origin.y)
+
 		return building
 
 	def remove_building(self, building):
@@ -389,6 +393,11 @@ class Island(BuildingOwner, WorldObject):
 		if building.id == BUILDINGS.TREE:
 			self.num_trees -= 1
 
+		checksum = StateChecksum.current
+		if checksum is not None:
+			origin = building.position.origin
+			checksum.remove(StateChecksum.BUILDINGS, building.id, origin.x, origin.y)
+
 	def get_building_index(self, resource_id):
 		if resource_id == RES.WILDANIMALFOOD:
 			return self.building_indexers[BUILDINGS.TREE]
@@ -20,6 +20,7 @@
 # ###################################################
 
 from collections import defaultdict
+from operator import attrgetter
 
 
 class ProviderHandler(list):
@@ -27,19 +28,93 @@ class ProviderHandler(list):
 	It acts as a data structure for quick retrieval of special properties, that only resource
 	providers have.
 
-	Precondition: Provider never change their provided resources."""
+	For range queries, the providers of each resource are also kept in a grid of
+	CELL_SIZE x CELL_SIZE buckets. A provider is in the bucket of every cell its position
+	overlaps, so a query only has to look at the buckets of the cells in range.
+
+	Precondition: Provider never change their provided resources or their position."""
+
+	CELL_SIZE = 8
 
 	def __init__(self):
 		super().__init__()
 		self.provider_by_resources = defaultdict(list)
+		self._grid_by_resources = defaultdict(dict) # { res: { (cell x, cell y): [provider] } }
+
+	def _get_cells(self, left, top, right, bottom):
+		size = self.CELL_SIZE
+		for x in range(int(left // size), int(right // size) + 1):
+			for y in range(int(top // size), int(bottom // size) + 1):
+				yield (x, y)
 
 	def append(self, provider):
 		# NOTE: appended elements need to be removed, else there will be a memory leak
+		pos = provider.position
+		cells = list(self._get_cells(pos.left, pos.top, pos.right, pos.bottom))
 		for res in provider.provided_resources:
 			self.provider_by_resources[res].append(provider)
+			grid = self._grid_by_resources[res]
+			for cell in cells:
+				grid.setdefault(cell, []).append(provider)
 		super().append(provider)
 
 	def remove(self, provider):
+		pos = provider.position
+		cells = list(self._get_cells(pos.left, pos.top, pos.right, pos.bottom))
 		for res in provider.provided_resources:
 			self.provider_by_resources[res].remove(provider)
+			grid = self._grid_by_resources[res]
+			for cell in cells:
+				bucket = grid[cell]
+				bucket.remove(provider)
+				if not bucket:
+					del grid[cell]
 		super().remove(provider)
+
+	def get_providers_in_range(self, radiusrect, resources=None, player=None):
+		"""Returns the providers of any of resources within radiusrect.
+		@param radiusrect: RadiusRect
+		@param resources: iterable of resource ids, None for all providers
+		@param player: Player instance, only buildings belonging to this player
+		@return: list of providers, sorted by worldid"""
+		r2 = radiusrect.center
+		radius = radiusrect.radius
+		radius_squared = radius ** 2
+		# every provider in range overlaps the center extended by the radius
+		area = (r2.left - radius, r2.top - radius, r2.right + radius, r2.bottom + radius)
+		size = self.CELL_SIZE
+		area_cells = (int(area[2] // size) - int(area[0] // size) + 1) * \
+		             (int(area[3] // size) - int(area[1] // size) + 1)
+
+		if resources is None:
+			candidates = self
+			resources = ()
+		else:
+			candidates = {}
+		for res in resources:
+			grid = self._grid_by_resources.get(res)
+			if not grid:
+				continue
+			if area_cells > len(grid):
+				# there are less occupied cells than cells in range
+				cells = [cell for cell in grid
+				         if area[0] // size <= cell[0] <= area[2] // size and
+				            area[1] // size <= cell[1] <= area[3] // size]
+			else:
+				cells = self._get_cells(*area)
+			for cell in cells:
+				bucket = grid.get(cell)
+				if bucket is not None:
+					for provider in bucket:
+						candidates[provider] = None
+
+		providers = []
+		for provider in candidates:
+			if player is None or player == provider.owner:
+				# inline of :
+				#provider.position.distance_to_rect(radiusrect.center) <= radiusrect.radius:
+				r1 = provider.position
+				if ((max(r1.left - r2.right, 0, r2.left - r1.right) ** 2) + (max(r1.top - r2.bottom, 0, r2.top - r1.bottom) ** 2)) <= radius_squared:
+					providers.append(provider)
+		providers.sort(key=attrgetter('worldid'))
+		return providers
@@ -183,8 +183,7 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 
 		# load all buildings in this settlement
 		from horizons.world import load_building
-		for building_id, building_type in \
-			  db("SELECT rowid, type FROM building WHERE location = ?", worldid):
+		for building_id, building_type in db.get_buildings_by_location(worldid):
 			building = load_building(session, db, building_type, building_id)
 			if building_type == BUILDINGS.WAREHOUSE:
 				self.warehouse = building
@@ -44,6 +44,7 @@ import sys
 from collections import defaultdict
 
 from horizons.util.changelistener import ChangeListener
+from horizons.util.statechecksum import StateChecksum
 
 
 class GenericStorage(ChangeListener):
@@ -74,19 +75,29 @@ class GenericStorage(ChangeListener):
 		@param amount: int amount that is to be changed. Can be negative to remove resources.
 		@return: int - amount that did not fit or was not available, depending on context.
 		"""
-		self._storage[res] += amount # defaultdict
+		old_amount = self._storage[res] # defaultdict
+		self._storage[res] = old_amount + amount
+		checksum = StateChecksum.current
+		if checksum is not None:
+			checksum.update_storage(res, old_amount, old_amount + amount)
 		self._changed()
 		return 0
 
 	def reset(self, res):
 		"""Resets a resource slot to zero, removing all its contents."""
 		if res in self._storage:
+			checksum = StateChecksum.current
+			if checksum is not None:
+				checksum.update_storage(res, self._storage[res], 0)
 			self._storage[res] = 0
 			self._changed()
 
 	def reset_all(self):
 		"""Removes every resource from this inventory"""
+		checksum = StateChecksum.current
 		for res in self._storage:
+			if checksum is not None:
+				checksum.update_storage(res, self._storage[res], 0)
 			self._storage[res] = 0
 		self._changed()
 
@@ -210,8 +221,11 @@ class GlobalLimitStorage(GenericStorage):
 		if self.limit < 0:
 			self.limit = 0
 		# remove res that don't fit anymore
+		checksum = StateChecksum.current
 		for res, amount in self._storage.items():
 			if amount > self.limit:
+				if checksum is not None:
+					checksum.update_storage(res, amount, self.limit)
 				self._storage[res] = self.limit
 		self._changed()
 
@@ -0,0 +1,336 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from array import array
+from collections.abc import MutableMapping
+
+
+class TileMap(MutableMapping):
+	"""
+	Dict-like {(x, y): tile} that only creates the tiles when they are accessed.
+
+	The map covers a fixed rectangle. For every coordinate, a compact array stores which
+	kind of tile (index into self._kinds) is there, 0 meaning that there is no tile.
+	Creating a tile object, and with it the FIFE instance, is deferred until the tile is
+	requested with map[coords] or map.get(coords). Iterating over items() or values()
+	therefore creates all tiles; code that only needs the ground type should use
+	get_tile_class() and code that only cares about tiles with state should use
+	get_instance().
+
+	Tiles that are assigned explicitly (map[coords] = tile) are stored as they are.
+	"""
+
+	CUSTOM = 0xFFFF # the tile was assigned explicitly and is in self._tiles
+	CHUNK_SIZE = 16 # see create_tiles
+
+	def __init__(self, left, top, width, height):
+		self._left = left
+		self._top = top
+		self._width = width
+		self._height = height
+		self._codes = array('H', bytes(2 * width * height))
+		self._kinds = [] # code - 1: tile class
+		self._kind_codes = {} # { tile class: code }
+		self._tiles = {} # { (x, y): tile } of the tiles that have been created
+		self._len = 0
+		self._created_chunks = set() # { (chunk x, chunk y) }
+
+	def _get_index(self, coords):
+		x = coords[0] - self._left
+		y = coords[1] - self._top
+		if 0 <= x < self._width and 0 <= y < self._height:
+			return x * self._height + y
+		return -1
+
+	def _get_code(self, tile_class):
+		code = self._kind_codes.get(tile_class)
+		if code is None:
+			self._kinds.append(tile_class)
+			code = self._kind_codes[tile_class] = len(self._kinds)
+			assert code < self.CUSTOM
+		return code
+
+	def _set_code(self, coords, code):
+		index = self._get_index(coords)
+		assert index >= 0, '{} is outside of the map'.format(coords)
+		if not self._codes[index]:
+			self._len += 1
+		self._codes[index] = code
+		return index
+
+	def _create(self, coords, code):
+		"""Create the tile of the given kind at coords."""
+		raise NotImplementedError
+
+	def __contains__(self, coords):
+		index = self._get_index(coords)
+		return index >= 0 and self._codes[index] != 0
+
+	def __getitem__(self, coords):
+		index = self._get_index(coords)
+		code = self._codes[index] if index >= 0 else 0
+		if not code:
+			raise KeyError(coords)
+		tile = self._tiles.get(coords)
+		if tile is None:
+			tile = self._create(coords, code)
+			self._tiles[coords] = tile
+		return tile
+
+	def get(self, coords, default=None):
+		if coords in self:
+			return self[coords]
+		return default
+
+	def __setitem__(self, coords, tile):
+		self._set_code(coords, self.CUSTOM)
+		self._tiles[coords] = tile
+
+	def __delitem__(self, coords):
+		index = self._get_index(coords)
+		if index < 0 or not self._codes[index]:
+			raise KeyError(coords)
+		self._codes[index] = 0
+		self._len -= 1
+		self._tiles.pop(coords, None)
+
+	def __iter__(self):
+		codes = self._codes
+		height = self._height
+		for x in range(self._width):
+			offset = x * height
+			for y in range(height):
+				if codes[offset + y]:
+					yield (self._left + x, self._top + y)
+
+	def __len__(self):
+		return self._len
+
+	def get_tile_class(self, coords):
+		"""Return the class of the tile at coords without creating the tile.
+		@return: tile class or None if there is no tile"""
+		index = self._get_index(coords)
+		code = self._codes[index] if index >= 0 else 0
+		if not code:
+			return None
+		if code == self.CUSTOM:
+			return self._tiles[coords].__class__
+		return self._kinds[code - 1]
+
+	def get_instance(self, coords):
+		"""Return the tile at coords if it has been created already, None otherwise.
+
+		A tile that hasn't been created has the default state: no settlement, no object
+		and not blocked.
+		"""
+		if coords in self:
+			return self._tiles.get(coords)
+		return None
+
+	def get_instances(self):
+		"""@return: list of the ((x, y), tile) that have been created"""
+		return [(coords, tile) for coords, tile in self._tiles.items() if coords in self]
+
+	def create_tiles(self, rect):
+		"""Create the tiles in the Rect rect, e.g. because they become visible.
+
+		This works on square chunks of the map that are remembered once all their tiles
+		exist, so calling it repeatedly for overlapping areas is cheap.
+		"""
+		size = self.CHUNK_SIZE
+		first_chunk_x = (max(rect.left, self._left) - self._left) // size
+		last_chunk_x = (min(rect.right, self._left + self._width - 1) - self._left) // size
+		first_chunk_y = (max(rect.top, self._top) - self._top) // size
+		last_chunk_y = (min(rect.bottom, self._top + self._height - 1) - self._top) // size
+		for chunk_x in range(first_chunk_x, last_chunk_x + 1):
+			for chunk_y in range(first_chunk_y, last_chunk_y + 1):
+				if (chunk_x, chunk_y) in self._created_chunks:
+					continue
+				self._created_chunks.add((chunk_x, chunk_y))
+				left = self._left + chunk_x * size
+				top = self._top + chunk_y * size
+				for x in range(left, left + size):
+					for y in range(top, top + size):
+						if (x, y) in self:
+							self[(x, y)]
+
+
+class IslandTileMap(TileMap):
+	"""TileMap of the ground tiles of an island.
+
+	Keeps the order in which the tiles were added, like the dict it replaces.
+	"""
+
+	def __init__(self, session, rect):
+		super().__init__(rect.left, rect.top, rect.width, rect.height)
+		self._session = session
+		self._rotations = array('B', bytes(rect.width * rect.height)) # rotation // 45
+		self._order = array('l')
+
+	def add_tile(self, x, y, tile_class, rotation):
+		"""Add a tile that is created with tile_class(session, x, y).act(rotation) when needed."""
+		index = self._get_index((x, y))
+		is_new = index >= 0 and not self._codes[index]
+		index = self._set_code((x, y), self._get_code(tile_class))
+		self._rotations[index] = rotation // 45
+		self._tiles.pop((x, y), None)
+		if is_new:
+			self._order.append(index)
+
+	def _create(self, coords, code):
+		tile = self._kinds[code - 1](self._session, coords[0], coords[1])
+		tile.act(self._rotations[self._get_index(coords)] * 45)
+		return tile
+
+	def __setitem__(self, coords, tile):
+		index = self._get_index(coords)
+		is_new = index >= 0 and not self._codes[index]
+		super().__setitem__(coords, tile)
+		if is_new:
+			self._order.append(index)
+
+	def __delitem__(self, coords):
+		super().__delitem__(coords)
+		self._order.remove(self._get_index(coords))
+
+	def __iter__(self):
+		height = self._height
+		left = self._left
+		top = self._top
+		for index in self._order:
+			yield (left + index // height, top + index % height)
+
+
+class WaterTileMap(TileMap):
+	"""TileMap of the placeholder water tiles of the world.
+
+	The whole map is split into square blocks, all tiles of a block are instances of
+	tile_class that are positioned at the same spot.
+	"""
+
+	def __init__(self, session, rect, tile_class, block_left, block_top, block_size):
+		super().__init__(rect.left, rect.top, rect.width, rect.height)
+		self._session = session
+		self._block_left = block_left
+		self._block_top = block_top
+		self._block_size = block_size
+		code = self._get_code(tile_class)
+		self._codes = array('H', [code]) * (rect.width * rect.height)
+		self._len = rect.width * rect.height
+
+	def _create(self, coords, code):
+		size = self._block_size
+		x = coords[0] - (coords[0] - self._block_left) % size
+		y = coords[1] - (coords[1] - self._block_top) % size
+		return self._kinds[code - 1](self._session, x - 1, y + size - 1)
+
+	def __delitem__(self, coords):
+		# the tile instances may be shared with copies of this map, keep them
+		index = self._get_index(coords)
+		if index < 0 or not self._codes[index]:
+			raise KeyError(coords)
+		self._codes[index] = 0
+		self._len -= 1
+
+	def copy(self):
+		"""Return a copy of the map that shares the tile instances with this one."""
+		water_map = WaterTileMap.__new__(WaterTileMap)
+		water_map.__dict__.update(self.__dict__)
+		water_map._codes = array('H', self._codes)
+		return water_map
+
+
+class WorldTileMap(MutableMapping):
+	"""
+	Dict-like {(x, y): tile} of the whole world.
+
+	The tiles of the islands are taken from the islands' ground maps and all other tiles
+	from the water map, so creating this doesn't create any tiles. Explicit assignments
+	(as done by the editor) override both.
+	"""
+
+	def __init__(self, water_map, island_map):
+		"""
+		@param water_map: TileMap of the water tiles below the islands
+		@param island_map: {(x, y): island}
+		"""
+		self._water_map = water_map
+		self._island_map = island_map
+		self._tiles = {}
+
+	def __contains__(self, coords):
+		return coords in self._tiles or coords in self._island_map or coords in self._water_map
+
+	def __getitem__(self, coords):
+		tile = self._tiles.get(coords)
+		if tile is not None:
+			return tile
+		island = self._island_map.get(coords)
+		if island is not None:
+			return island.ground_map[coords]
+		return self._water_map[coords]
+
+	def get(self, coords, default=None):
+		if coords in self:
+			return self[coords]
+		return default
+
+	def __setitem__(self, coords, tile):
+		self._tiles[coords] = tile
+
+	def __delitem__(self, coords):
+		raise NotImplementedError('tiles can only be replaced')
+
+	def __iter__(self):
+		yield from self._water_map
+		for coords in self._island_map:
+			if coords not in self._water_map:
+				yield coords
+		for coords in self._tiles:
+			if coords not in self._water_map and coords not in self._island_map:
+				yield coords
+
+	def __len__(self):
+		return sum(1 for _ in self)
+
+	def get_tile_class(self, coords):
+		"""@see TileMap.get_tile_class"""
+		tile = self._tiles.get(coords)
+		if tile is not None:
+			return tile.__class__
+		island = self._island_map.get(coords)
+		if island is not None:
+			if not isinstance(island.ground_map, TileMap): # map preview
+				return island.ground_map[coords].__class__
+			return island.ground_map.get_tile_class(coords)
+		return self._water_map.get_tile_class(coords)
+
+	def get_instance(self, coords):
+		"""@see TileMap.get_instance"""
+		tile = self._tiles.get(coords)
+		if tile is not None:
+			return tile
+		island = self._island_map.get(coords)
+		if island is not None:
+			if not isinstance(island.ground_map, TileMap): # map preview
+				return island.ground_map[coords]
+			return island.ground_map.get_instance(coords)
+		return self._water_map.get_instance(coords)
@@ -169,9 +169,9 @@ class BuildingCollector(Collector):
 				if reslist: # we can do something here
 					jobs.append( Job(building, reslist) )
 
-		# TODO: find out why order of  self.get_buildings_in_range(..) and therefore order of jobs differs from client to client
-		# TODO: find out why WildAnimal.get_job(..) doesn't have this problem
-		# for MP-Games the jobs must have the same ordering to ensure get_best_possible_job(..) returns the same result
+		# for MP-Games the jobs must have the same ordering to ensure get_best_possible_job(..) returns the same result.
+		# get_providers_in_range already returns the buildings sorted by worldid, but subclasses
+		# may override get_buildings_in_range.
 		jobs.sort(key=lambda job: job.object.worldid)
 
 		return self.get_best_possible_job(jobs)
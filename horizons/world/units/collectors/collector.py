@@ -151,13 +151,11 @@ class Collector(Unit):
 		super().load(db, worldid)
 
 		# load collector properties
-		state_id, remaining_ticks, start_hidden = \
-		        db("SELECT state, remaining_ticks, start_hidden FROM collector \
-		            WHERE rowid = ?", worldid)[0]
+		state_id, remaining_ticks, start_hidden = db.get_collector_row(worldid)
 		self.__init(self.states[state_id], start_hidden)
 
 		# load job
-		job_db = db("SELECT object, resource, amount FROM collector_job WHERE collector = ?", worldid)
+		job_db = db.get_collector_job_rows(worldid)
 		if job_db:
 			reslist = []
 			for obj, res, amount in job_db:
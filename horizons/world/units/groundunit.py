@@ -46,14 +46,19 @@ class GroundUnit(Unit):
 	def __init__(self, x, y, **kwargs):
 		super().__init__(x=x, y=y, **kwargs)
 		self.session.world.ground_units.append(self)
+		self.session.world.ground_unit_index.add(self, self.position)
 		self.session.world.ground_unit_map[self.position.to_tuple()] = weakref.ref(self)
 
 	def remove(self):
 		super().remove()
 		self.session.world.ground_units.remove(self)
+		self.session.world.ground_unit_index.remove(self)
 		self.session.view.discard_change_listener(self.draw_health)
 		del self.session.world.ground_unit_map[self.position.to_tuple()]
 
+	def _position_changed(self):
+		self.session.world.ground_unit_index.move(self, self.position)
+
 	def _move_tick(self, resume=False):
 		del self.session.world.ground_unit_map[self.position.to_tuple()]
 
@@ -72,6 +77,7 @@ class GroundUnit(Unit):
 
 		# register unit in world
 		self.session.world.ground_units.append(self)
+		self.session.world.ground_unit_index.add(self, self.position)
 		self.session.world.ground_unit_map[self.position.to_tuple()] = weakref.ref(self)
 
 
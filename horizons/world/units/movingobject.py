@@ -30,6 +30,7 @@ from horizons.scheduler import Scheduler
 from horizons.util.pathfinding import PathBlockedError
 from horizons.util.python.weakmethodlist import WeakMethodList
 from horizons.util.shapes import Point
+from horizons.util.statechecksum import StateChecksum
 from horizons.world.concreteobject import ConcreteObject
 from horizons.world.units import UnitClass
 from horizons.world.units.unitexeptions import MoveNotPossible
@@ -86,6 +87,16 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		self._fife_location1 = None
 		self._fife_location2 = None
 
+		checksum = StateChecksum.current
+		if checksum is not None:
+			checksum.add(StateChecksum.UNITS, self.id, x, y)
+
+	def remove(self):
+		checksum = StateChecksum.current
+		if checksum is not None:
+			checksum.remove(StateChecksum.UNITS, self.id, self.position.x, self.position.y)
+		super().remove()
+
 	def check_move(self, destination):
 		"""Tries to find a path to destination
 		@param destination: destination supported by pathfinding
@@ -152,6 +163,11 @@ class MovingObject(ComponentHolder, ConcreteObject):
 			# assumed e.g. in the collector code
 			Scheduler().add_new_object(self._move_tick, self)
 
+	def _position_changed(self):
+		"""Called right after the unit moved on to the next coords, i.e. self.position changed.
+		Subclasses use this to update position indices."""
+		pass
+
 	def _movement_finished(self):
 		self.log.debug("%s: movement finished. calling callbacks %s", self, self.move_callbacks)
 		self._next_target = self.position
@@ -174,6 +190,11 @@ class MovingObject(ComponentHolder, ConcreteObject):
 			#self.log.debug("%s move tick from %s to %s", self, self.last_position, self._next_target)
 			self.last_position = self.position
 			self.position = self._next_target
+			checksum = StateChecksum.current
+			if checksum is not None:
+				checksum.replace(StateChecksum.UNITS, (self.id, self.last_position.x, self.last_position.y),
+				                 (self.id, self.position.x, self.position.y))
+			self._position_changed()
 			self._changed()
 
 		# try to get next step, handle a blocked path
@@ -286,7 +307,7 @@ class MovingObject(ComponentHolder, ConcreteObject):
 
 	def load(self, db, worldid):
 		super().load(db, worldid)
-		x, y = db("SELECT x, y FROM unit WHERE rowid = ?", worldid)[0]
+		x, y = db.get_unit_row(worldid)[:2]
 		self.__init(x, y)
 		path_loaded = self.path.load(db, worldid)
 		if path_loaded:
@@ -70,6 +70,7 @@ class Ship(Unit):
 	def __init(self):
 		# register ship in world
 		self.session.world.ships.append(self)
+		self.session.world.ship_index.add(self, self.position)
 		if self.in_ship_map:
 			self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
 
@@ -78,6 +79,7 @@ class Ship(Unit):
 
 	def remove(self):
 		self.session.world.ships.remove(self)
+		self.session.world.ship_index.remove(self)
 		self.session.view.discard_change_listener(self.draw_health)
 		if self.in_ship_map:
 			if self.position.to_tuple() in self.session.world.ship_map:
@@ -121,6 +123,9 @@ class Ship(Unit):
 			self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
 			self.session.world.ship_map[self._next_target.to_tuple()] = weakref.ref(self)
 
+	def _position_changed(self):
+		self.session.world.ship_index.move(self, self.position)
+
 	def _movement_finished(self):
 		if self.in_ship_map:
 			# if the movement somehow stops, the position sticks, and the unit isn't at next_target any more
@@ -185,6 +190,15 @@ class Ship(Unit):
 			ships.remove(self)
 		return ships
 
+	def find_nearest_ship(self, condition=None, radius=15):
+		"""Returns the closest other ship in radius, see find_nearby_ships.
+		@param condition: optional function, only ships for which it returns True are considered
+		@return: Ship or None
+		"""
+		def is_candidate(ship):
+			return ship is not self and (condition is None or condition(ship))
+		return self.session.world.get_nearest_ship(self.position, radius, is_candidate)
+
 	def get_tradeable_warehouses(self, position=None):
 		"""Returns warehouses this ship can trade with w.r.t. position, which defaults to the ships ones."""
 		if position is None:
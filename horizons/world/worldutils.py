@@ -170,8 +170,8 @@ def add_resource_deposits(world, resource_multiplier):
 		# mark island tiles that are next to the sea
 		queue = deque()
 		distance = {}
-		for (x, y), tile in island.ground_map.items():
-			if len(tile.classes) == 1: # could be a shallow to deep water tile
+		for (x, y) in island.ground_map:
+			if len(island.ground_map.get_tile_class((x, y)).classes) == 1: # could be a shallow to deep water tile
 				for dx, dy in moves:
 					coords = (x + dx, y + dy)
 					if coords in world.water_body and world.water_body[coords] == world.sea_number:
@@ -194,7 +194,7 @@ def add_resource_deposits(world, resource_multiplier):
 		# calculate tiles' values
 		usable_part = {}
 		for coords, dist in distance.items():
-			if coords in island.ground_map and 'constructible' in island.ground_map[coords].classes:
+			if coords in island.ground_map and 'constructible' in island.ground_map.get_tile_class(coords).classes:
 				usable_part[coords] = (dist + 5) ** 2
 
 		# place the local clay deposits
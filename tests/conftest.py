@@ -19,11 +19,6 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
-import gettext
-import sys
-from importlib.abc import Loader, MetaPathFinder
-from importlib.machinery import ModuleSpec, PathFinder
-
 import pytest
 
 
@@ -69,36 +64,7 @@ def pytest_namespace():
 	if FIFE_MOCK_INSTALLED:
 		return
 
-	def mock_fife():
-		"""
-		Using a custom import hook, we catch all imports of fife and provide a
-		dummy module.
-		"""
-		from tests.dummy import Dummy
-
-		class Finder(PathFinder):
-			@staticmethod
-			def find_spec(fullname, path, target=None):
-				if fullname.startswith('fife'):
-					return ModuleSpec(fullname, DummyLoader())
-
-		class DummyLoader(Loader):
-			@staticmethod
-			def load_module(module):
-				sys.modules.setdefault(module, Dummy())
-
-		sys.meta_path.insert(0, Finder)
-
-	mock_fife()
-
-	import horizons.globals
-	import fife
-	horizons.globals.fife = fife.fife
-
-	from horizons.util import create_user_dirs
-	create_user_dirs()
-
-	import horizons.i18n
-	horizons.i18n.change_language()
+	from horizons.headless import setup_environment
+	setup_environment()
 
 	FIFE_MOCK_INSTALLED = True
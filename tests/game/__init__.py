@@ -28,16 +28,12 @@ from unittest import mock
 import horizons.globals
 import horizons.main
 import horizons.world  # needs to be imported before session
-from horizons.extscheduler import ExtScheduler
+from horizons.headlesssession import HeadlessSession, create_players
 from horizons.scheduler import Scheduler
-from horizons.spsession import SPSession
-from horizons.util.color import Color
-from horizons.util.dbreader import DbReader
-from horizons.util.difficultysettings import DifficultySettings
+from horizons.util.dbreader import BatchedDbWriter, DbReader
 from horizons.util.savegameaccessor import SavegameAccessor
 from horizons.util.startgameoptions import StartGameOptions
 from tests import RANDOM_SEED
-from tests.dummy import Dummy
 from tests.utils import Timer
 
 # path where test savegames are stored (tests/game/fixtures/)
@@ -47,7 +43,8 @@ TEST_FIXTURES_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'fi
 @contextlib.contextmanager
 def _dbreader_convert_dummy_objects():
 	"""
-	Wrapper around DbReader.__call__ to convert Dummy objects to valid values.
+	Wrapper around DbReader.__call__ (and BatchedDbWriter.__call__) to convert Dummy
+	objects to valid values.
 
 	This is needed because some classes attempt to store Dummy objects in the
 	database, e.g. ConcreteObject with self._instance.getActionRuntime().
@@ -66,19 +63,18 @@ def _dbreader_convert_dummy_objects():
 			return func(self, command, *mapped_args)
 		return wrapper
 
-	original = DbReader.__call__
-	DbReader.__call__ = deco(DbReader.__call__)
+	originals = [(cls, cls.__call__) for cls in (DbReader, BatchedDbWriter)]
+	for cls, original in originals:
+		cls.__call__ = deco(original)
 	yield
-	DbReader.__call__ = original
+	for cls, original in originals:
+		cls.__call__ = original
 
 
-class SPTestSession(SPSession):
+class SPTestSession(HeadlessSession):
 
-	@mock.patch('horizons.session.View', Dummy)
 	def __init__(self, rng_seed=None):
-		ExtScheduler.create_instance(mock.Mock())
-		super().__init__(horizons.globals.db, rng_seed, ingame_gui_class=Dummy)
-		self.reset_autosave = mock.Mock()
+		super().__init__(horizons.globals.db, rng_seed)
 
 	def save(self, *args, **kwargs):
 		"""
@@ -117,29 +113,6 @@ class SPTestSession(SPSession):
 		if remove_savegame and not self.started_from_map:
 			os.remove(self.savegame)
 
-	@classmethod
-	def cleanup(cls):
-		"""
-		If a test uses manual session management, we cannot be sure that session.end was
-		called before a crash, leaving the game in an unclean state. This method should
-		return the game to a valid state.
-		"""
-		Scheduler.destroy_instance()
-		ExtScheduler.destroy_instance()
-		SPSession._clear_caches()
-
-	def run(self, ticks=1, seconds=None):
-		"""
-		Run the scheduler the given count of ticks or (in-game) seconds. Default is 1 tick,
-		if seconds are passed, they will overwrite the tick count.
-		"""
-		if seconds:
-			ticks = self.timer.get_ticks(seconds)
-
-		while ticks > 0:
-			Scheduler().tick(Scheduler().cur_tick + 1)
-			ticks -= 1
-
 
 # import helper functions here, so tests can import from tests.game directly
 from tests.game.utils import create_map, new_settlement, settle # isort:skip
@@ -152,31 +125,7 @@ def new_session(mapgen=create_map, rng_seed=RANDOM_SEED, human_player=True, ai_p
 	tests too verbose.
 	"""
 	session = SPTestSession(rng_seed=rng_seed)
-	human_difficulty = DifficultySettings.DEFAULT_LEVEL
-	ai_difficulty = DifficultySettings.EASY_LEVEL
-
-	players = []
-	if human_player:
-		players.append({
-			'id': 1,
-			'name': 'foobar',
-			'color': Color.get(1),
-			'local': True,
-			'ai': False,
-			'difficulty': human_difficulty,
-		})
-
-	for i in range(ai_players):
-		id = i + human_player + 1
-		players.append({
-			'id': id,
-			'name': ('AI' + str(i)),
-			'color': Color.get(id),
-			'local': (id == 1),
-			'ai': True,
-			'difficulty': ai_difficulty,
-		})
-
+	players = create_players(human_player, ai_players)
 	session.load(mapgen(), players, ai_players > 0, True)
 	return session, session.world.player
 
@@ -0,0 +1,68 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from functools import partial
+
+import pytest
+
+from horizons.ai.aiplayer import AIPlayer
+from horizons.ai.aiplayer.islandvaluation import IslandValuation
+from horizons.util.random_map import generate_map_from_seed
+from tests.game import game_test
+
+
+def get_values(session):
+	island_valuation = IslandValuation.get(session.world)
+	return {(player.worldid, island.worldid): island_valuation.get_value(island, player, player.settlement_founder.personality)
+	        for player in session.world.players if isinstance(player, AIPlayer)
+	        for island in session.world.islands}
+
+
+def measure_again(session):
+	island_valuation = IslandValuation.get(session.world)
+	island_valuation._resources.clear()
+	island_valuation._distances.clear()
+	island_valuation._values.clear()
+	return get_values(session)
+
+
+@pytest.mark.long
+@game_test(mapgen=partial(generate_map_from_seed, 2), human_player=False, ai_players=2, timeout=2 * 60)
+def test_values_follow_the_settlements(session, _):
+	"""The cached island values are the ones of the current state of the world."""
+	before = get_values(session)
+	session.run(seconds=300)
+	assert session.world.settlements
+	values = get_values(session)
+	assert values != before
+
+	assert measure_again(session) == values
+
+	# a settlement that disappears changes the values of the other islands too
+	settlement = session.world.settlements[0]
+	island = session.world.get_island(settlement.warehouse.position.origin)
+	island.settlements.remove(settlement)
+	try:
+		without = get_values(session)
+		assert without == measure_again(session)
+		assert any(value != values[key] for key, value in without.items() if key[1] != island.worldid)
+	finally:
+		island.settlements.append(settlement)
@@ -22,6 +22,7 @@
 import bz2
 import os
 import tempfile
+from unittest import mock
 
 from horizons.command.building import Build
 from horizons.command.production import ToggleActive
@@ -33,7 +34,9 @@ from horizons.util.shapes import Point
 from horizons.util.worldobject import WorldObject
 from horizons.world.production.producer import Producer
 from horizons.world.units.collectors import Collector
-from tests.game import TEST_FIXTURES_DIR, game_test, load_session, new_session, saveload, settle
+from tests.game import (
+	TEST_FIXTURES_DIR, _dbreader_convert_dummy_objects, game_test, load_session, new_session, saveload,
+	settle)
 
 
 @game_test(manual_session=True)
@@ -113,6 +116,30 @@ def test_load_producing_production_slow():
 	session.end()
 
 
+@game_test(manual_session=True)
+def test_background_save():
+	"""Save the game in the background while it keeps running, then load that savegame."""
+	session = create_lumberjack_production_session()
+	lumberjack_id = next(iter(session.world.player.settlements[0].buildings_by_id[BUILDINGS.LUMBERJACK])).worldid
+
+	fd, filename = tempfile.mkstemp()
+	os.close(fd)
+	results = []
+	with mock.patch('horizons.session.SavegameManager._write_screenshot'), \
+	     _dbreader_convert_dummy_objects():
+		assert session._do_background_save(filename, results.append)
+	session.run(ticks=20)
+	session._background_save.wait()
+	session._check_background_save()
+	assert results == [True]
+	session.end(keep_map=True)
+
+	session = load_session(filename)
+	assert WorldObject.get_object_by_id(lumberjack_id).id == BUILDINGS.LUMBERJACK
+	session.run(seconds=1)
+	session.end()
+
+
 @game_test(manual_session=True)
 def test_hunter_save_load():
 	"""Save/loading hunter in different states"""
@@ -0,0 +1,75 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from horizons.command.building import Build, Tear
+from horizons.command.unit import CreateUnit
+from horizons.component.componentholder import ComponentHolder
+from horizons.component.storagecomponent import StorageComponent
+from horizons.constants import BUILDINGS, UNITS
+from horizons.util.shapes import Point
+from horizons.util.statechecksum import MASK, StateChecksum
+from horizons.util.worldobject import WorldObject
+from horizons.world.units.movingobject import MovingObject
+from tests.game import game_test, settle
+
+
+def get_state_hashes(session):
+	"""Computes the hashes of the whole game state from scratch."""
+	checksum = StateChecksum()
+	objects = list(WorldObject.get_objs().values())
+	for obj in objects:
+		if isinstance(obj, ComponentHolder) and obj.has_component(StorageComponent):
+			component = obj.get_component(StorageComponent)
+			if component.has_own_inventory:
+				for res, amount in component.inventory.itercontents():
+					checksum.update_storage(res, 0, amount)
+	for island in session.world.islands:
+		for building in island.buildings:
+			origin = building.position.origin
+			checksum.add(StateChecksum.BUILDINGS, building.id, origin.x, origin.y)
+	for obj in objects:
+		if isinstance(obj, MovingObject):
+			checksum.add(StateChecksum.UNITS, obj.id, obj.position.x, obj.position.y)
+	return checksum.hashes
+
+
+@game_test()
+def test_checksum_follows_state(s, p):
+	"""The incrementally updated checksum always matches the current game state."""
+	before = get_state_hashes(s)
+	checksum = StateChecksum.start()
+	try:
+		settlement, island = settle(s)
+		farm = Build(BUILDINGS.FARM, 30, 30, island, settlement=settlement)(p)
+		pasture = Build(BUILDINGS.PASTURE, 27, 30, island, settlement=settlement)(p)
+		Build(BUILDINGS.LUMBERJACK, 30, 25, island, settlement=settlement)(p)
+		ship = CreateUnit(p.worldid, UNITS.PLAYER_SHIP, 10, 10)(p)
+		ship.move(Point(5, 5))
+		assert farm and pasture
+
+		s.run(seconds=40)
+		Tear(pasture)(p)
+		s.run(seconds=5)
+
+		after = get_state_hashes(s)
+		assert checksum.hashes == [(a - b) & MASK for a, b in zip(after, before)]
+	finally:
+		StateChecksum.stop()
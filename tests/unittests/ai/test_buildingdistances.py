@@ -0,0 +1,78 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from horizons.ai.aiplayer.buildingdistances import BuildingDistances
+from horizons.util.shapes import Rect
+
+
+def building(x, y, width, height):
+	return Mock(position=Rect.init_from_topleft_and_size(x, y, width, height))
+
+
+class TestBuildingDistances(TestCase):
+
+	def setUp(self):
+		self.production_builder = Mock()
+		self.production_builder.settlement.buildings_by_id = {
+			1: [building(0, 0, 2, 2), building(10, 3, 3, 3)],
+			2: [building(5, 5, 1, 1)],
+		}
+		self.production_builder.collector_buildings = [building(20, 20, 2, 2)]
+		self.distances = BuildingDistances(self.production_builder)
+
+	def assert_rect_distance(self, key, buildings, position):
+		expected = min(position.distance(b.position) for b in buildings)
+		self.assertAlmostEqual(expected, self.distances.get_distance(key, position))
+
+	def test_same_as_rect_distance(self):
+		buildings_by_id = self.production_builder.settlement.buildings_by_id
+		positions = [
+			Rect.init_from_topleft_and_size(0, 0, 1, 1), # overlapping
+			Rect.init_from_topleft_and_size(2, 0, 2, 2), # adjacent
+			Rect.init_from_topleft_and_size(4, 0, 3, 3), # horizontal
+			Rect.init_from_topleft_and_size(11, 9, 2, 2), # vertical
+			Rect.init_from_topleft_and_size(6, 7, 1, 2), # diagonal
+			Rect.init_from_topleft_and_size(-5, -6, 2, 2),
+		]
+		for position in positions:
+			self.assert_rect_distance(1, buildings_by_id[1], position)
+			self.assert_rect_distance(2, buildings_by_id[2], position)
+			self.assert_rect_distance(BuildingDistances.COLLECTORS, self.production_builder.collector_buildings, position)
+
+	def test_no_buildings(self):
+		position = Rect.init_from_topleft_and_size(0, 0, 1, 1)
+		self.assertIsNone(self.distances.get_distance(3, position))
+		self.production_builder.collector_buildings = []
+		self.distances.clear()
+		self.assertIsNone(self.distances.get_distance(BuildingDistances.COLLECTORS, position))
+
+	def test_clear(self):
+		position = Rect.init_from_topleft_and_size(5, 5, 1, 1)
+		self.assertAlmostEqual(0, self.distances.get_distance(2, position))
+
+		# the buildings are remembered until the distances are cleared
+		self.production_builder.settlement.buildings_by_id[2] = [building(8, 5, 1, 1)]
+		self.assertAlmostEqual(0, self.distances.get_distance(2, position))
+		self.distances.clear()
+		self.assertAlmostEqual(3, self.distances.get_distance(2, position))
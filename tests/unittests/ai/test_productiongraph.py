@@ -0,0 +1,83 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from horizons.ai.aiplayer.productionchain import ProductionChain
+from horizons.ai.aiplayer.productiongraph import ProductionGraph
+
+BRICKS, CLAY, BOARDS, WOOD, TOOLS = range(1, 6)
+
+
+def abstract_building(building_id, *lines):
+	"""Return a stub abstract building with the production lines [(produced, consumed), ...]."""
+	building = Mock(id=building_id, ignore_production=False)
+	building.lines = {}
+	for produced, consumed in lines:
+		production_line = Mock(produced_res=produced, consumed_res=consumed)
+		for resource_id in produced:
+			building.lines[resource_id] = production_line
+	return building
+
+
+class TestProductionGraph(TestCase):
+
+	def setUp(self):
+		self.brickyard = abstract_building(10, ({BRICKS: 1}, {CLAY: -2}))
+		self.clay_pit = abstract_building(11, ({CLAY: 2}, {}))
+		self.lumberjack = abstract_building(12, ({BOARDS: 1}, {WOOD: -1})) # there is no wood
+		self.smith = abstract_building(13, ({TOOLS: 1}, {CLAY: -1}))
+		self.carpenter = abstract_building(14, ({TOOLS: 2}, {BOARDS: -1}))
+		self.graph = ProductionGraph([self.brickyard, self.clay_pit, self.lumberjack, self.smith, self.carpenter])
+
+	def test_trees(self):
+		clay = self.graph.get_tree(CLAY)
+		self.assertEqual(((self.clay_pit.lines[CLAY], self.clay_pit, ()), ), clay)
+		self.assertEqual(((self.brickyard.lines[BRICKS], self.brickyard, ((CLAY, -2, clay), )), ), self.graph.get_tree(BRICKS))
+
+	def test_impossible_options(self):
+		self.assertIsNone(self.graph.get_tree(WOOD))
+		self.assertIsNone(self.graph.get_tree(BOARDS))
+		# only the smith can make tools
+		tree = self.graph.get_tree(TOOLS)
+		self.assertEqual([self.smith], [building for (_, building, _) in tree])
+
+	def test_trees_are_shared(self):
+		built, reused = ProductionGraph.trees_built, ProductionGraph.trees_reused
+		tree = self.graph.get_tree(BRICKS)
+		self.assertEqual((built + 2, reused), (ProductionGraph.trees_built, ProductionGraph.trees_reused))
+
+		self.assertIs(tree, self.graph.get_tree(BRICKS))
+		self.assertIs(tree[0][2][0][2], self.graph.get_tree(CLAY))
+		self.assertEqual((built + 2, reused + 2), (ProductionGraph.trees_built, ProductionGraph.trees_reused))
+
+	def test_chain(self):
+		settlement_manager = Mock(worldid=7)
+		chain = ProductionChain(settlement_manager, BRICKS, self.graph.get_tree(BRICKS)).chain
+		self.assertEqual(1, len(chain.options))
+		bricks = chain.options[0]
+		self.assertEqual((BRICKS, self.brickyard, 1.0), (bricks.resource_id, bricks.abstract_building, bricks.production_ratio))
+		self.assertEqual(1, len(bricks.children))
+
+		clay = bricks.children[0].options[0]
+		self.assertEqual((CLAY, self.clay_pit, 2.0), (clay.resource_id, clay.abstract_building, clay.production_ratio))
+		self.assertEqual('/7,1/1,10/2,11', clay.identifier)
@@ -0,0 +1,126 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from horizons.ai.aiplayer.sectionplancache import SectionPlanCache
+from horizons.constants import AI, VERSION
+
+
+def create_plan(section_coords_set, vertical_roads, horizontal_roads):
+	"""Plan a residence on every coordinate that isn't on a road, in the order of the section."""
+	plan = {}
+	for (x, y) in section_coords_set:
+		plan[(x, y)] = 'road' if x in vertical_roads or y in horizontal_roads else 'residence'
+	return (sum(1 for purpose in plan.values() if purpose == 'residence'), plan)
+
+
+def make_section(x, y, width, height):
+	coords = [(x + dx, y + dy) for dx in range(width) for dy in range(height)]
+	# a set with a different iteration order than the sorted coordinates
+	return set(coords[::-1])
+
+
+class TestSectionPlanCache(TestCase):
+
+	def setUp(self):
+		SectionPlanCache.clear_cache()
+		SectionPlanCache.hits = SectionPlanCache.misses = 0
+		self.create_plan = Mock(side_effect=create_plan)
+
+	def tearDown(self):
+		with patch.object(AI, 'VILLAGE_PLAN_CACHE', None):
+			SectionPlanCache.clear_cache()
+
+	def get_plan(self, section, vertical_roads, horizontal_roads, parameters=(1, 2)):
+		return SectionPlanCache.get_plan(section, vertical_roads, horizontal_roads, parameters, self.create_plan)
+
+	def test_reused_plan_is_created_plan(self):
+		section = make_section(10, 20, 4, 5)
+		created = self.get_plan(section, {12}, {19, 25})
+		reused = self.get_plan(section, {12}, {19, 25})
+		self.assertEqual(1, self.create_plan.call_count)
+		self.assertEqual(created[0], reused[0])
+		# the order of the coordinates has to be the same as the one of a created plan
+		self.assertEqual(list(created[1].items()), list(reused[1].items()))
+		self.assertEqual((1, 1), (SectionPlanCache.hits, SectionPlanCache.misses))
+
+	def test_moved_section(self):
+		self.get_plan(make_section(10, 20, 4, 5), {12}, {19})
+		moved = make_section(17, 17, 4, 5)
+		tents, plan = create_plan(moved, {19}, {16})
+		reused = self.get_plan(moved, {19}, {16})
+		self.assertEqual(tents, reused[0])
+		self.assertEqual(list(plan.items()), list(reused[1].items()))
+		self.assertEqual(1, self.create_plan.call_count)
+
+	def test_different_sections(self):
+		section = make_section(10, 20, 4, 5)
+		self.get_plan(section, {12}, set())
+		self.get_plan(section, {13}, set())
+		self.get_plan(section, {12}, set(), parameters=(1, 3))
+		self.get_plan(make_section(10, 20, 4, 4), {12}, set())
+		self.assertEqual(4, self.create_plan.call_count)
+
+		# roads that don't touch the section don't change the plan
+		self.get_plan(section, {12, 30}, {10})
+		self.assertEqual(4, self.create_plan.call_count)
+
+	def test_empty_plan(self):
+		section = make_section(0, 0, 2, 2)
+		self.create_plan.side_effect = lambda *args: (0, {})
+		self.assertEqual((0, {}), self.get_plan(section, set(), set()))
+		self.assertEqual((0, {}), self.get_plan(section, set(), set()))
+		self.assertEqual(1, self.create_plan.call_count)
+
+	def test_plans_are_kept_on_disk(self):
+		fd, filename = tempfile.mkstemp()
+		os.close(fd)
+		os.remove(filename)
+		self.addCleanup(lambda: os.path.exists(filename) and os.remove(filename))
+		section = make_section(10, 20, 4, 5)
+
+		with patch.object(AI, 'VILLAGE_PLAN_CACHE', filename):
+			created = self.get_plan(section, {12}, {19})
+			SectionPlanCache.clear_cache()
+			self.assertTrue(os.path.exists(filename))
+
+			self.assertEqual(created, self.get_plan(section, {12}, {19}))
+			self.assertEqual(1, self.create_plan.call_count)
+
+			# the plans of another version are ignored
+			SectionPlanCache.clear_cache()
+			with patch.object(VERSION, 'RELEASE_VERSION', 'another version'):
+				self.get_plan(section, {12}, {19})
+			self.assertEqual(2, self.create_plan.call_count)
+
+	def test_broken_file_is_ignored(self):
+		fd, filename = tempfile.mkstemp()
+		os.write(fd, b'not a pickle')
+		os.close(fd)
+		self.addCleanup(os.remove, filename)
+
+		with patch.object(AI, 'VILLAGE_PLAN_CACHE', filename):
+			section = make_section(0, 0, 3, 3)
+			self.assertEqual(create_plan(section, {1}, set()), self.get_plan(section, {1}, set()))
@@ -0,0 +1,72 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from horizons.gui.widgets.routeconfig import RouteConfig
+from horizons.manager import MPManager
+from horizons.scheduler import Scheduler
+
+
+class TestRouteConfigInit(TestCase):
+	"""The gui is initialized once the route created by the window exists."""
+
+	def setUp(self):
+		Scheduler.create_instance(Mock())
+		self.scheduler = Scheduler()
+		self.scheduler.before_ticking()
+		self.instance = Mock(spec=['session'])
+
+		with patch('horizons.gui.widgets.routeconfig.CreateRoute'), \
+		     patch.object(RouteConfig, 'session'), \
+		     patch.object(RouteConfig, '_init_gui') as init_gui:
+			self.route_config = RouteConfig(Mock(), self.instance)
+		self.init_gui = init_gui
+
+	def tearDown(self):
+		Scheduler.destroy_instance()
+
+	def run_ticks(self, ticks):
+		with patch.object(RouteConfig, '_init_gui', self.init_gui):
+			for _ in range(ticks):
+				self.scheduler.tick(self.scheduler.cur_tick + 1)
+
+	def test_init_when_route_exists(self):
+		self.run_ticks(3)
+		self.assertFalse(self.init_gui.called)
+		self.instance.route = Mock()
+		self.run_ticks(1)
+		self.init_gui.assert_called_once_with()
+		self.assertEqual(0, self.scheduler.pending_ticks())
+
+	def test_stop_waiting_for_route(self):
+		self.run_ticks(MPManager.MAX_EXECUTIONDELAY + 3)
+		self.assertFalse(self.init_gui.called)
+		self.assertEqual(0, self.scheduler.pending_ticks())
+
+	def test_hide_before_route_exists(self):
+		self.run_ticks(1)
+		self.route_config.hide()
+		self.assertFalse(self.scheduler.get_classinst_calls(self.route_config))
+		self.instance.route = Mock()
+		self.run_ticks(2)
+		self.assertFalse(self.init_gui.called)
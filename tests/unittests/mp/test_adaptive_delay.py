@@ -0,0 +1,62 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from development.mp_loopback import run_game
+from horizons.manager import LatencyEstimator, MPManager
+
+
+def test_high_latency():
+	fixed = run_game(seconds=30, latency=0.4, adaptive=False)
+	adaptive = run_game(seconds=30, latency=0.4)
+	for result in (fixed, adaptive):
+		assert result['in_sync']
+		assert result['out_of_sync_popups'] == 0
+
+	# the packets need more than EXECUTIONDELAY ticks, the fixed delay stops all the time
+	assert fixed['stutters'] > 30
+	assert adaptive['stutters'] <= 5
+	assert adaptive['ticks'] > 1.5 * fixed['ticks']
+	assert adaptive['execution_delay'][0] == adaptive['execution_delay'][1] > MPManager.EXECUTIONDELAY
+
+
+def test_jitter_and_loss():
+	result = run_game(players=3, seconds=30, latency=0.2, jitter=0.15, loss=0.05)
+	assert result['in_sync']
+	assert result['out_of_sync_popups'] == 0
+	assert result['commands'] > 150
+	assert result['ticks'] > 0.8 * 30 * 16
+
+
+def test_delay_follows_latency():
+	result = run_game(seconds=40, latency=0.4, network_changes={15: dict(latency=0.02)})
+	assert result['in_sync']
+	delays = result['execution_delay_per_second']
+	assert max(delays[:15]) >= 8
+	assert delays[-1] <= MPManager.EXECUTIONDELAY
+
+
+def test_latency_estimator():
+	estimator = LatencyEstimator()
+	for send_tick in range(50):
+		estimator.add_sample(send_tick, 0.45)
+		estimator.add_sample(send_tick, 5.0) # same packet acknowledged again
+	assert abs(estimator.round_trip_time - 0.45) < 0.01
+	assert estimator.get_required_delay(16) == 4
@@ -0,0 +1,71 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import mock
+
+from horizons.manager import CheckupHashPacket, CheckupSubHashPacket, CommandPacket, MPManager
+from horizons.util.statechecksum import StateChecksum
+
+
+def test_divergence_drill_down():
+	session = mock.Mock()
+	session.world.player.worldid = 1
+	session.world.players = [1, 2]
+	session.random.random.return_value = 0.5
+	network = mock.Mock()
+	network.receive_all.return_value = []
+	manager = MPManager(session, network)
+	assert StateChecksum.current is manager.checksum
+
+	manager.checksum.add(StateChecksum.UNITS, 1000001, 5, 5)
+	manager.can_tick(2) # computes the checksum for tick 6
+	local_hash, = manager.checkuphashmanager.get_packets_for_tick(6, remove_returned_commands=False)
+	assert local_hash.tick == 6
+	assert isinstance(local_hash.checkup_hash, int)
+
+	# the other player has a different unit position
+	other = StateChecksum()
+	other.add(StateChecksum.UNITS, 1000001, 5, 6)
+	other_sub_hashes = other.get_sub_hashes(0.5)
+	manager.checkuphashmanager.add_packet(
+	        CheckupHashPacket(6, 2, StateChecksum.get_digest(other_sub_hashes)))
+	network.send_packet.reset_mock()
+	with mock.patch.object(manager, 'hash_value_diff') as hash_value_diff:
+		manager.hash_value_check(6)
+		assert session.ingame_gui.open_error_popup.called
+
+		# the sub hashes are sent right away
+		((sent, ), _), = network.send_packet.call_args_list
+		sub_hash_packet = sent[-1]
+		assert type(sub_hash_packet) is CheckupSubHashPacket
+		assert sub_hash_packet.checkup_hash['units'] != other_sub_hashes['units']
+		assert sub_hash_packet.checkup_hash['storage'] == other_sub_hashes['storage']
+		hash_value_diff.reset_mock()
+
+		# compared as soon as the other player's arrive
+		network.receive_all.return_value = [CommandPacket(7, 2, []),
+		                                    CheckupSubHashPacket(6, 2, other_sub_hashes)]
+		manager.can_tick(3)
+		(_, local, _, remote), _ = hash_value_diff.call_args
+		assert (local, remote) == (sub_hash_packet.checkup_hash, other_sub_hashes)
+
+	manager.end()
+	assert StateChecksum.current is None
@@ -0,0 +1,123 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import mock
+
+import pytest
+
+from horizons.command.building import Build
+from horizons.command.unit import Act
+from horizons.manager import CheckupHashPacket, CommandPacket, MPManager
+from horizons.network import packets
+from horizons.network.codec import BinaryCodec, DecodeError, EncodeError
+
+
+class Unregistered:
+	pass
+
+
+def test_values():
+	value = [None, True, False, 0, 191, 192, -1, 2 ** 70, -2 ** 70, 0.25, 'näme', b'\x00\xff',
+	         (1, 'a'), {3, 4}, {(1, 2): ['x', {'y': None}]}, []]
+	assert BinaryCodec.loads(BinaryCodec.dumps(value)) == value
+
+
+def test_commands():
+	unit = mock.Mock(worldid=1234)
+	commands = [Act(unit, 10.5, 20), Build(3, 10, 12, unit, settlement=unit, tearset={5, 6})]
+	batch = [CommandPacket(1004, 3, commands), CheckupHashPacket(1004, 3, {'rngvalue': 0.5})]
+
+	decoded = BinaryCodec.loads(BinaryCodec.dumps(batch))
+	assert [type(packet) for packet in decoded] == [CommandPacket, CheckupHashPacket]
+	assert (decoded[0].tick, decoded[0].player_id) == (1004, 3)
+	assert [type(command) for command in decoded[0].commandlist] == [Act, Build]
+	assert [vars(command) for command in decoded[0].commandlist] == [vars(command) for command in commands]
+	assert decoded[1].checkup_hash == {'rngvalue': 0.5}
+
+
+def test_strings_are_interned():
+	# method names of the commands are known to both sides
+	assert len(BinaryCodec.dumps('go')) < len(BinaryCodec.dumps('og'))
+	# other strings are only written once
+	once = len(BinaryCodec.dumps(['inhabitants']))
+	assert len(BinaryCodec.dumps(['inhabitants'] * 3)) <= once + 4
+
+
+def test_unregistered_class():
+	with pytest.raises(EncodeError):
+		BinaryCodec.dumps([Unregistered()])
+
+	# game data containing it is pickled instead
+	data = packets.client.game_data([1, 2], binary=True).serialize()
+	assert BinaryCodec.is_encoded(data)
+	packet = CommandPacket(1004, 3, [Act(mock.Mock(worldid=1), 1, 2)])
+	packet.commandlist[0].args = (set, )
+	data = packets.client.game_data([packet], binary=True).serialize()
+	assert not BinaryCodec.is_encoded(data)
+
+
+def test_malformed_data():
+	data = BinaryCodec.dumps([CommandPacket(1004, 3, [Act(mock.Mock(worldid=1234), 1, 2)]), 'näme'])
+	for end in range(len(data)):
+		with pytest.raises(DecodeError):
+			BinaryCodec.loads(data[:end])
+	with pytest.raises(DecodeError):
+		BinaryCodec.loads(data + b'\x00')
+	with pytest.raises(DecodeError):
+		BinaryCodec.loads(data[:1] + bytes([data[1] ^ 1]) + data[2:])
+	with pytest.raises(DecodeError):
+		BinaryCodec.loads(data[:3] + b'\x0b\x7f\x00')
+
+
+def test_manager_batching_and_negotiation():
+	session = mock.Mock()
+	session.world.player.worldid = 1
+	session.world.players = [1, 2]
+	session.random.random.return_value = 0.5
+	network = mock.Mock()
+	network.receive_all.return_value = []
+	manager = MPManager(session, network)
+
+	# without commands, the packets of two ticks are sent together
+	manager.can_tick(0)
+	assert not network.send_packet.called
+	manager.can_tick(1)
+	((sent, ), kwargs), = network.send_packet.call_args_list
+	assert [type(packet) for packet in sent] == [CommandPacket, CheckupHashPacket, CommandPacket]
+	assert kwargs == {'binary': False}
+	assert sent[0].codec == BinaryCodec.get_schema_id()
+
+	# the other player announces the same codec
+	network.send_packet.reset_mock()
+	network.receive_all.return_value = [CommandPacket(6, 2, [], codec=BinaryCodec.get_schema_id())]
+	manager.gamecommands.append(Act(mock.Mock(worldid=1234), 1, 2))
+	manager.can_tick(2)
+	((sent, ), kwargs), = network.send_packet.call_args_list
+	assert kwargs == {'binary': True}
+	assert sent[0].codec is None
+
+	# the next tick can't be executed yet: don't wait before sending
+	network.send_packet.reset_mock()
+	network.receive_all.return_value = []
+	with mock.patch('horizons.manager.WorldObject'): # the packets are logged with their player
+		manager.can_tick(4)
+	assert network.send_packet.called
+	manager.end()
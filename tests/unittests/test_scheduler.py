@@ -217,3 +217,75 @@ class TestScheduler(TestCase):
 		self.assertEqual(2, self.scheduler.get_remaining_ticks(instance, self.callback))
 		self.scheduler.tick(Scheduler.FIRST_TICK_ID + 2)
 		self.assertEqual(1, self.scheduler.get_remaining_ticks(instance, self.callback))
+
+	def test_far_future_callbacks_keep_insertion_order(self):
+		self.scheduler.before_ticking()
+		calls = []
+		far = Scheduler.WHEEL_SIZE + 10
+		# added while the tick is beyond the wheel
+		self.scheduler.add_new_object(lambda: calls.append(1), None, run_in=far)
+		self.scheduler.add_new_object(lambda: calls.append(2), None, run_in=far)
+		for i in range(Scheduler.FIRST_TICK_ID, 20):
+			self.scheduler.tick(i)
+		# added while the tick is in the wheel
+		self.scheduler.add_new_object(lambda: calls.append(3), None, run_in=far - 20)
+
+		# all three are due at tick far - 1, since the first two were added before the first tick
+		for i in range(20, far - 1):
+			self.scheduler.tick(i)
+		self.assertEqual([], calls)
+		self.scheduler.tick(far - 1)
+		self.assertEqual([1, 2, 3], calls)
+
+	def test_periodic_callback_with_long_interval(self):
+		self.scheduler.before_ticking()
+		interval = Scheduler.WHEEL_SIZE * 2 + 3
+		self.scheduler.add_new_object(self.callback, None, run_in=1, loops=3, loop_interval=interval)
+		ticks = []
+		for i in range(Scheduler.FIRST_TICK_ID, 3 * interval):
+			self.scheduler.tick(i)
+			if self.callback.called:
+				ticks.append(i)
+				self.callback.reset_mock()
+		self.assertEqual([0, interval, 2 * interval], ticks)
+
+	def test_remove_and_readd_object(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		self.scheduler.add_new_object(self.callback, instance, run_in=2)
+		callback_obj = next(iter(self.scheduler.get_classinst_calls(instance)))
+		self.assertEqual(1, self.scheduler.rem_object(callback_obj))
+		callback_obj.run_in = 3
+		self.scheduler.add_object(callback_obj)
+
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID + 1)
+		self.assertFalse(self.callback.called)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID + 2)
+		self.callback.assert_called_once_with()
+		self.assertEqual({}, self.scheduler.get_classinst_calls(instance))
+
+	def test_pending_ticks(self):
+		# an empty scheduler is still true, see tests.gui.helper
+		self.assertTrue(self.scheduler)
+		self.assertEqual(0, self.scheduler.pending_ticks())
+		self.scheduler.add_new_object(self.callback, None, run_in=2)
+		self.scheduler.add_new_object(self.callback, None, run_in=Scheduler.WHEEL_SIZE + 5)
+		self.assertEqual(2, self.scheduler.pending_ticks())
+
+	def test_profiler_runs_callbacks(self):
+		profiler = Mock()
+		profiler.run_callback.side_effect = lambda callback_obj: callback_obj.callback()
+		self.scheduler.set_profiler(profiler)
+		self.scheduler.add_new_object(self.callback, None, run_in=0)
+		self.scheduler.before_ticking()
+		self.scheduler.add_new_object(self.callback, None, run_in=1)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.assertEqual(2, profiler.run_callback.call_count)
+		self.assertEqual(2, self.callback.call_count)
+
+		self.scheduler.set_profiler(None)
+		self.scheduler.add_new_object(self.callback, None, run_in=1)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID + 1)
+		self.assertEqual(2, profiler.run_callback.call_count)
+		self.assertEqual(3, self.callback.call_count)
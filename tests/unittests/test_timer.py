@@ -170,3 +170,14 @@ class TestTimer(TestCase):
 		self.timer.add_test(self.test)
 		self.timer.check_tick()
 		self.assertFalse(self.callback.called)
+
+	def test_pacing_slows_ticks_down(self):
+		self.timer.pacing = 0.5
+		self.timer.check_tick()
+		self.callback.reset_mock()
+		self.clock.return_value = self.TIME_START + (1.0 * self.TIME_TICK)
+		self.timer.check_tick()
+		self.assertFalse(self.callback.called)
+		self.clock.return_value = self.TIME_START + (2.0 * self.TIME_TICK)
+		self.timer.check_tick()
+		self.callback.assert_called_once_with(TestTimer.TICK_START + 1)
@@ -0,0 +1,77 @@
+# ###################################################
+# Copyright (C) 2008-2016 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from horizons.util.backgroundsave import BackgroundSave
+from horizons.util.dbreader import DbReader
+from horizons.util.uhdbaccessor import read_savegame_template
+
+
+class TestBackgroundSave(TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.savegame = os.path.join(self.directory, 'test.sqlite')
+		self.snapshot = DbReader(':memory:', check_same_thread=False)
+		read_savegame_template(self.snapshot)
+		self.snapshot("INSERT INTO name(rowid, name) VALUES(?, ?)", 12, 'Frigate')
+		self.snapshot("INSERT INTO name(rowid, name) VALUES(?, ?)", 3, 'Warehouse')
+		self.snapshot("INSERT INTO storage(object, resource, amount) VALUES(?, ?, ?)", 12, 4, 30)
+		self.snapshot("INSERT INTO metadata_blob(name, value) VALUES(?, ?)", 'screen', b'\x00\x01')
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_write(self):
+		cleaned_up = []
+		save = BackgroundSave(self.snapshot, self.savegame, cleanup=lambda: cleaned_up.append(True))
+		save.start()
+		save.wait()
+		self.assertTrue(save.done)
+		self.assertIsNone(save.error)
+		self.assertEqual(cleaned_up, [True])
+		self.assertEqual(os.listdir(self.directory), ['test.sqlite'])
+
+		db = DbReader(self.savegame)
+		self.assertEqual(db("SELECT rowid, name FROM name ORDER BY rowid"), [(3, 'Warehouse'), (12, 'Frigate')])
+		self.assertEqual(db("SELECT * FROM storage"), [(12, 4, 30)])
+		self.assertEqual(db("SELECT value FROM metadata_blob"), [(b'\x00\x01', )])
+		db.close()
+
+	def test_failure_keeps_old_savegame(self):
+		with open(self.savegame, 'w') as f:
+			f.write('old')
+		self.snapshot("DROP TABLE storage")
+		self.snapshot("CREATE TABLE storage (object INT, broken INT)")
+		cleaned_up = []
+		save = BackgroundSave(self.snapshot, self.savegame, cleanup=lambda: cleaned_up.append(True))
+		save.start()
+		save.wait()
+		self.assertIn('OperationalError', save.error)
+		self.assertEqual(cleaned_up, [])
+		self.assertEqual(os.listdir(self.directory), ['test.sqlite'])
+		with open(self.savegame) as f:
+			self.assertEqual(f.read(), 'old')
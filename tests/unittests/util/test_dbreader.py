@@ -0,0 +1,77 @@
+# ###################################################
+# Copyright (C) 2008-2016 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from unittest import TestCase
+
+from horizons.util.dbreader import BatchedDbWriter
+
+
+class TestBatchedDbWriter(TestCase):
+
+	def setUp(self):
+		self.db = BatchedDbWriter(':memory:')
+		self.db.execute_script("""
+			CREATE TABLE storage (object INTEGER, resource INTEGER, amount INTEGER);
+			CREATE TABLE name (rowid INTEGER PRIMARY KEY, name TEXT);
+		""")
+
+	def tearDown(self):
+		self.db.close()
+
+	def test_inserts_are_buffered(self):
+		db = self.db
+		db("BEGIN")
+		self.assertEqual(db("INSERT INTO storage(object, resource, amount) VALUES(?, ?, ?)", 1, 2, 3), [])
+		db("INSERT INTO name(rowid, name) VALUES(?, ?)", 5, 'a')
+		db("INSERT INTO storage (object, resource, amount) VALUES(?, ?, ?)", 1, 4, 5)
+		db("INSERT OR REPLACE INTO name(rowid, name) VALUES(?, ?)", 5, 'b')
+		self.assertEqual(db.cur.execute("SELECT count(*) FROM storage").fetchall(), [(0, )])
+
+		# any other command writes the buffered rows first, in the order of insertion
+		self.assertEqual(db("SELECT rowid, resource FROM storage"), [(1, 2), (2, 4)])
+		self.assertEqual(db("SELECT rowid, name FROM name"), [(5, 'b')])
+		db("COMMIT")
+
+	def test_full_buffer(self):
+		db = self.db
+		for i in range(db.BATCH_SIZE + 10):
+			db("INSERT INTO storage(object, resource, amount) VALUES(?, ?, ?)", i, 0, 0)
+		self.assertEqual(db.cur.execute("SELECT count(*) FROM storage").fetchall(), [(db.BATCH_SIZE, )])
+		db.flush()
+		self.assertEqual(db.cur.execute("SELECT count(*) FROM storage").fetchall(), [(db.BATCH_SIZE + 10, )])
+
+	def test_insert_select_is_not_buffered(self):
+		db = self.db
+		db("INSERT INTO name(rowid, name) VALUES(?, ?)", 1, 'a')
+		db("INSERT INTO storage(object, resource, amount) SELECT rowid, 0, 0 FROM name")
+		self.assertEqual(db("SELECT object FROM storage"), [(1, )])
+
+	def test_update_keeps_order(self):
+		db = self.db
+		db("INSERT INTO name(rowid, name) VALUES(?, ?)", 1, 'a')
+		db("UPDATE name SET name = ? WHERE rowid = ?", 'b', 1)
+		db("INSERT INTO storage(object, resource, amount) VALUES(?, ?, ?)", 1, 2, 3)
+		db("DELETE FROM storage WHERE object = ?", 1)
+		db("INSERT INTO name(rowid, name) VALUES(?, ?)", 2, 'c')
+		self.assertEqual(db.cur.execute("SELECT count(*) FROM name").fetchall(), [(0, )])
+		self.assertEqual(db("SELECT rowid, name FROM name"), [(1, 'b'), (2, 'c')])
+		self.assertEqual(db("SELECT * FROM storage"), [])
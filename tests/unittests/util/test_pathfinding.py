@@ -0,0 +1,193 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+
+import pytest
+
+from horizons.util.pathfinding.hierarchical import ClusterGraph, HierarchicalFindPath
+from horizons.util.pathfinding.nodegrid import NodeGrid
+from horizons.util.pathfinding.pathcache import PathCache
+from horizons.util.pathfinding.pathfinding import FindPath, GridFindPath
+from horizons.util.shapes import Point, Rect
+
+
+def create_map(seed, width=30, height=20, density=0.3):
+	rng = random.Random(seed)
+	rect = Rect.init_from_borders(-3, 5, width - 4, height + 4)
+	nodes = {coords: 1.0 for coords in rect.tuple_iter() if rng.random() > density}
+	return rect, nodes, rng
+
+
+def test_node_grid_mirrors_dict():
+	rect = Rect.init_from_borders(0, 0, 4, 4)
+	grid = NodeGrid(rect, [(0, 0), (1, 1)])
+	assert grid == {(0, 0): 1.0, (1, 1): 1.0}
+	assert grid.walkable[grid.get_index((1, 1))]
+
+	grid[(7, 7)] = 1.0
+	grid[(3, 0)] = 2.0
+	assert grid.outside_nodes == 1
+	assert list(grid) == [(0, 0), (1, 1), (3, 0), (7, 7)]
+	assert len(grid) == 4
+	assert grid.get((3, 0)) == 2.0 and grid.get((3, 1)) is None
+	del grid[(3, 0)]
+	del grid[(7, 7)]
+	del grid[(1, 1)]
+	assert grid.outside_nodes == 0
+	assert not grid.walkable[grid.get_index((1, 1))]
+	assert grid.get_coords(grid.get_index((3, 2))) == (3, 2)
+
+	copied = grid.copy()
+	copied[(2, 2)] = 1.0
+	assert (2, 2) not in grid
+	assert not grid.walkable[grid.get_index((2, 2))]
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('diagonal', [True, False])
+@pytest.mark.parametrize('make_target_walkable', [True, False])
+def test_grid_find_path_matches_find_path(seed, diagonal, make_target_walkable):
+	rect, nodes, rng = create_map(seed)
+	grid = NodeGrid(rect, nodes)
+	coords = sorted(rect.tuple_iter())
+	blocked = dict.fromkeys(rng.sample(coords, 15))
+
+	# run several searches on the same grid to exercise reuse of the search state
+	for i in range(10):
+		source = Point(*rng.choice(coords))
+		x, y = rng.choice(coords)
+		destination = Rect.init_from_borders(x, y, min(x + 1, rect.right), y)
+		expected = FindPath()(source, destination, nodes, blocked, diagonal, make_target_walkable)
+		path = GridFindPath()(source, destination, grid, blocked, diagonal, make_target_walkable)
+		assert path == expected
+
+
+def test_grid_find_path_leaving_grid():
+	"""Searches that start outside of the grid use the generic implementation."""
+	rect = Rect.init_from_borders(0, 0, 5, 0)
+	grid = NodeGrid(rect, rect.tuple_iter())
+	path = GridFindPath()(Point(-1, 0), Point(5, 0), grid)
+	assert path == [(-1, 0), (0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0)]
+
+
+def create_sea(seed, size=100):
+	"""Water with some square islands in it."""
+	rng = random.Random(seed)
+	rect = Rect.init_from_borders(0, 0, size - 1, size - 1)
+	nodes = dict.fromkeys(rect.tuple_iter(), 1.0)
+	for i in range(12):
+		x, y = rng.randrange(size - 15), rng.randrange(size - 15)
+		for coords in Rect.init_from_borders(x, y, x + rng.randrange(4, 15), y + rng.randrange(4, 15)).tuple_iter():
+			nodes.pop(coords, None)
+	return rect, NodeGrid(rect, nodes), rng
+
+
+def assert_valid_path(path, source, destination, nodes):
+	assert path[0] == source.to_tuple()
+	assert path[-1] in destination.get_coordinates()
+	for (x1, y1), (x2, y2) in zip(path, path[1:]):
+		assert max(abs(x1 - x2), abs(y1 - y2)) == 1
+		assert (x2, y2) in nodes
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_hierarchical_find_path(seed):
+	rect, nodes, rng = create_sea(seed)
+	graph = ClusterGraph(nodes)
+	water = sorted(nodes)
+	for i in range(10):
+		source = Point(*rng.choice(water))
+		destination = Point(*rng.choice(water))
+		expected = GridFindPath()(source, destination, nodes, [], True, False)
+		path = HierarchicalFindPath(graph)(source, destination, nodes, [], True, False)
+		if expected is None:
+			assert path is None
+			continue
+		assert_valid_path(path, source, destination, nodes)
+		# the abstract path may be suboptimal, but not by much
+		assert len(path) <= len(expected) * 1.5 + 2
+
+
+def test_cluster_graph_update_tiles():
+	rect, nodes, rng = create_sea(1)
+	graph = ClusterGraph(nodes)
+	changed = [(x, y) for x in range(30, 40) for y in range(10, 50)]
+	for coords in changed:
+		nodes.pop(coords, None)
+	graph.update_tiles(changed)
+
+	fresh = ClusterGraph(nodes)
+	assert dict(graph.links) == dict(fresh.links)
+	assert {k: v for k, v in graph.entrances.items() if v} == {k: v for k, v in fresh.entrances.items() if v}
+
+
+def test_path_cache():
+	rect = Rect.init_from_borders(0, 0, 9, 0)
+	nodes = NodeGrid(rect, rect.tuple_iter())
+	cache = PathCache(size=2)
+	calls = []
+
+	def find_path(*args):
+		calls.append(args)
+		return GridFindPath()(*args)
+
+	path = cache.find_path(find_path, Point(0, 0), Point(5, 0), nodes)
+	assert path == [(x, 0) for x in range(6)]
+	assert cache.find_path(find_path, Point(0, 0), Point(5, 0), nodes) == path
+	assert len(calls) == 1
+	assert (cache.hits, cache.misses) == (1, 1)
+
+	# returned paths are copies
+	path.pop()
+	assert cache.find_path(find_path, Point(0, 0), Point(5, 0), nodes) == [(x, 0) for x in range(6)]
+
+	# blocked coords are part of the key
+	assert cache.find_path(find_path, Point(0, 0), Point(5, 0), nodes, {(3, 0): None}) is None
+	assert len(calls) == 2
+
+	# changing the nodes invalidates the path
+	version = nodes.version
+	del nodes[(9, 0)]
+	assert nodes.version > version
+	cache.find_path(find_path, Point(0, 0), Point(5, 0), nodes)
+	assert len(calls) == 3
+
+	# least recently used paths are dropped
+	cache.find_path(find_path, Point(1, 0), Point(5, 0), nodes)
+	cache.find_path(find_path, Point(2, 0), Point(5, 0), nodes)
+	assert len(cache) == 2
+	cache.find_path(find_path, Point(0, 0), Point(5, 0), nodes)
+	assert len(calls) == 6
+	assert cache.get_stats()['hits'] == 2
+
+
+def test_path_cache_detour():
+	"""A detour around blocked coords isn't used once they aren't blocked anymore."""
+	rect = Rect.init_from_borders(0, 0, 9, 1)
+	nodes = NodeGrid(rect, rect.tuple_iter())
+	cache = PathCache()
+
+	detour = cache.find_path(GridFindPath(), Point(0, 0), Point(5, 0), nodes, {(3, 0): None})
+	assert (3, 0) not in detour
+	assert cache.find_path(GridFindPath(), Point(0, 0), Point(5, 0), nodes, {(3, 0): None}) == detour
+	assert cache.hits == 1
+	assert cache.find_path(GridFindPath(), Point(0, 0), Point(5, 0), nodes) == [(x, 0) for x in range(6)]
@@ -0,0 +1,90 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from horizons.constants import VERSION
+from horizons.util.dbreader import DbReader
+from horizons.util.savegameaccessor import SavegameAccessor
+from horizons.util.uhdbaccessor import read_savegame_template
+
+
+class TestSavegameAccessor(TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		map_file = os.path.join(self.directory, 'map.sqlite')
+		db = DbReader(map_file)
+		with open('content/map-template.sql') as map_template:
+			db.execute_script(map_template.read())
+		db.close()
+
+		self.savegame = os.path.join(self.directory, 'test.sqlite')
+		db = DbReader(self.savegame)
+		read_savegame_template(db)
+		db("INSERT INTO metadata(name, value) VALUES(?, ?)", 'savegamerev', VERSION.SAVEGAMEREVISION)
+		db("INSERT INTO metadata(name, value) VALUES(?, ?)", 'map_name', map_file)
+		db("INSERT INTO settlement(rowid, owner, island) VALUES(?, ?, ?)", 20, 1, 1001)
+		db("INSERT INTO building(rowid, type, x, y, location, rotation, level) VALUES(?, ?, ?, ?, ?, ?, ?)", 30, 1, 5, 6, 20, 45, 0)
+		db("INSERT INTO building(rowid, type, x, y, location, rotation, level) VALUES(?, ?, ?, ?, ?, ?, ?)", 31, 3, 8, 6, 20, 45, 1)
+		db("INSERT INTO remaining_ticks_of_month(rowid, ticks) VALUES(?, ?)", 30, 120)
+		db("INSERT INTO unit(rowid, type, x, y, owner) VALUES(?, ?, ?, ?, ?)", 40, 1000001, 7, 8, 30)
+		db("INSERT INTO name(rowid, name) VALUES(?, ?)", 40, 'Frigate')
+		db("INSERT INTO collector(rowid, state, remaining_ticks, start_hidden) VALUES(?, ?, ?, ?)", 40, 2, 16, 0)
+		db("INSERT INTO collector_job(collector, object, resource, amount) VALUES(?, ?, ?, ?)", 40, 31, 4, 6)
+		db("INSERT INTO collector_job(collector, object, resource, amount) VALUES(?, ?, ?, ?)", 40, 31, 5, 2)
+		db.close()
+
+		self.db = SavegameAccessor(self.savegame, False)
+
+	def tearDown(self):
+		self.db.close()
+		shutil.rmtree(self.directory)
+
+	def test_preloaded_rows(self):
+		db = self.db
+		self.assertEqual(db.get_buildings_by_location(20), [(30, 1), (31, 3)])
+		self.assertEqual(db.get_buildings_by_location(1001), [])
+		self.assertEqual(db.get_settlements_by_island(1001), [20])
+		self.assertEqual(db.get_remaining_ticks_of_month(30), 120)
+		self.assertIsNone(db.get_remaining_ticks_of_month(31))
+		self.assertEqual(db.get_unit_row(40), (7, 8, 30))
+		self.assertEqual(db.get_unit_owner(40), 30)
+		self.assertEqual(db.get_name(40), 'Frigate')
+		self.assertEqual(db.get_collector_row(40), (2, 16, 0))
+		self.assertEqual(db.get_collector_job_rows(40), [(31, 4, 6), (31, 5, 2)])
+		self.assertEqual(db.get_collector_job_rows(41), [])
+
+	def test_query_counts(self):
+		counts = dict(self.db.get_query_counts())
+		# every preloaded table is read once
+		for table in ('building', 'settlement', 'unit', 'collector', 'collector_job', 'name'):
+			self.assertEqual(counts[table], 1, table)
+
+		self.db("SELECT state FROM collector WHERE rowid = ?", 40)
+		self.db("SELECT c.state, j.amount FROM collector c JOIN collector_job j ON j.collector = c.rowid")
+		counts = dict(self.db.get_query_counts())
+		self.assertEqual(counts['collector'], 3)
+		self.assertEqual(counts['collector_job'], 2)
@@ -0,0 +1,80 @@
+# ###################################################
+# Copyright (C) 2008-2016 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+from unittest import TestCase
+
+from horizons.util.shapes import Circle, Point
+from horizons.util.spatialhash import SpatialHash
+
+
+class Unit:
+	def __init__(self, x, y):
+		self.position = Point(x, y)
+
+
+class TestSpatialHash(TestCase):
+
+	def setUp(self):
+		self.index = SpatialHash(cell_size=4)
+
+	def add(self, x, y):
+		unit = Unit(x, y)
+		self.index.add(unit, unit.position)
+		return unit
+
+	def move(self, unit, x, y):
+		unit.position = Point(x, y)
+		self.index.move(unit, unit.position)
+
+	def test_query_matches_linear_scan(self):
+		rng = random.Random(42)
+		units = [self.add(rng.randint(-20, 40), rng.randint(-20, 40)) for _ in range(200)]
+		for unit in units[::3]:
+			self.move(unit, rng.randint(-20, 40), rng.randint(-20, 40))
+		for unit in units[::7]:
+			self.index.remove(unit)
+			units.remove(unit)
+
+		for radius in (0, 1, 2.5, 5, 13, 100):
+			for _ in range(20):
+				center = Point(rng.randint(-25, 45), rng.randint(-25, 45))
+				circle = Circle(center, radius)
+				expected = [unit for unit in units if circle.contains(unit.position)]
+				self.assertEqual(expected, self.index.get_in_circle(center, radius))
+
+	def test_nearest(self):
+		a = self.add(0, 0)
+		b = self.add(3, 4)
+		c = self.add(-3, 4)
+		self.assertIs(a, self.index.get_nearest(Point(1, 1), 10))
+		# b and c are equally far away, b was added first
+		self.assertIs(b, self.index.get_nearest(Point(0, 4), 10, lambda unit: unit is not a))
+		self.assertIs(c, self.index.get_nearest(Point(0, 4), 10, lambda unit: unit is c))
+		self.assertIsNone(self.index.get_nearest(Point(20, 20), 5))
+
+	def test_remove(self):
+		a = self.add(1, 1)
+		self.move(a, 9, 9)
+		self.index.remove(a)
+		self.assertNotIn(a, self.index)
+		self.assertEqual(0, len(self.index))
+		self.assertEqual([], self.index.get_in_circle(Point(9, 9), 3))
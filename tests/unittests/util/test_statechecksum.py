@@ -0,0 +1,82 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import pytest
+
+from horizons.util.statechecksum import StateChecksum
+from horizons.world.storage import PositiveSizedSlotStorage, PositiveTotalNumSlotsStorage
+
+
+@pytest.fixture
+def checksum():
+	yield StateChecksum.start()
+	StateChecksum.stop()
+
+
+def test_order_does_not_matter():
+	a, b = StateChecksum(), StateChecksum()
+	a.add(StateChecksum.BUILDINGS, 3, 10, 12)
+	a.add(StateChecksum.BUILDINGS, 4, 10, 12)
+	b.add(StateChecksum.BUILDINGS, 4, 10, 12)
+	b.add(StateChecksum.BUILDINGS, 3, 10, 12)
+	assert a.hashes == b.hashes
+
+	# same values, different subsystem
+	b.remove(StateChecksum.BUILDINGS, 4, 10, 12)
+	b.add(StateChecksum.UNITS, 4, 10, 12)
+	assert a.hashes != b.hashes
+
+	b.replace(StateChecksum.UNITS, (4, 10, 12), (4, 11, 12))
+	b.remove(StateChecksum.UNITS, 4, 11, 12)
+	b.add(StateChecksum.BUILDINGS, 4, 10, 12)
+	assert a.hashes == b.hashes
+
+
+def test_digest():
+	a = StateChecksum().get_sub_hashes(0.5)
+	b = StateChecksum().get_sub_hashes(0.5)
+	assert StateChecksum.get_digest(a) == StateChecksum.get_digest(b) < 2 ** 64
+	b['storage'] ^= 1
+	assert StateChecksum.get_digest(a) != StateChecksum.get_digest(b)
+	assert StateChecksum.get_digest(a) != StateChecksum.get_digest(StateChecksum().get_sub_hashes(0.25))
+
+
+def test_storages_are_tracked(checksum):
+	ship = PositiveTotalNumSlotsStorage(100, 2)
+	warehouse = PositiveSizedSlotStorage(30)
+	warehouse.alter(6, 20)
+	ship.alter(6, 20)
+	ship.alter(5, 10)
+	assert checksum.hashes[StateChecksum.STORAGE] != 0
+
+	# the same contents in a different order have the same hash
+	other = StateChecksum()
+	other.update_storage(5, 0, 10)
+	other.update_storage(6, 0, 40)
+	other.update_storage(6, 40, 20)
+	other.update_storage(6, 0, 20)
+	assert other.hashes == checksum.hashes
+
+	warehouse.adjust_limit(-20)
+	ship.alter(5, -50)
+	ship.reset(6)
+	warehouse.reset_all()
+	assert checksum.hashes == [0, 0, 0]
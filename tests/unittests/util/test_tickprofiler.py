@@ -0,0 +1,104 @@
+# ###################################################
+# Copyright (C) 2008-2016 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import csv
+import io
+import json
+from unittest import TestCase
+from unittest.mock import Mock
+
+from horizons.scheduler import Scheduler
+from horizons.util.python.callback import Callback
+from horizons.util.tickprofiler import TickProfiler
+
+
+class Producer:
+	def produce(self):
+		pass
+
+	def work(self, amount):
+		pass
+
+
+class TestTickProfiler(TestCase):
+
+	def setUp(self):
+		Scheduler.create_instance(Mock())
+		self.scheduler = Scheduler()
+		self.profiler = TickProfiler(self.scheduler, window_size=4, max_windows=2, max_longest=3)
+		self.scheduler.set_profiler(self.profiler)
+		self.scheduler.before_ticking()
+
+	def tearDown(self):
+		Scheduler.destroy_instance()
+
+	def run_ticks(self, ticks):
+		for _ in range(ticks):
+			self.scheduler.tick(self.scheduler.cur_tick + 1)
+
+	def test_callbacks_are_grouped(self):
+		producer = Producer()
+		self.scheduler.add_new_object(producer.produce, producer, run_in=1, loops=-1)
+		self.scheduler.add_new_object(Callback(producer.work, 2), producer, run_in=2)
+		self.run_ticks(10)
+
+		calls = {(entry['owner'], entry['method']): entry['calls']
+		         for entry in self.profiler.get_callback_data()}
+		self.assertEqual({('Producer', 'produce'): 10, ('Producer', 'work'): 1}, calls)
+		self.assertEqual({'Producer': 11}, {owner: data['calls']
+		                 for owner, data in self.profiler.get_owner_data().items()})
+		self.assertEqual(10, self.profiler.get_ticks())
+
+	def test_windows_and_longest(self):
+		producer = Producer()
+		self.scheduler.add_new_object(producer.produce, producer, run_in=1, loops=-1)
+		self.run_ticks(10)
+
+		# ticks 0-3 and 4-7 are finished windows, only the last two are kept
+		self.assertEqual([0, 4], [window['first_tick'] for window in self.profiler.windows])
+		summary = self.profiler.get_summary()
+		self.assertEqual(0, summary['first_tick'])
+		self.assertEqual(10, summary['calls'])
+		self.assertEqual('Producer', summary['top'][0]['owner'])
+		self.assertEqual(2, self.profiler.get_summary(windows=1)['calls'])
+
+		longest = self.profiler.get_longest_callbacks()
+		self.assertEqual(3, len(longest))
+		self.assertEqual(sorted((entry['time'] for entry in longest), reverse=True),
+		                 [entry['time'] for entry in longest])
+
+	def test_export(self):
+		producer = Producer()
+		self.scheduler.add_new_object(producer.produce, producer, run_in=1, loops=3)
+		self.run_ticks(5)
+
+		f = io.StringIO()
+		self.profiler.export_csv(f)
+		rows = list(csv.DictReader(io.StringIO(f.getvalue())))
+		self.assertEqual(1, len(rows))
+		self.assertEqual('produce', rows[0]['method'])
+		self.assertEqual('3', rows[0]['calls'])
+
+		f = io.StringIO()
+		self.profiler.export_json(f)
+		data = json.loads(f.getvalue())
+		self.assertEqual(3, data['callbacks'][0]['calls'])
+		self.assertIn('Producer', data['owners'])
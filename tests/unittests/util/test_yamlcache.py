@@ -0,0 +1,98 @@
+# ###################################################
+# Copyright (C) 2008-2016 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from horizons.util.yamlcache import YamlCache
+
+
+class YamlCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		super().setUp()
+		self.tmp_dir = tempfile.mkdtemp()
+		self.cache_patcher = mock.patch.multiple(YamlCache, cache=None,
+			cache_filename=os.path.join(self.tmp_dir, 'yamldata.cache'),
+			_schedule_sync=mock.Mock())
+		self.cache_patcher.start()
+		self.data_dir = os.path.join(self.tmp_dir, 'data')
+		os.makedirs(os.path.join(self.data_dir, 'sub'))
+		self.write('a.yaml', 'id: RES.GOLD\n')
+		self.write('sub/b.yaml', 'id: 2\n')
+
+	def tearDown(self):
+		self.cache_patcher.stop()
+		shutil.rmtree(self.tmp_dir)
+		super().tearDown()
+
+	def write(self, name, content):
+		with open(os.path.join(self.data_dir, name), 'w') as f:
+			f.write(content)
+
+	def reopen(self):
+		"""Simulate a new process reading the cache from disk."""
+		YamlCache.cache.sync()
+		YamlCache.cache = None
+
+	def test_game_data_is_converted(self):
+		from horizons.constants import RES
+		data = YamlCache.get_file(os.path.join(self.data_dir, 'a.yaml'), game_data=True)
+		self.assertEqual({'id': RES.GOLD}, data)
+
+	def test_unchanged_file_is_not_parsed_again(self):
+		filename = os.path.join(self.data_dir, 'sub', 'b.yaml')
+		self.assertEqual({'id': 2}, YamlCache.get_file(filename))
+		self.reopen()
+		with mock.patch.object(YamlCache, 'load_yaml_data') as load:
+			self.assertEqual({'id': 2}, YamlCache.get_file(filename))
+			self.assertFalse(load.called)
+
+			# touching the file doesn't require parsing it again
+			stat = os.stat(filename)
+			os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+			self.assertEqual({'id': 2}, YamlCache.get_file(filename))
+			self.assertFalse(load.called)
+
+	def test_changed_file_is_parsed_again(self):
+		filename = os.path.join(self.data_dir, 'sub', 'b.yaml')
+		YamlCache.get_file(filename)
+		self.reopen()
+		self.write('sub/b.yaml', 'id: 42\n')
+		self.assertEqual({'id': 42}, YamlCache.get_file(filename))
+
+	def test_directory(self):
+		result = YamlCache.get_directory(self.data_dir)
+		self.assertEqual([self.data_dir + '/a.yaml', self.data_dir + '/sub/b.yaml'],
+		                 [filename for filename, data in result])
+		self.reopen()
+		YamlCache._open_cache()
+		with mock.patch('os.stat', wraps=os.stat) as stat:
+			self.assertEqual(result, YamlCache.get_directory(self.data_dir))
+			# one stat per file and no further checks
+			self.assertEqual(2, stat.call_count)
+
+		self.write('c.yaml', 'id: 3\n')
+		result = YamlCache.get_directory(self.data_dir)
+		self.assertEqual(3, len(result))
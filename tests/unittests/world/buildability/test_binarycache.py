@@ -0,0 +1,127 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+
+from horizons.world.buildability.binarycache import BinaryBuildabilityCache
+from horizons.world.buildability.bitgrid import BitGrid
+from tests.unittests import TestCase
+
+
+class MockTerrainBuildabilityCache:
+	def __init__(self, land_or_coast):
+		self.land_or_coast = land_or_coast
+
+
+def get_fitting_rectangles(coords_set, width, height):
+	"""Brute force version of BitGrid.erode."""
+	result = set()
+	for (x, y) in coords_set:
+		if all((x + dx, y + dy) in coords_set for dx in range(width) for dy in range(height)):
+			result.add((x, y))
+	return result
+
+
+class TestBitGrid(TestCase):
+	def setUp(self):
+		super().setUp()
+		self.grid = BitGrid(-2, 3, 8, 6)
+
+	def test_set_operations(self):
+		grid = self.grid
+		self.assertFalse(grid)
+		grid.add((-2, 3))
+		grid.add((5, 8))
+		grid.add((1, 4))
+		self.assertIn((1, 4), grid)
+		self.assertNotIn((1, 5), grid)
+		self.assertNotIn((6, 8), grid)
+		self.assertNotIn((1, 2), grid)
+		self.assertEqual(len(grid), 3)
+		self.assertEqual(list(grid), [(-2, 3), (1, 4), (5, 8)])
+		self.assertEqual(grid, {(-2, 3), (1, 4), (5, 8)})
+
+		grid.discard((1, 4))
+		grid.discard((100, 100))
+		self.assertEqual(grid, {(-2, 3), (5, 8)})
+
+		other = grid.empty_copy()
+		other.add((5, 8))
+		other.add((0, 3))
+		self.assertIsInstance(grid.intersection(other), BitGrid)
+		self.assertEqual(grid.intersection(other), {(5, 8)})
+		self.assertEqual(grid.union(other), {(-2, 3), (0, 3), (5, 8)})
+		self.assertEqual(grid.difference(other), {(-2, 3)})
+		self.assertEqual(grid.intersection({(-2, 3), (7, 7)}), {(-2, 3)})
+		self.assertEqual(grid.union([(7, 7)]), {(-2, 3), (5, 8), (7, 7)})
+
+	def test_erode(self):
+		rng = random.Random(42)
+		for _ in range(20):
+			grid = self.grid.empty_copy()
+			for x in range(-2, 6):
+				for y in range(3, 9):
+					if rng.random() < 0.8:
+						grid.add((x, y))
+			for width, height in [(1, 1), (2, 2), (2, 3), (3, 2), (4, 4), (6, 6), (8, 6), (9, 1)]:
+				self.assertEqual(grid.erode(width, height), get_fitting_rectangles(set(grid), width, height))
+
+
+class TestBinaryBuildabilityCache(TestCase):
+	def setUp(self):
+		super().setUp()
+		land_or_coast = BitGrid(0, 0, 12, 10)
+		for x in range(12):
+			for y in range(10):
+				if (x, y) != (5, 5):
+					land_or_coast.add((x, y))
+		self.terrain_cache = MockTerrainBuildabilityCache(land_or_coast)
+		self.buildability_cache = BinaryBuildabilityCache(self.terrain_cache)
+
+	def check_cache(self, coords_set):
+		for (width, height), size_set in self.buildability_cache.cache.items():
+			self.assertEqual(size_set, get_fitting_rectangles(coords_set, width, height), (width, height))
+
+	def test_add_and_remove(self):
+		bc = self.buildability_cache
+		self.check_cache(set())
+
+		bc.add_area([(x, y) for x in range(2, 6) for y in range(1, 4)])
+		self.assertIn((3, 1), bc.cache[(3, 3)])
+		self.assertNotIn((2, 1), bc.cache[(4, 4)])
+		self.check_cache(set(bc.coords_set))
+
+		bc.remove_area([(3, 2)])
+		self.assertNotIn((2, 1), bc.cache[(2, 2)])
+		self.assertIn((4, 1), bc.cache[(2, 2)])
+		self.check_cache(set(bc.coords_set))
+
+	def test_random_changes(self):
+		bc = self.buildability_cache
+		rng = random.Random(7)
+		area = sorted(self.terrain_cache.land_or_coast)
+		for _ in range(30):
+			chunk = rng.sample(area, rng.randint(1, 40))
+			if rng.random() < 0.6:
+				bc.add_area([coords for coords in chunk if coords not in bc.coords_set])
+			else:
+				bc.remove_area([coords for coords in chunk if coords in bc.coords_set])
+			self.check_cache(set(bc.coords_set))
@@ -19,10 +19,31 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import random
+
 from horizons.world.buildability.connectedareacache import ConnectedAreaCache
 from tests.unittests import TestCase
 
 
+def get_areas(coords_set):
+	"""Brute force: return {(x, y): set of the coordinates connected to (x, y)}."""
+	areas = {}
+	for seed_coords in coords_set:
+		if seed_coords in areas:
+			continue
+		area = {seed_coords}
+		stack = [seed_coords]
+		while stack:
+			x, y = stack.pop()
+			for coords in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+				if coords in coords_set and coords not in area:
+					area.add(coords)
+					stack.append(coords)
+		for coords in area:
+			areas[coords] = area
+	return areas
+
+
 class TestConnectedAreaCache(TestCase):
 	def test(self):
 		cache = ConnectedAreaCache()
@@ -59,3 +80,56 @@ class TestConnectedAreaCache(TestCase):
 
 		cache.remove_area([(1, 1), (1, 4)])
 		self.assertEqual(0, len(cache.areas))
+
+	def test_lazy_split(self):
+		cache = ConnectedAreaCache()
+		cache.add_area([(x, 0) for x in range(10)])
+		# 10 new tiles, each of the last 9 is then merged into the existing line
+		self.assertEqual(19, cache.tiles_touched)
+
+		# removing the end of a line can't split it
+		cache.remove_area([(9, 0)])
+		self.assertFalse(cache._dirty)
+
+		# removing from the middle of a line splits it on the next query
+		cache.remove_area([(4, 0)])
+		cache.remove_area([(6, 0)])
+		self.assertEqual(1, len(cache._dirty))
+		touched = cache.tiles_touched
+		self.assertFalse(cache.is_connected((0, 0), (5, 0)))
+		self.assertEqual(touched + 7, cache.tiles_touched)
+		self.assertTrue(cache.is_connected((0, 0), (3, 0)))
+		self.assertFalse(cache.is_connected((5, 0), (7, 0)))
+		self.assertFalse(cache.is_connected((5, 0), (6, 0)))
+
+	def test_no_split_around_hole(self):
+		cache = ConnectedAreaCache()
+		cache.add_area([(x, y) for x in range(3) for y in range(3)])
+		cache.remove_area([(1, 1)])
+		self.assertFalse(cache._dirty)
+		cache.remove_area([(1, 0)])
+		self.assertEqual(1, len(cache._dirty))
+		self.assertTrue(cache.is_connected((0, 0), (2, 0)))
+
+	def test_random_changes(self):
+		rng = random.Random(3)
+		cache = ConnectedAreaCache()
+		coords_list = [(x, y) for x in range(12) for y in range(12)]
+		present = set()
+		for _ in range(200):
+			chunk = rng.sample(coords_list, rng.randint(1, 15))
+			if rng.random() < 0.5:
+				cache.add_area([coords for coords in chunk if coords not in present])
+				present.update(chunk)
+			else:
+				cache.remove_area([coords for coords in chunk if coords in present])
+				present.difference_update(chunk)
+
+			expected = get_areas(present)
+			for coords1 in rng.sample(coords_list, 10):
+				for coords2 in rng.sample(coords_list, 10):
+					connected = coords1 in present and coords2 in present and \
+					            expected[coords1] is expected[coords2]
+					self.assertEqual(connected, cache.is_connected(coords1, coords2))
+		self.assertEqual(sorted(map(sorted, cache.areas.values())),
+		                 sorted(map(sorted, {id(area): area for area in expected.values()}.values())))
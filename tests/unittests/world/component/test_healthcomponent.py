@@ -23,7 +23,7 @@ from unittest import TestCase
 from unittest.mock import Mock
 
 from horizons.component.healthcomponent import HealthComponent
-from tests.dummy import Dummy
+from horizons.util.dummy import Dummy
 
 
 class TestHealthComponent(TestCase):
@@ -0,0 +1,63 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from horizons.util.shapes import Rect
+from horizons.world.gridmap import GridMap, IslandMap
+from tests.unittests import TestCase
+
+
+class TestGridMap(TestCase):
+	def setUp(self):
+		super().setUp()
+		self.map = GridMap(Rect.init_from_borders(-2, 3, 5, 8))
+
+	def test_dict_interface(self):
+		grid_map = self.map
+		self.assertEqual(0, len(grid_map))
+		grid_map[(4, 4)] = 0
+		grid_map[(-2, 3)] = 7
+		grid_map[(4, 4)] = 2
+		self.assertEqual(2, len(grid_map))
+		self.assertIn((4, 4), grid_map)
+		self.assertNotIn((4, 5), grid_map)
+		self.assertNotIn((10, 10), grid_map)
+		self.assertEqual(2, grid_map[(4, 4)])
+		self.assertIsNone(grid_map.get((10, 10)))
+		with self.assertRaises(KeyError):
+			grid_map[(4, 5)]
+		self.assertEqual({(-2, 3): 7, (4, 4): 2}, dict(grid_map))
+
+		del grid_map[(-2, 3)]
+		self.assertEqual([(4, 4)], list(grid_map))
+		with self.assertRaises(KeyError):
+			del grid_map[(-2, 3)]
+
+	def test_island_map(self):
+		islands = ['island 0', 'island 1']
+		island_map = IslandMap(Rect.init_from_borders(0, 0, 9, 9), islands)
+		island_map[(1, 2)] = 'island 1'
+		island_map[(1, 1)] = 'island 0'
+		self.assertEqual('island 1', island_map.get((1, 2)))
+		self.assertEqual([(1, 1), (1, 2)], list(island_map))
+		islands.append('island 2')
+		island_map[(9, 9)] = 'island 2'
+		self.assertEqual('island 2', island_map[(9, 9)])
@@ -0,0 +1,70 @@
+# ###################################################
+# Copyright (C) 2008-2016 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+from unittest import TestCase
+
+from horizons.util.shapes import RadiusRect, Rect
+from horizons.world.providerhandler import ProviderHandler
+
+
+class Provider:
+	def __init__(self, worldid, x, y, size, resources, owner):
+		self.worldid = worldid
+		self.position = Rect.init_from_topleft_and_size(x, y, size, size)
+		self.provided_resources = resources
+		self.owner = owner
+
+
+class TestProviderHandler(TestCase):
+
+	def test_query_matches_linear_scan(self):
+		rng = random.Random(42)
+		handler = ProviderHandler()
+		worldids = list(range(300))
+		rng.shuffle(worldids)
+		providers = []
+		for worldid in worldids:
+			provider = Provider(worldid, rng.randint(-5, 60), rng.randint(-5, 60), rng.randint(1, 3),
+			                    rng.sample([1, 2, 3], rng.randint(1, 2)), rng.choice(['a', 'b']))
+			handler.append(provider)
+			providers.append(provider)
+		for provider in providers[::4]:
+			handler.remove(provider)
+		providers = providers[1::4] + providers[2::4] + providers[3::4]
+
+		for _ in range(50):
+			center = Rect.init_from_topleft_and_size(rng.randint(-10, 65), rng.randint(-10, 65), 2, 2)
+			reach = RadiusRect(center, rng.choice([0, 3, 8, 20, 100]))
+			resources = rng.sample([1, 2, 3], rng.randint(1, 2))
+			player = rng.choice([None, 'a'])
+			expected = sorted(
+				(p for p in providers
+				 if set(p.provided_resources) & set(resources)
+				 and (player is None or p.owner == player)
+				 and p.position.distance(center) <= reach.radius),
+				key=lambda p: p.worldid)
+			self.assertEqual(expected, handler.get_providers_in_range(reach, resources, player))
+			all_expected = sorted(
+				(p for p in providers
+				 if (player is None or p.owner == player) and p.position.distance(center) <= reach.radius),
+				key=lambda p: p.worldid)
+			self.assertEqual(all_expected, handler.get_providers_in_range(reach, None, player))
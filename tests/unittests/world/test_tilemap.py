@@ -0,0 +1,128 @@
+# ###################################################
+# Copyright (C) 2008-2017 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import mock
+
+from horizons.util.shapes import Rect
+from horizons.world.tilemap import IslandTileMap, WaterTileMap, WorldTileMap
+from tests.unittests import TestCase
+
+
+class Tile:
+	created = 0
+	id = 1
+	classes = ['constructible']
+
+	def __init__(self, session, x, y):
+		Tile.created += 1
+		self.x = x
+		self.y = y
+		self.rotation = None
+
+	def act(self, rotation):
+		self.rotation = rotation
+
+
+class Coast(Tile):
+	classes = ['coastline']
+
+
+class TestIslandTileMap(TestCase):
+	def setUp(self):
+		super().setUp()
+		Tile.created = 0
+		self.map = IslandTileMap(None, Rect.init_from_topleft_and_size(10, 20, 40, 30))
+		self.map.add_tile(12, 21, Tile, 135)
+		self.map.add_tile(11, 20, Coast, 45)
+		self.map.add_tile(40, 40, Tile, 315)
+
+	def test_lazy_creation(self):
+		tile_map = self.map
+		self.assertEqual(3, len(tile_map))
+		self.assertIn((11, 20), tile_map)
+		self.assertNotIn((11, 21), tile_map)
+		self.assertNotIn((0, 0), tile_map)
+		self.assertIs(Coast, tile_map.get_tile_class((11, 20)))
+		self.assertIsNone(tile_map.get_tile_class((11, 21)))
+		self.assertIsNone(tile_map.get_instance((12, 21)))
+		self.assertEqual(0, Tile.created)
+
+		tile = tile_map[(12, 21)]
+		self.assertEqual((12, 21, 135), (tile.x, tile.y, tile.rotation))
+		self.assertIs(tile, tile_map.get((12, 21)))
+		self.assertIs(tile, tile_map.get_instance((12, 21)))
+		self.assertEqual(1, Tile.created)
+		self.assertIsNone(tile_map.get((11, 21)))
+		with self.assertRaises(KeyError):
+			tile_map[(11, 21)]
+
+	def test_order(self):
+		# like a dict, the map keeps the order in which the tiles were added
+		self.assertEqual([(12, 21), (11, 20), (40, 40)], list(self.map))
+		del self.map[(11, 20)]
+		self.map[(30, 30)] = Tile(None, 30, 30)
+		self.assertEqual([(12, 21), (40, 40), (30, 30)], list(self.map))
+		self.assertEqual(3, len(self.map))
+
+	def test_create_tiles(self):
+		self.map.create_tiles(Rect.init_from_borders(0, 0, 15, 25))
+		self.assertEqual(2, Tile.created)
+		self.assertIsNotNone(self.map.get_instance((11, 20)))
+		self.assertIsNone(self.map.get_instance((40, 40)))
+
+
+class TestWorldTileMap(TestCase):
+	def setUp(self):
+		super().setUp()
+		Tile.created = 0
+		self.water_map = WaterTileMap(None, Rect.init_from_borders(0, 0, 29, 29), Tile, -5, -5, 10)
+		self.island = mock.Mock()
+		self.island.ground_map = IslandTileMap(None, Rect.init_from_borders(12, 12, 13, 13))
+		self.island.ground_map.add_tile(12, 12, Coast, 45)
+
+	def test_water_blocks(self):
+		# all tiles of a block are positioned at the same spot
+		self.assertEqual(900, len(self.water_map))
+		tile = self.water_map[(6, 12)]
+		self.assertEqual((4, 14), (tile.x, tile.y))
+		self.assertIs(tile, self.water_map[(6, 12)])
+		tile = self.water_map[(4, 5)]
+		self.assertEqual((-6, 14), (tile.x, tile.y))
+		self.assertEqual(2, Tile.created)
+
+	def test_world_map(self):
+		ground_map = self.water_map.copy()
+		del ground_map[(12, 12)]
+		self.assertIn((12, 12), self.water_map)
+		self.assertNotIn((12, 12), ground_map)
+		# the copy shares the instances
+		self.assertIs(ground_map[(0, 0)], self.water_map[(0, 0)])
+
+		full_map = WorldTileMap(self.water_map, {(12, 12): self.island})
+		self.assertIs(Coast, full_map.get_tile_class((12, 12)))
+		self.assertIs(Tile, full_map.get_tile_class((13, 13)))
+		self.assertIsNone(full_map.get_instance((12, 12)))
+		self.assertIs(self.island.ground_map[(12, 12)], full_map[(12, 12)])
+		self.assertNotIn((30, 30), full_map)
+		self.assertEqual(900, len(full_map))
+
+		full_map[(12, 12)] = 'replacement'
+		self.assertEqual('replacement', full_map[(12, 12)])
@@ -23,9 +23,9 @@
 
 from unittest import TestCase
 
+from horizons.util.dummy import Dummy
 from horizons.util.worldobject import WorldObject
 from horizons.world import World
-from tests.dummy import Dummy
 
 
 class TestWorld(TestCase):